@@ -104,15 +104,25 @@ from livekit.agents.multimodal import MultimodalAgent
 from livekit.plugins import openai
 from dotenv import load_dotenv
 from api import AssistantFnc
-from prompts import WELCOME_MESSAGE, INSTRUCTIONS, LOOKUP_VIN_MESSAGE, TASK_EXECUTION_PROMPT
+from prompts import WELCOME_MESSAGE, INSTRUCTIONS, LOOKUP_VIN_MESSAGE, FAST_PATH_RESULT_MESSAGE
+from fast_path import plan_fast_path, LatencyTracker
+from context_budget import ContextBudget, GUIDANCE, INSTRUCTION, TURN
+from prompt_delta import PromptDelta
 import os
 import json
+import time
+import asyncio
+import inspect
+import logging
 
 load_dotenv()
 
+logger = logging.getLogger("agent")
+logger.setLevel(logging.INFO)
+
 async def entrypoint(ctx: JobContext):
     await ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL)
-    await ctx.wait_for_participant()
+    participant = await ctx.wait_for_participant()
     
     model = openai.realtime.RealtimeModel(
         instructions=INSTRUCTIONS,
@@ -120,12 +130,37 @@ async def entrypoint(ctx: JobContext):
         temperature=0.8,
         modalities=["audio", "text"]
     )
-    assistant_fnc = AssistantFnc()
+    assistant_fnc = AssistantFnc(user_name=participant.identity)
     assistant = MultimodalAgent(model=model, fnc_ctx=assistant_fnc)
     assistant.start(ctx.room)
+    latency = LatencyTracker()
+    background = set()
+    
+    def log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("background task failed", exc_info=task.exception())
+    
+    def in_background(coro):
+        # Keep a reference so the task is not collected before it finishes
+        task = asyncio.create_task(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+        task.add_done_callback(log_failure)
+    
+    # Tool-call writes are buffered per turn; commit them at session close too
+    ctx.add_shutdown_callback(assistant_fnc.flush_writes)
     
     session = model.sessions[0]
-    session.conversation.item.create(
+    # Keeps per-turn prompt size flat over long calls
+    context = ContextBudget(session.conversation, budget_tokens=int(os.getenv("CONTEXT_BUDGET_TOKENS", "4000")))
+    # Task guidance goes out once per session; repeats get a short reference
+    prompt_delta = PromptDelta()
+    
+    async def log_prompt_stats():
+        prompt_delta.log_stats()
+    
+    ctx.add_shutdown_callback(log_prompt_stats)
+    context.add(
         llm.ChatMessage(
             role="assistant",
             content=WELCOME_MESSAGE
@@ -133,13 +168,28 @@ async def entrypoint(ctx: JobContext):
     )
     session.response.create()
     
+    @assistant.on("agent_started_speaking")
+    def on_agent_started_speaking():
+        latency.finish_turn()
+    
+    @assistant.on("agent_stopped_speaking")
+    def on_agent_stopped_speaking():
+        # The turn is over: commit its writes in one transaction, off the voice path
+        in_background(assistant_fnc.flush_writes())
+    
+    @assistant.on("agent_speech_committed")
+    def on_agent_speech_committed(msg: llm.ChatMessage):
+        context.track(msg, TURN)
+    
     @session.on("user_speech_committed")
     def on_user_speech_committed(msg: llm.ChatMessage):
         if isinstance(msg.content, list):
             msg.content = "\n".join("[image]" if isinstance(x, llm.ChatImage) else x for x in msg)
+        # The committed speech is already a conversation item; count it, don't add it again
+        context.track(msg, TURN)
             
         if assistant_fnc.has_car():
-            handle_query(msg)
+            handle_query(msg, committed=True)
         else:
             find_profile(msg)
     
@@ -151,49 +201,98 @@ async def entrypoint(ctx: JobContext):
             find_profile(msg)
         
     def find_profile(msg: llm.ChatMessage):
-        session.conversation.item.create(
+        context.new_turn()
+        context.add(
             llm.ChatMessage(
                 role="system",
-                content=LOOKUP_VIN_MESSAGE(msg)
+                content=LOOKUP_VIN_MESSAGE(msg.content)
+            ),
+            INSTRUCTION
+        )
+        session.response.create()
+        
+    def add_user_message(msg: llm.ChatMessage, committed: bool):
+        # Typed messages are not conversation items yet; committed speech is
+        if not committed:
+            context.add(
+                llm.ChatMessage(
+                    role="user",
+                    content=msg.content
+                )
             )
+        
+    async def answer_fast_path(msg: llm.ChatMessage, committed: bool, tool_name: str, kwargs: dict, started: float):
+        try:
+            result = getattr(assistant_fnc, tool_name)(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception:
+            # Never leave the turn silent: let the model answer it instead
+            logger.exception("fast path %s failed, falling back to the model", tool_name)
+            add_user_message(msg, committed)
+            session.response.create()
+            latency.start_turn("chat", started, context_tokens=context.tokens)
+            return
+        content = FAST_PATH_RESULT_MESSAGE(msg.content, result)
+        
+        add_user_message(msg, committed)
+        context.add(
+            llm.ChatMessage(
+                role="system",
+                content=content
+            ),
+            INSTRUCTION
         )
         session.response.create()
+        latency.start_turn("fast", started, len(content), context.tokens)
+        
+    def handle_query(msg: llm.ChatMessage, committed: bool = False):
+        started = time.perf_counter()
+        # Drop last turn's instructions and summarize old turns if over budget
+        context.new_turn()
         
-    def handle_query(msg: llm.ChatMessage):
         # Check if it's a task execution request
         intent_analysis = assistant_fnc.analyze_intent(msg.content)
         
-        if intent_analysis.get("is_task", False):
+        # Deterministic tools run locally; the model only has to speak the result
+        fast_path = plan_fast_path(intent_analysis)
+        if fast_path:
+            in_background(answer_fast_path(msg, committed, *fast_path, started))
+        elif intent_analysis.get("is_task", False):
             # It's a task execution request, handle it with step-by-step approval
             task_type = intent_analysis.get("task_type", "unknown")
+            guidance, content = prompt_delta.task_prompt(task_type)
             
-            # Create a system message with task execution prompt
-            session.conversation.item.create(
+            # Guidance the session has not seen yet stays for the rest of it
+            if guidance:
+                context.add(
+                    llm.ChatMessage(
+                        role="system",
+                        content=guidance
+                    ),
+                    GUIDANCE
+                )
+            
+            # Create a system message pointing the model at the task guidance
+            context.add(
                 llm.ChatMessage(
                     role="system",
-                    content=TASK_EXECUTION_PROMPT(task_type, msg.content)
-                )
+                    content=content
+                ),
+                INSTRUCTION
             )
             
             # Create user message
-            session.conversation.item.create(
-                llm.ChatMessage(
-                    role="user",
-                    content=msg.content
-                )
-            )
+            add_user_message(msg, committed)
             
             # Generate response
             session.response.create()
+            latency.start_turn("task", started, len(content) + len(guidance or ""), context.tokens)
         else:
             # Handle as a regular query
-            session.conversation.item.create(
-                llm.ChatMessage(
-                    role="user",
-                    content=msg.content
-                )
-            )
+            add_user_message(msg, committed)
             session.response.create()
+            latency.start_turn("chat", started, context_tokens=context.tokens)
     
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
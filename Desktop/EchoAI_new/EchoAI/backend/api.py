@@ -439,14 +439,28 @@
 from livekit.agents import llm
 import enum
 from typing import Annotated, Dict, List, Any
+import asyncio
 import logging
 import json
-from db_driver import DatabaseDriver
+from contextlib import aclosing
+from async_db_driver import AsyncDatabaseDriver
+from db_driver import CalendarEvent, FROZEN_MODELS
+from interval_index import IntervalTree, event_span, normalize_slot
+from metrics_store import MetricSeries
+from intent_engine import INTENT_ENGINE
 
 logger = logging.getLogger("user-data")
 logger.setLevel(logging.INFO)
 
-DB = DatabaseDriver()
+# Async so tool calls never block the agent's event loop on SQLite. Writes
+# from every room on this worker are group-committed. The read cache returns
+# shared frozen rows and is per process: approvals made by another worker
+# reach this one's cached calendar reads after at most EVENTS_CACHE_TTL
+# seconds. Pending tasks are always read from the database.
+DB = AsyncDatabaseDriver(cache_size=1024, group_commit=True)
+
+# Most pending tasks read out by list_pending_tasks
+PENDING_LIST_LIMIT = 20
 
 class CarDetails(enum.Enum):
     VIN = "vin"
@@ -464,9 +478,13 @@ class AppState(enum.Enum):
     TRANSACTIONS = "transactions"
 
 class AssistantFnc(llm.FunctionContext):
-    def __init__(self):
+    def __init__(self, user_name: str = "default"):
         super().__init__()
         
+        # Pending tasks live in the database, keyed by the participant
+        self._user_name = user_name
+        self._user_id = None
+        
         self._car_details = {
             CarDetails.VIN: "",
             CarDetails.Make: "",
@@ -475,10 +493,53 @@ class AssistantFnc(llm.FunctionContext):
         }
         
         self._app_state = AppState.HOME
-        self._calendar_events = []
-        self._metrics_data = {}
-        self._pending_tasks = []
-        self._transaction_history = []
+        self._metrics_data: Dict[str, MetricSeries] = {}
+        
+        # Write-behind buffer: this turn's tool-call writes, committed together
+        # by flush_writes at turn end or session close
+        self._unsaved_events: List[Dict[str, Any]] = []
+        self._unsaved_transactions: List[Dict[str, Any]] = []
+        # Spans of the unsaved events, so conflict checks see them too
+        self._unsaved_spans = IntervalTree()
+        self._flush_lock = asyncio.Lock()
+        # The fast path and the model's tool calls can both look the user up first
+        self._user_lock = asyncio.Lock()
+        
+    async def _get_user_id(self) -> int:
+        if self._user_id is None:
+            async with self._user_lock:
+                if self._user_id is None:
+                    user = await DB.get_user_by_name(self._user_name)
+                    if user is None:
+                        user = await DB.get_or_create_user(self._user_name, "voice")
+                    self._user_id = user.user_id
+        return self._user_id
+    
+    async def flush_writes(self):
+        """Commit buffered calendar events and transactions in one transaction"""
+        async with self._flush_lock:
+            if not self._unsaved_events and not self._unsaved_transactions:
+                return
+            events, self._unsaved_events = self._unsaved_events, []
+            transactions, self._unsaved_transactions = self._unsaved_transactions, []
+            spans, self._unsaved_spans = self._unsaved_spans, IntervalTree()
+            try:
+                await DB.write_batch(events, transactions)
+            except Exception:
+                # Keep them for the next flush rather than dropping the user's writes
+                self._unsaved_events[:0] = events
+                self._unsaved_transactions[:0] = transactions
+                for start, end, event in spans:
+                    self._unsaved_spans.add(start, end, id(event), event)
+                raise
+            logger.info("flushed writes - events: %d, transactions: %d", len(events), len(transactions))
+    
+    @staticmethod
+    def _describe_task(task) -> str:
+        # The cached driver hands out the frozen twins of the row models
+        if isinstance(task, (CalendarEvent, FROZEN_MODELS[CalendarEvent])):
+            return f"Event: {task.title} on {task.date} at {task.time} for {task.duration} minutes"
+        return f"Transaction: {task.type} of ${task.amount:.2f} {task.description}"
         
     def get_car_str(self):
         car_str = ""
@@ -492,48 +553,11 @@ class AssistantFnc(llm.FunctionContext):
         """Analyze the user's intent to determine if it's a task execution request"""
         logger.info("analyzing intent: %s", message)
         
-        # Keywords for different task types
-        app_keywords = {
-            "calendar": ["calendar", "schedule", "appointment", "meeting", "event"],
-            "messages": ["message", "text", "sms", "chat"],
-            "maps": ["map", "directions", "navigate", "location"],
-            "settings": ["settings", "configure", "preferences"],
-            "metrics": ["metrics", "statistics", "analysis", "data", "report"],
-            "transactions": ["transaction", "payment", "purchase", "buy", "send money"]
-        }
-        
-        action_keywords = ["open", "switch", "go to", "launch", "start", "run", "execute", "show", "display"]
-        
         message = message.lower()
         
-        # Check if it's a task request
-        is_task = False
-        task_type = "unknown"
-        
-        # Check for action keywords
-        action_match = any(keyword in message for keyword in action_keywords)
-        
-        # Check for app keywords
-        for app, keywords in app_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                is_task = True
-                task_type = app
-                break
-        
-        # If we have an action and an app match, it's likely a task
-        if action_match and is_task:
-            confidence = "high"
-        elif is_task:
-            confidence = "medium"
-        else:
-            confidence = "low"
-            
-        return {
-            "is_task": is_task,
-            "task_type": task_type,
-            "confidence": confidence,
-            "original_message": message
-        }
+        result = INTENT_ENGINE.match(message)
+        result["original_message"] = message
+        return result
     
     @llm.ai_callable(description="switch to a different app")
     def switch_app(self, app_name: Annotated[str, llm.TypeInfo(description="The name of the app to switch to")]) -> str:
@@ -560,7 +584,7 @@ class AssistantFnc(llm.FunctionContext):
         return f"Currently in {self._app_state.value} app"
     
     @llm.ai_callable(description="add a calendar event")
-    def add_calendar_event(self, 
+    async def add_calendar_event(self, 
         title: Annotated[str, llm.TypeInfo(description="Event title")],
         date: Annotated[str, llm.TypeInfo(description="Event date (YYYY-MM-DD)")],
         time: Annotated[str, llm.TypeInfo(description="Event time (HH:MM)")],
@@ -569,27 +593,74 @@ class AssistantFnc(llm.FunctionContext):
         """Add a calendar event"""
         logger.info("adding calendar event: %s, %s, %s, %s", title, date, time, duration)
         
+        try:
+            date, time = normalize_slot(date, time)
+            start, end = event_span(date, time, duration)
+        except ValueError:
+            return f"Invalid date or time: {date} {time}. Use YYYY-MM-DD and HH:MM"
+        
+        user_id = await self._get_user_id()
+        # Stored events via the span index, plus this turn's unsaved ones
+        conflicts = [(e.title, e.time, e.duration) for e in await DB.get_calendar_conflicts(user_id, date, time, duration)]
+        conflicts += [(e["title"], e["time"], e["duration"]) for _, _, e in self._unsaved_spans.overlapping(start, end)]
+        
         event = {
             "title": title,
             "date": date,
             "time": time,
-            "duration": duration
+            "duration": duration,
+            "user_id": user_id
         }
+        self._unsaved_events.append(event)
+        self._unsaved_spans.add(start, end, id(event), event)
+        
+        result = f"Successfully added event: {title} on {date} at {time} for {duration} minutes"
+        if conflicts:
+            clashes = ", ".join(f"{t} at {at} for {d} minutes" for t, at, d in sorted(conflicts, key=lambda c: c[1]))
+            result += f"\nWarning: this overlaps with {clashes}. Mention it before asking for approval"
+            free = await self._free_slots(user_id, date, duration)
+            if free:
+                result += f"\nFree slots that day: {free}"
+        return result
+    
+    async def _free_slots(self, user_id: int, date: str, duration: int) -> str:
+        also_busy = [(start, end) for start, end, _ in self._unsaved_spans]
+        slots = await DB.find_free_slots(user_id, date, duration, also_busy=also_busy)
+        return ", ".join(f"{start}-{end}" for start, end in slots)
+    
+    @llm.ai_callable(description="find free time slots on a given day")
+    async def find_free_time(self,
+        date: Annotated[str, llm.TypeInfo(description="Date to search (YYYY-MM-DD)")],
+        duration: Annotated[int, llm.TypeInfo(description="Needed duration in minutes")] = 60
+    ) -> str:
+        """Find free time slots on a given day"""
+        logger.info("finding free time: %s, %s", date, duration)
+        
+        try:
+            free = await self._free_slots(await self._get_user_id(), date, duration)
+        except ValueError:
+            return f"Invalid date: {date}. Use YYYY-MM-DD"
         
-        self._calendar_events.append(event)
-        return f"Successfully added event: {title} on {date} at {time} for {duration} minutes"
+        if not free:
+            return f"No free {duration} minute slots on {date}"
+        return f"Free {duration} minute slots on {date}: {free}"
     
     @llm.ai_callable(description="list calendar events")
-    def list_calendar_events(self) -> str:
+    async def list_calendar_events(self) -> str:
         """List calendar events"""
         logger.info("listing calendar events")
         
-        if not self._calendar_events:
+        # Saved events come from the driver's read cache; unsaved ones from this turn
+        saved = await DB.get_calendar_events_for_user(await self._get_user_id())
+        events = [(e.date, e.time, e.title, e.duration) for e in saved]
+        events += [(e["date"], e["time"], e["title"], e["duration"]) for e in self._unsaved_events]
+        
+        if not events:
             return "No calendar events found"
         
         events_str = "Calendar events:\n"
-        for i, event in enumerate(self._calendar_events):
-            events_str += f"{i+1}. {event['title']} on {event['date']} at {event['time']} for {event['duration']} minutes\n"
+        for i, (date, time, title, duration) in enumerate(sorted(events)):
+            events_str += f"{i+1}. {title} on {date} at {time} for {duration} minutes\n"
         
         return events_str
     
@@ -602,13 +673,10 @@ class AssistantFnc(llm.FunctionContext):
         """Add metrics data for analysis"""
         logger.info("adding metrics data: %s, %s, %s", metric_name, metric_value, timestamp)
         
-        if metric_name not in self._metrics_data:
-            self._metrics_data[metric_name] = []
-        
-        self._metrics_data[metric_name].append({
-            "value": metric_value,
-            "timestamp": timestamp
-        })
+        try:
+            self._metrics_data.setdefault(metric_name, MetricSeries()).append(metric_value, timestamp)
+        except ValueError as e:
+            return f"Error adding metric: {str(e)}"
         
         return f"Successfully added metric: {metric_name} = {metric_value} at {timestamp}"
     
@@ -620,20 +688,22 @@ class AssistantFnc(llm.FunctionContext):
         if metric_name not in self._metrics_data:
             return f"No data found for metric: {metric_name}"
         
-        data = self._metrics_data[metric_name]
-        values = [item["value"] for item in data]
+        # Running accumulators answer in constant time; no rescan of history
+        stats = self._metrics_data[metric_name].stats.summary()
         
-        if not values:
+        if not stats["count"]:
             return f"No values found for metric: {metric_name}"
         
-        avg = sum(values) / len(values)
-        min_val = min(values)
-        max_val = max(values)
-        
-        return f"Analysis for {metric_name}:\nCount: {len(values)}\nAverage: {avg:.2f}\nMin: {min_val}\nMax: {max_val}"
+        p = stats["percentiles"]
+        return (
+            f"Analysis for {metric_name}:\nCount: {stats['count']}\nAverage: {stats['mean']:.2f}\n"
+            f"Min: {stats['min']}\nMax: {stats['max']}\nStd dev: {stats['stddev']:.2f}\n"
+            f"Median: {p[50]:.2f}\n90th percentile: {p[90]:.2f}\n99th percentile: {p[99]:.2f}\n"
+            f"Trend: {stats['trend_per_day']:+.2f} per day"
+        )
     
     @llm.ai_callable(description="create a transaction")
-    def create_transaction(self,
+    async def create_transaction(self,
         transaction_type: Annotated[str, llm.TypeInfo(description="Type of transaction (payment, purchase, transfer)")],
         amount: Annotated[float, llm.TypeInfo(description="Transaction amount")],
         recipient: Annotated[str, llm.TypeInfo(description="Recipient of the transaction")] = None,
@@ -642,91 +712,78 @@ class AssistantFnc(llm.FunctionContext):
         """Create a transaction"""
         logger.info("creating transaction: %s, %s, %s, %s", transaction_type, amount, recipient, notes)
         
-        transaction = {
+        description = f"to {recipient}" if recipient else ""
+        if notes:
+            description = f"{description} ({notes})".lstrip()
+        
+        # Saved as pending, with a task_feedback row awaiting approval, on the next flush
+        self._unsaved_transactions.append({
             "type": transaction_type,
             "amount": amount,
-            "recipient": recipient,
-            "notes": notes,
-            "status": "pending"
-        }
-        
-        self._pending_tasks.append({
-            "type": "transaction_approval",
-            "data": transaction
+            "description": description,
+            "user_id": await self._get_user_id()
         })
         
-        return f"Transaction created and pending approval: {transaction_type} of ${amount:.2f} to {recipient}"
+        return f"Transaction created and pending approval: {transaction_type} of ${amount:.2f}" + (f" to {recipient}" if recipient else "")
     
     @llm.ai_callable(description="approve a pending task")
-    def approve_task(self, task_id: Annotated[int, llm.TypeInfo(description="ID of the task to approve")]) -> str:
+    async def approve_task(self, task_id: Annotated[int, llm.TypeInfo(description="ID of the task to approve")]) -> str:
         """Approve a pending task"""
         logger.info("approving task: %s", task_id)
         
-        if task_id < 0 or task_id >= len(self._pending_tasks):
-            return f"Invalid task ID: {task_id}"
-        
-        task = self._pending_tasks[task_id]
+        await self.flush_writes()
+        task = await DB.resolve_task(task_id, "approved", user_id=await self._get_user_id())
+        if task is None:
+            return f"Invalid or already resolved task ID: {task_id}"
         
-        if task["type"] == "transaction_approval":
-            transaction = task["data"]
-            transaction["status"] = "approved"
-            self._transaction_history.append(transaction)
-            result = f"Transaction approved: {transaction['type']} of ${transaction['amount']:.2f} to {transaction['recipient']}"
-        else:
-            result = f"Unknown task type: {task['type']}"
-        
-        # Remove the task from pending
-        self._pending_tasks.pop(task_id)
-        
-        return result
+        return f"Approved {self._describe_task(task)}"
     
     @llm.ai_callable(description="reject a pending task")
-    def reject_task(self, task_id: Annotated[int, llm.TypeInfo(description="ID of the task to reject")]) -> str:
+    async def reject_task(self, task_id: Annotated[int, llm.TypeInfo(description="ID of the task to reject")]) -> str:
         """Reject a pending task"""
         logger.info("rejecting task: %s", task_id)
         
-        if task_id < 0 or task_id >= len(self._pending_tasks):
-            return f"Invalid task ID: {task_id}"
-        
-        task = self._pending_tasks[task_id]
-        
-        if task["type"] == "transaction_approval":
-            transaction = task["data"]
-            transaction["status"] = "rejected"
-            result = f"Transaction rejected: {transaction['type']} of ${transaction['amount']:.2f} to {transaction['recipient']}"
-        else:
-            result = f"Unknown task type: {task['type']}"
+        await self.flush_writes()
+        task = await DB.resolve_task(task_id, "rejected", user_id=await self._get_user_id())
+        if task is None:
+            return f"Invalid or already resolved task ID: {task_id}"
         
-        # Remove the task from pending
-        self._pending_tasks.pop(task_id)
-        
-        return result
+        return f"Rejected {self._describe_task(task)}"
     
     @llm.ai_callable(description="list pending tasks")
-    def list_pending_tasks(self) -> str:
+    async def list_pending_tasks(self) -> str:
         """List pending tasks"""
         logger.info("listing pending tasks")
         
-        if not self._pending_tasks:
+        # Task ids are feedback ids: stable across turns, workers and restarts
+        await self.flush_writes()
+        lines = []
+        async with aclosing(DB.iter_pending_tasks(await self._get_user_id())) as pending:
+            async for task in pending:
+                if len(lines) == PENDING_LIST_LIMIT:
+                    lines.append("...and more, approve or reject these first")
+                    break
+                lines.append(f"{task.feedback_id}. {self._describe_task(task.task)}")
+        
+        if not lines:
             return "No pending tasks"
         
-        tasks_str = "Pending tasks:\n"
-        for i, task in enumerate(self._pending_tasks):
-            if task["type"] == "transaction_approval":
-                transaction = task["data"]
-                tasks_str += f"{i}. Transaction: {transaction['type']} of ${transaction['amount']:.2f} to {transaction['recipient']}\n"
-            else:
-                tasks_str += f"{i}. Unknown task type: {task['type']}\n"
-        
-        return tasks_str
+        return "Pending tasks:\n" + "\n".join(lines) + "\n"
     
     @llm.ai_callable(description="lookup a car by its vin")
-    def lookup_car(self, vin: Annotated[str, llm.TypeInfo(description="The vin of the car to lookup")]):
+    async def lookup_car(self, vin: Annotated[str, llm.TypeInfo(description="The vin of the car to lookup")]):
         logger.info("lookup car - vin: %s", vin)
         
-        result = DB.get_car_by_vin(vin)
+        result = await DB.get_car_by_vin(vin)
         if result is None:
-            return "Car not found"
+            # Speech recognition often gets a character wrong or only the end of the VIN
+            matches = await DB.resolve_vin(vin)
+            if not matches:
+                return "Car not found"
+            if len(matches) > 1:
+                options = ", ".join(f"{car.vin} ({car.year} {car.make} {car.model})" for car in matches)
+                return f"No exact match. Ask which car they mean: {options}"
+            result = matches[0]
         
         self._car_details = {
             CarDetails.VIN: result.vin,
@@ -743,7 +800,7 @@ class AssistantFnc(llm.FunctionContext):
         return f"The car details are: {self.get_car_str()}"
     
     @llm.ai_callable(description="create a new car")
-    def create_car(
+    async def create_car(
         self, 
         vin: Annotated[str, llm.TypeInfo(description="The vin of the car")],
         make: Annotated[str, llm.TypeInfo(description="The make of the car ")],
@@ -751,9 +808,9 @@ class AssistantFnc(llm.FunctionContext):
         year: Annotated[int, llm.TypeInfo(description="The year of the car")]
     ):
         logger.info("create car - vin: %s, make: %s, model: %s, year: %s", vin, make, model, year)
-        result = DB.create_car(vin, make, model, year)
+        result = await DB.create_car(vin, make, model, year)
         if result is None:
-            return "Failed to create car"
+            return "Failed to create car: the VIN is invalid or already registered"
         
         self._car_details = {
             CarDetails.VIN: result.vin,
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import inspect
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+
+from db_driver import DatabaseDriver
+from write_queue import WriteQueue
+
+# DatabaseDriver methods that only read. Everything else is a write and goes
+# through the single writer thread so writers never contend for the file lock.
+READ_METHODS = {
+    "get_user_by_name",
+    "get_apps_for_user",
+    "get_app_by_name",
+    "get_calendar_events_for_user",
+    "get_transactions_for_user",
+    "get_app_usage_metrics",
+    "get_app_category_usage",
+    "get_pending_tasks",
+    "get_transactions_page",
+    "get_calendar_events_page",
+    "get_pending_task",
+    "get_calendar_conflicts",
+    "find_free_slots",
+    "get_car_by_vin",
+    "resolve_vin",
+    "get_users_by_preference",
+}
+
+WRITE_METHODS = {
+    "create_user",
+    "get_or_create_user",
+    "update_user_preferences",
+    "set_user_preferences",
+    "remove_user_preferences",
+    "add_app",
+    "switch_app",
+    "close_app",
+    "ingest_usage_sessions",
+    "add_calendar_event",
+    "update_calendar_event_status",
+    "delete_calendar_event",
+    "create_transaction",
+    "write_batch",
+    "create_car",
+    "import_fleet",
+    "update_transaction_status",
+    "submit_task_feedback",
+    "resolve_task",
+    "check_usage_rollups",
+}
+
+
+# Generator methods; exposed as async iterators that pull batches on a reader thread
+STREAM_METHODS = {
+    "iter_app_usage_metrics",
+    "iter_transactions_for_user",
+    "iter_calendar_events_for_user",
+    "iter_pending_tasks",
+}
+
+
+class AsyncDatabaseDriver:
+    """
+    asyncio front end for DatabaseDriver. Every driver method is available as
+    an `async def` that runs off the event loop: writes on one dedicated
+    writer thread, reads on a small reader pool over WAL-mode connections.
+    Streaming iter_* methods become async iterators. A stream can hold a
+    pooled connection between batches, so close it with contextlib.aclosing
+    (or exhaust it) instead of abandoning it. The pool keeps `streams` extra
+    connections for open streams and at most that many are open at once;
+    further streams wait for one to close, so streams never starve the
+    readers or the writer.
+
+    group_commit=True sends writes through a WriteQueue instead, so writes
+    from many concurrent sessions share one commit per batch.
+    """
+
+    def __init__(self, db_path: str = "smartphone_assistant.sqlite", readers: int = 4,
+                 pragmas: Dict[str, Any] = None, cache_size: int = 0, group_commit: bool = False,
+                 streams: int = 4):
+        # One pooled connection per reader, one for the writer and one per open stream
+        self._driver = DatabaseDriver(db_path, pooled=True, pool_size=readers + 1 + streams, pragmas=pragmas,
+                                      cache_size=cache_size)
+        self._streams = asyncio.Semaphore(streams)
+        self._closed = False
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._queue = WriteQueue(self._driver) if group_commit else None
+
+    @property
+    def sync(self) -> DatabaseDriver:
+        """The underlying synchronous driver, for code that is not on the loop"""
+        return self._driver
+
+    def cache_stats(self) -> Dict[str, int]:
+        # In-memory counters, no need to leave the loop
+        return self._driver.cache_stats()
+
+    async def _run(self, executor: ThreadPoolExecutor, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    async def _write(self, name: str, *args, **kwargs):
+        if self._queue is not None:
+            return await asyncio.wrap_future(self._queue.submit(name, *args, **kwargs))
+        return await self._run(self._writer, getattr(self._driver, name), *args, **kwargs)
+
+    async def aclose(self):
+        self._closed = True
+        if self._queue is not None:
+            await self._run(self._writer, self._queue.close)
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self._driver.close()
+
+
+def _make_async(name: str, write: bool):
+    method = getattr(DatabaseDriver, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if write:
+            return await self._write(name, *args, **kwargs)
+        return await self._run(self._readers, getattr(self._driver, name), *args, **kwargs)
+
+    return wrapper
+
+
+def _make_async_iter(name: str, batch_size: int = 1000):
+    method = getattr(DatabaseDriver, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        async with self._streams:
+            rows = getattr(self._driver, name)(*args, **kwargs)
+            try:
+                while True:
+                    batch = await self._run(self._readers, lambda: list(islice(rows, batch_size)))
+                    if not batch:
+                        return
+                    for row in batch:
+                        yield row
+            finally:
+                if self._closed:
+                    # Finalised after aclose: the reader pool is gone, and
+                    # closing only returns the connection to the closed pool
+                    rows.close()
+                else:
+                    # Release the pooled connection on the reader pool, not the loop
+                    await self._run(self._readers, rows.close)
+
+    return wrapper
+
+
+def _public_methods(cls):
+    return {
+        name for name, member in inspect.getmembers(cls, inspect.isfunction)
+        # run_batch is the WriteQueue's building block, not part of the async API
+        if not name.startswith("_") and name not in ("close", "cache_stats", "run_batch")
+    }
+
+
+_unclassified = _public_methods(DatabaseDriver) - READ_METHODS - WRITE_METHODS - STREAM_METHODS
+if _unclassified:
+    # Keep the async API a complete mirror of the sync one
+    raise RuntimeError(f"classify DatabaseDriver methods as read or write: {sorted(_unclassified)}")
+
+for _name in READ_METHODS:
+    setattr(AsyncDatabaseDriver, _name, _make_async(_name, write=False))
+for _name in WRITE_METHODS:
+    setattr(AsyncDatabaseDriver, _name, _make_async(_name, write=True))
+for _name in STREAM_METHODS:
+    setattr(AsyncDatabaseDriver, _name, _make_async_iter(_name))
@@ -0,0 +1,61 @@
+"""
+Compare connect-per-call against the pooled DatabaseDriver.
+
+Run from the backend directory:
+    python -m benchmarks.db_pool --ops 2000 --threads 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_driver import DatabaseDriver
+
+
+def _seed(driver: DatabaseDriver):
+    user = driver.create_user("bench", "android")
+    apps = [driver.add_app(name, "productivity", user.user_id) for name in ("calendar", "maps", "messages")]
+    return user, apps
+
+
+def _voice_turn(driver: DatabaseDriver, user, apps, i: int):
+    # Roughly what one voice turn touches: app state, calendar and transactions
+    app = apps[i % len(apps)]
+    driver.get_app_by_name(app.name, user.user_id)
+    driver.switch_app(app.app_id, user.user_id)
+    driver.get_calendar_events_for_user(user.user_id)
+    driver.get_transactions_for_user(user.user_id, status="pending")
+
+
+def run(pooled: bool, ops: int, threads: int, pool_size: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        driver = DatabaseDriver(os.path.join(tmp, "bench.sqlite"), pooled=pooled, pool_size=pool_size)
+        user, apps = _seed(driver)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda i: _voice_turn(driver, user, apps, i), range(ops)))
+        elapsed = time.perf_counter() - start
+
+        driver.close()
+        return ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="voice turns to simulate per mode")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    baseline = run(False, args.ops, args.threads, args.pool_size)
+    pooled = run(True, args.ops, args.threads, args.pool_size)
+
+    print(f"connect-per-call: {baseline:10.1f} turns/sec")
+    print(f"pooled:           {pooled:10.1f} turns/sec")
+    print(f"speedup:          {pooled / baseline:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare a commit per write against group commit through WriteQueue when many
+threads write at once, like one worker process serving many rooms.
+
+Run from the backend directory:
+    python -m benchmarks.group_commit --writes 500 --threads 16
+    python -m benchmarks.group_commit --synchronous FULL
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_driver import DEFAULT_PRAGMAS, DatabaseDriver
+from write_queue import WriteQueue
+
+
+def _percentile(ordered, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run(mode: str, writes: int, threads: int, pragmas, max_batch: int, max_delay: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        driver = DatabaseDriver(os.path.join(tmp, "bench.sqlite"), pooled=True, pool_size=threads,
+                                pragmas=pragmas)
+        user = driver.create_user("bench", "android")
+        writer = WriteQueue(driver, max_batch, max_delay) if mode == "group" else None
+
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+
+        def client(n: int):
+            nonlocal errors
+            local = []
+            for i in range(writes):
+                started = time.perf_counter()
+                try:
+                    if writer is None:
+                        driver.create_transaction("payment", 1.0, f"client {n} #{i}", user.user_id)
+                    else:
+                        writer.submit("create_transaction", "payment", 1.0, f"client {n} #{i}", user.user_id).result()
+                except sqlite3.OperationalError:
+                    # "database is locked" once busy_timeout runs out
+                    with lock:
+                        errors += 1
+                    continue
+                local.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(local)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(client, range(threads)))
+        elapsed = time.perf_counter() - start
+
+        commits = writer.stats()["batches"] if writer else len(latencies)
+        if writer:
+            writer.close()
+        driver.close()
+
+    ordered = sorted(latencies)
+    return {
+        "writes_per_sec": len(ordered) / elapsed,
+        "commits_per_sec": commits / elapsed,
+        "p50_ms": _percentile(ordered, 0.50) * 1000,
+        "p99_ms": _percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=500, help="writes per thread")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--synchronous", default=DEFAULT_PRAGMAS["synchronous"], choices=["OFF", "NORMAL", "FULL"])
+    parser.add_argument("--max-batch", type=int, default=128)
+    parser.add_argument("--max-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    pragmas = dict(DEFAULT_PRAGMAS, synchronous=args.synchronous)
+    results = {
+        mode: run(mode, args.writes, args.threads, pragmas, args.max_batch, args.max_delay_ms / 1000)
+        for mode in ("per-call", "group")
+    }
+
+    print(f"{args.threads} threads x {args.writes} writes, synchronous={args.synchronous}")
+    print(f"{'mode':10} {'writes/s':>10} {'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for mode, r in results.items():
+        print(f"{mode:10} {r['writes_per_sec']:10.0f} {r['commits_per_sec']:10.0f} {r['p50_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['max_ms']:8.2f} {r['errors']:7d}")
+    print(f"throughput: {results['group']['writes_per_sec'] / results['per-call']['writes_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the original nested keyword loops with the compiled IntentEngine.
+
+Run from the backend directory:
+    python -m benchmarks.intent_matching --utterances 100000
+"""
+import argparse
+import random
+import time
+
+from intent_engine import INTENT_ENGINE, APP_KEYWORDS, ACTION_KEYWORDS
+
+UTTERANCES = [
+    "open my calendar",
+    "can you show me the schedule for tomorrow's meeting",
+    "send a text to mum saying I'm running late",
+    "what's the context of that email",
+    "navigate to the nearest petrol station",
+    "go to settings and change my preferences",
+    "give me a report on last week's data",
+    "buy two tickets and send money to alex",
+    "how are you today",
+    "launch maps and show directions home",
+]
+
+
+def legacy_analyze_intent(message: str):
+    # analyze_intent as it was before the compiled engine
+    app_keywords = {task_type: list(keywords) for task_type, keywords in APP_KEYWORDS.items()}
+    action_keywords = list(ACTION_KEYWORDS)
+    message = message.lower()
+    is_task = False
+    task_type = "unknown"
+    action_match = any(keyword in message for keyword in action_keywords)
+    for app, keywords in app_keywords.items():
+        if any(keyword in message for keyword in keywords):
+            is_task = True
+            task_type = app
+            break
+    if action_match and is_task:
+        confidence = "high"
+    elif is_task:
+        confidence = "medium"
+    else:
+        confidence = "low"
+    return {"is_task": is_task, "task_type": task_type, "confidence": confidence}
+
+
+def throughput(fn, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    messages = [rng.choice(UTTERANCES) for _ in range(args.utterances)]
+
+    legacy = throughput(legacy_analyze_intent, messages)
+    compiled = throughput(lambda m: INTENT_ENGINE.match(m.lower()), messages)
+
+    print(f"legacy loops:    {legacy:12.0f} utterances/sec")
+    print(f"compiled engine: {compiled:12.0f} utterances/sec")
+
+    print("\nmatches on the sample utterances:")
+    for message in UTTERANCES:
+        result = INTENT_ENGINE.match(message)
+        found = ", ".join(f"{m['task_type']}={m['score']}" for m in result["matches"]) or "-"
+        print(f"  {result['confidence']:6s} {found:34s} {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the original list-of-dicts metric analysis with MetricSeries.
+
+Run from the backend directory:
+    python -m benchmarks.metrics_analysis --points 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from metrics_store import MetricSeries
+
+
+def legacy_analyze(data):
+    # The pure-Python passes analyze_metrics used to make on every call
+    values = [item["value"] for item in data]
+    avg = sum(values) / len(values)
+    return len(values), avg, min(values), max(values)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(100.0, 15.0, args.points)
+    timestamps = np.datetime64("2024-01-01T00:00:00") + np.arange(args.points).astype("timedelta64[m]")
+
+    legacy = [{"value": float(v), "timestamp": str(t)} for v, t in zip(values, timestamps)]
+    series = MetricSeries()
+    series.extend(values, timestamps)
+
+    results = {
+        "legacy avg/min/max": timed(lambda: legacy_analyze(legacy), args.repeat),
+        "numpy summary": timed(series.summary, args.repeat),
+        "running stats summary": timed(series.stats.summary, args.repeat),
+        "numpy rolling_mean(60)": timed(lambda: series.rolling_mean(60), args.repeat),
+        "numpy resample(1h)": timed(lambda: series.resample("1h"), args.repeat),
+        "numpy trend_slope": timed(series.trend_slope, args.repeat),
+    }
+
+    print(f"{args.points} points, best of {args.repeat}")
+    for name, ms in results.items():
+        print(f"{name:26s} {ms:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
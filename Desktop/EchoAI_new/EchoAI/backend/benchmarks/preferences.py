@@ -0,0 +1,111 @@
+"""
+User preferences: encoding, partial updates and lookups by a hot key.
+
+- encode/decode: the old str(dict) quote swap, stdlib json and orjson (when
+  installed) on a typical preferences document
+- update: read-modify-write through get_user_by_name/update_user_preferences
+  against an in-place json_set through set_user_preferences
+- lookup: json_extract over every row against the indexed generated column
+
+Run from the backend directory:
+    python -m benchmarks.preferences --users 100000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import json_codec
+from db_driver import DatabaseDriver
+
+PREFERENCES = {
+    "theme": "dark",
+    "language": "en",
+    "units": "metric",
+    "voice": {"name": "shimmer", "speed": 1.1},
+    "notifications": {"calendar": True, "transactions": True, "metrics": False},
+    "home_address": None,
+    "favorite_apps": ["calendar", "maps", "messages"],
+}
+
+
+def per_call_us(fn, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def codecs(n: int):
+    text = json.dumps(PREFERENCES)
+    rows = [("str(dict) swap", lambda: str(PREFERENCES).replace("'", "\""), None),
+            ("json", lambda: json.dumps(PREFERENCES), lambda: json.loads(text))]
+    if json_codec.orjson is not None:
+        rows.append(("orjson", lambda: json_codec.orjson.dumps(PREFERENCES).decode(),
+                     lambda: json_codec.orjson.loads(text)))
+    print(f"{'codec':16} {'encode us':>10} {'decode us':>10}")
+    for name, encode, decode in rows:
+        decoded = f"{per_call_us(decode, n):10.2f}" if decode else f"{'-':>10}"
+        print(f"{name:16} {per_call_us(encode, n):10.2f} {decoded}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--codec-calls", type=int, default=50_000)
+    args = parser.parse_args()
+
+    codecs(args.codec_calls)
+    print(f"driver codec: {json_codec.CODEC}")
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        driver = DatabaseDriver(db_path, pooled=True, cache_size=1024)
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO users (name, device_type, preferences) VALUES (?, ?, ?)",
+            ((f"user{i}", "ios", json_codec.dumps({**PREFERENCES, "theme": rng.choice(["dark", "light", "auto"]),
+                                                    "language": f"l{rng.randrange(200)}"}))
+             for i in range(args.users))
+        )
+        conn.commit()
+        conn.execute("ANALYZE")
+
+        names = [f"user{rng.randrange(args.users)}" for _ in range(args.updates)]
+        users = {name: driver.get_user_by_name(name) for name in set(names)}
+
+        def read_modify_write(name=iter(names)):
+            name = next(name)
+            prefs = dict(driver.get_user_by_name(name).preferences)
+            prefs["theme"] = "light"
+            driver.update_user_preferences(users[name].user_id, prefs)
+
+        def partial(name=iter(names)):
+            driver.set_user_preferences(users[next(name)].user_id, {"theme": "dark"})
+
+        print(f"update read-modify-write: {per_call_us(read_modify_write, args.updates):8.1f} us")
+        print(f"update json_set:          {per_call_us(partial, args.updates):8.1f} us")
+
+        languages = [f"l{rng.randrange(200)}" for _ in range(args.lookups)]
+
+        def scan(language=iter(languages)):
+            conn.execute("SELECT user_id FROM users WHERE json_extract(preferences, '$.language') = ?",
+                         (next(language),)).fetchall()
+
+        def indexed(language=iter(languages)):
+            driver.get_users_by_preference("language", next(language))
+
+        print(f"lookup json_extract scan: {per_call_us(scan, args.lookups):8.1f} us")
+        print(f"lookup generated column:  {per_call_us(indexed, args.lookups):8.1f} us")
+        conn.close()
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
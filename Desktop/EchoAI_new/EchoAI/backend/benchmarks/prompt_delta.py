@@ -0,0 +1,114 @@
+"""
+Task prompt tokens per session: the full task prompt the agent used to send
+on every task turn against PromptDelta's send-once guidance, on a replayed
+transcript.
+
+"Sent" counts the system items created. "Resident" adds up the task
+instruction tokens the model reads at each response: per-type guidance stays
+for the rest of the session, and the task steps moved into INSTRUCTIONS are
+read on every response, task or not.
+
+Run from the backend directory (a transcript file has one user utterance per
+line; the default is a built-in session):
+    python -m benchmarks.prompt_delta
+    python -m benchmarks.prompt_delta --transcript session.txt --repeat 3
+"""
+import argparse
+
+from context_budget import estimate_tokens
+from fast_path import plan_fast_path
+from intent_engine import INTENT_ENGINE
+from prompt_delta import PromptDelta
+from prompts import INSTRUCTIONS
+
+# The system message the agent created on every task turn before PromptDelta
+LEGACY_TASK_PROMPT = lambda task_type, message: f"""
+    The user has requested to perform a task related to {task_type}. Their message is: "{message}"
+    
+    Follow these steps to help the user:
+    
+    1. Clarify the user's intent - make sure you understand exactly what they want to do
+    2. Break down the task into steps and explain the process
+    3. For each step:
+       a. Explain what you're going to do
+       b. Execute the appropriate function
+       c. Provide feedback on the result
+    4. For critical operations (like transactions):
+       a. Present the details to the user
+       b. Ask for explicit confirmation before proceeding
+       c. Use the approval functions to complete or cancel the operation
+    
+    Keep the user informed throughout the process, and make sure they understand what's happening.
+"""
+
+# The task steps in INSTRUCTIONS before they absorbed LEGACY_TASK_PROMPT's
+LEGACY_TASK_STEPS = """When executing tasks:
+    1. Break down complex tasks into steps
+    2. Explain what you're doing at each step
+    3. Ask for confirmation before proceeding with sensitive operations
+    4. Provide clear feedback on success or failure
+"""
+
+TRANSCRIPT = [
+    "hi there",
+    "schedule a meeting with the dealer tomorrow at 10",
+    "make it an hour long",
+    "add another appointment for the car wash on friday",
+    "what's on my calendar",
+    "make a payment of 40 dollars to the garage",
+    "yes approve it",
+    "send money to alex for the parking",
+    "show me the metrics for battery usage",
+    "give me a report on last week's data",
+    "how are you today",
+    "schedule a service appointment next monday morning",
+    "navigate to the nearest petrol station",
+    "buy a car wash subscription",
+    "move the meeting to 11",
+    "thanks that's all",
+]
+
+
+def replay(utterances):
+    delta = PromptDelta()
+    steps = INSTRUCTIONS[INSTRUCTIONS.index("When executing tasks:"):]
+    guidance_tokens = estimate_tokens(steps) - estimate_tokens(LEGACY_TASK_STEPS)
+    resident_full = resident_delta = 0
+    for message in utterances:
+        intent = INTENT_ENGINE.match(message.lower())
+        task = intent["is_task"] and plan_fast_path(intent) is None
+        if task:
+            guidance, reference = delta.task_prompt(intent["task_type"])
+            if guidance:
+                guidance_tokens += estimate_tokens(guidance)
+            # Sent once and read once: the next turn replaced it
+            resident_full += estimate_tokens(LEGACY_TASK_PROMPT(intent["task_type"], message))
+            resident_delta += estimate_tokens(reference)
+        resident_delta += guidance_tokens
+    stats = delta.stats()
+    stats["full_tokens"] = resident_full
+    return stats, resident_full, resident_delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcript", help="file with one user utterance per line")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the transcript this many times in one session")
+    args = parser.parse_args()
+
+    utterances = TRANSCRIPT
+    if args.transcript:
+        with open(args.transcript) as f:
+            utterances = [line.strip() for line in f if line.strip()]
+    stats, resident_full, resident_delta = replay(utterances * args.repeat)
+
+    print(f"turns: {len(utterances) * args.repeat}, task turns: {stats['task_turns']}, task types: {stats['task_types']}")
+    print(f"{'':10} {'full':>8} {'delta':>8} {'saved':>8}")
+    sent_saved = (stats["full_tokens"] - stats["sent_tokens"]) / stats["full_tokens"] * 100 if stats["full_tokens"] else 0.0
+    print(f"{'sent':10} {stats['full_tokens']:8d} {stats['sent_tokens']:8d} {sent_saved:7.0f}%")
+    saved = (resident_full - resident_delta) / resident_full * 100 if resident_full else 0.0
+    print(f"{'resident':10} {resident_full:8d} {resident_delta:8d} {saved:7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare per-request room listing with the cached RoomRegistry, against a
+local stub of the LiveKit room API.
+
+Run from the backend directory:
+    python -m benchmarks.room_allocation --rooms 5000 --requests 500 --latency-ms 5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from room_registry import RoomRegistry
+
+
+class StubRoomService:
+    def __init__(self, names, latency: float):
+        self._names = names
+        self._latency = latency
+        self.calls = 0
+
+    async def list_rooms(self, request):
+        self.calls += 1
+        await asyncio.sleep(self._latency)
+        return SimpleNamespace(rooms=[SimpleNamespace(name=name) for name in self._names])
+
+
+class StubLiveKitAPI:
+    """Stands in for livekit.api.LiveKitAPI; construction cost is not modelled"""
+
+    def __init__(self, service: StubRoomService):
+        self.room = service
+
+    async def aclose(self):
+        pass
+
+
+async def legacy_generate_room_name(service: StubRoomService) -> str:
+    # What server.py did before: new client and a full listing per request
+    client = StubLiveKitAPI(service)
+    rooms = await client.room.list_rooms(None)
+    await client.aclose()
+    names = [room.name for room in rooms.rooms]
+    name = "room-" + str(uuid.uuid4())[:8]
+    while name in names:
+        name = "room-" + str(uuid.uuid4())[:8]
+    return name
+
+
+async def run_legacy(service: StubRoomService, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await legacy_generate_room_name(service)
+    return requests / (time.perf_counter() - start)
+
+
+def run_registry(service: StubRoomService, requests: int) -> float:
+    registry = RoomRegistry(api_factory=lambda: StubLiveKitAPI(service), ttl=30.0)
+    registry.start()
+    while not registry.rooms():
+        time.sleep(0.001)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        registry.allocate_name()
+    rate = requests / (time.perf_counter() - start)
+    registry.stop()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=5000, help="rooms already on the stub server")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated list_rooms round trip")
+    args = parser.parse_args()
+
+    names = [f"room-{i:08x}" for i in range(args.rooms)]
+
+    legacy_service = StubRoomService(names, args.latency_ms / 1000)
+    legacy = asyncio.run(run_legacy(legacy_service, args.requests))
+
+    registry_service = StubRoomService(names, args.latency_ms / 1000)
+    cached = run_registry(registry_service, args.requests)
+
+    print(f"{args.rooms} rooms, {args.latency_ms} ms list_rooms latency")
+    print(f"list per request: {legacy:12.1f} names/sec  ({legacy_service.calls} list calls)")
+    print(f"room registry:    {cached:12.1f} names/sec  ({registry_service.calls} list calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory and speed of reading usage sessions with the original keyword-built
+dataclasses versus the slotted positional models and lazy tuple streaming.
+
+Run from the backend directory:
+    python -m benchmarks.row_models --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from db_driver import DatabaseDriver
+
+
+@dataclass
+class LegacyAppUsageMetric:
+    # The row model as it was: a plain dataclass with a per-instance __dict__
+    metric_id: int
+    app_id: int
+    user_id: int
+    start_time: str
+    end_time: str = None
+    duration: int = 0
+
+
+def legacy_read(db_path: str, user_id: int):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM app_usage_metrics WHERE user_id = ?", (user_id,))
+    rows = [LegacyAppUsageMetric(
+        metric_id=row['metric_id'],
+        app_id=row['app_id'],
+        user_id=row['user_id'],
+        start_time=row['start_time'],
+        end_time=row['end_time'],
+        duration=row['duration']
+    ) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "rows.sqlite")
+        driver = DatabaseDriver(db_path)
+        user = driver.create_user("bench", "android")
+        driver.add_app("maps", "utility", user.user_id)
+        base = datetime(2024, 1, 1)
+        sessions = (
+            ("maps", base + timedelta(seconds=i * 60), base + timedelta(seconds=i * 60 + 30))
+            for i in range(args.rows)
+        )
+        driver.ingest_usage_sessions(user.user_id, sessions)
+
+        cases = {
+            "legacy dataclass list": lambda: legacy_read(db_path, user.user_id),
+            "slotted model list": lambda: list(driver.iter_app_usage_metrics(user.user_id)),
+            "namedtuple list": lambda: list(driver.iter_app_usage_metrics(user.user_id, row_type="namedtuple")),
+            "tuple list": lambda: list(driver.iter_app_usage_metrics(user.user_id, row_type="tuple")),
+            "streamed models (sum)": lambda: sum(m.duration for m in driver.iter_app_usage_metrics(user.user_id)),
+        }
+
+        print(f"{args.rows} rows")
+        print(f"{'case':24s} {'seconds':>9s} {'peak MB':>9s}")
+        for name, fn in cases.items():
+            _, elapsed, peak = measure(fn)
+            print(f"{name:24s} {elapsed:9.2f} {peak / 1e6:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
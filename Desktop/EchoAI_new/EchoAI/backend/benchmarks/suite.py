@@ -0,0 +1,351 @@
+"""
+Benchmark suite: every public DatabaseDriver method plus the AssistantFnc
+tools on the voice path (analyze_intent, analyze_metrics, list_pending_tasks)
+against a synthetic database (see benchmarks/synthetic.py), with JSON results
+and a comparison mode for catching regressions between two runs.
+
+Reads run before writes, so reads see the generated data as it was. A driver
+method without a case makes the run fail rather than go unmeasured.
+
+Run from the backend directory:
+    python -m benchmarks.suite run --rows 100000 --output base.json
+    python -m benchmarks.suite run --rows 100000 --output head.json
+    python -m benchmarks.suite compare base.json head.json --threshold 20
+
+compare exits with status 1 when any case got slower than the threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Callable, Dict, List, Tuple
+
+import json_codec
+from async_db_driver import READ_METHODS, STREAM_METHODS
+from benchmarks.synthetic import APPS, LANGUAGES, THEMES, generate
+from benchmarks.vin_registry import synthetic_fleet
+from db_driver import DatabaseDriver
+
+# Not hot paths: connection teardown and cache counters
+UNTIMED_METHODS = {"close", "cache_stats"}
+# Full recomputations and bulk loads take far longer than a call on the voice path
+SLOW_CASES = {"check_usage_rollups": 1, "import_fleet": 20, "ingest_usage_sessions": 20}
+
+UTTERANCES = [
+    "open my calendar",
+    "schedule a meeting with the dealer tomorrow at 10",
+    "send a text to mum saying I'm running late",
+    "navigate to the nearest petrol station",
+    "give me a report on last week's data",
+    "make a payment of 40 dollars to the garage",
+    "how are you today",
+]
+
+# The database file api.py opens relative to the working directory
+API_DB_NAME = "smartphone_assistant.sqlite"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_us": samples[0],
+        "max_us": samples[-1],
+    }
+
+
+def best_round(rounds: List[List[float]]) -> Dict[str, float]:
+    # The quietest round: a burst of background load skews one round, not all
+    best = min((summarize(samples) for samples in rounds), key=lambda stats: stats["p50_us"])
+    return {**best, "rounds": len(rounds)}
+
+
+def measure(fn: Callable[[], Any], calls: int, rounds: int) -> Dict[str, float]:
+    fn()  # warm the connection, statement cache and pages
+    timings = []
+    for _ in range(rounds):
+        samples = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1e6)
+        timings.append(samples)
+    return best_round(timings)
+
+
+async def measure_async(fn: Callable[[], Any], calls: int, rounds: int) -> Dict[str, float]:
+    await fn()
+    timings = []
+    for _ in range(rounds):
+        samples = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            await fn()
+            samples.append((time.perf_counter() - started) * 1e6)
+        timings.append(samples)
+    return best_round(timings)
+
+
+def driver_cases(driver: DatabaseDriver, db_path: str, counts: Dict[str, Any],
+                 rng: random.Random) -> Tuple[Dict[str, Callable[[], Any]], Dict[str, int]]:
+    """One call per case, and how many calls the cases that use up rows have available"""
+    rows, users = counts["calendar_events"], counts["users"]
+    today = datetime.now()
+    serial = count()
+
+    def user():
+        return rng.randint(1, users)
+
+    def app_id(user_id: int) -> int:
+        # Matches the ids benchmarks.synthetic assigns
+        return (user_id - 1) * len(APPS) + rng.randrange(len(APPS)) + 1
+
+    def day() -> str:
+        return (today + timedelta(days=rng.randint(-90, 30))).strftime("%Y-%m-%d")
+
+    with sqlite3.connect(db_path) as conn:
+        vins = [vin for vin, in conn.execute("SELECT vin FROM cars ORDER BY random() LIMIT 1000")]
+        pending = [feedback_id for feedback_id, in conn.execute(
+            "SELECT feedback_id FROM task_feedback WHERE status = 'pending' ORDER BY random()"
+        )]
+    limits = {"resolve_task": len(pending), "delete_calendar_event": rows - rows // 2}
+    pending = iter(pending)
+    # Updates touch the first half of the events, deletes eat the second half from the end
+    deletions = iter(range(rows, rows // 2, -1))
+    fleet = synthetic_fleet(10 ** 7, random.Random(rng.random()))
+
+    def sessions(n: int = 100):
+        for _ in range(n):
+            start = today - timedelta(seconds=rng.randrange(30 * 86400))
+            yield rng.choice(APPS)[0], start, start + timedelta(seconds=rng.randint(5, 3600))
+
+    def user_app():
+        user_id = user()
+        return app_id(user_id), user_id
+
+    cases = {
+        # Users
+        "create_user": lambda: driver.create_user(f"bench{next(serial)}", "ios", {"theme": "dark"}),
+        "get_user_by_name": lambda: driver.get_user_by_name(f"user{user()}"),
+        "update_user_preferences": lambda: driver.update_user_preferences(
+            user(), {"theme": rng.choice(THEMES), "language": rng.choice(LANGUAGES), "units": "metric"}),
+        "set_user_preferences": lambda: driver.set_user_preferences(user(), {"theme": rng.choice(THEMES)}),
+        "remove_user_preferences": lambda: driver.remove_user_preferences(user(), ["units"]),
+        "get_users_by_preference": lambda: driver.get_users_by_preference("language", rng.choice(LANGUAGES)),
+        # Apps and usage
+        "add_app": lambda: driver.add_app(f"bench{next(serial)}", "utility", user()),
+        "get_apps_for_user": lambda: driver.get_apps_for_user(user()),
+        "get_app_by_name": lambda: driver.get_app_by_name(rng.choice(APPS)[0], user()),
+        "switch_app": lambda: driver.switch_app(*user_app()),
+        "close_app": lambda: driver.close_app(*user_app()),
+        "check_usage_rollups": lambda: driver.check_usage_rollups(),
+        "ingest_usage_sessions": lambda: driver.ingest_usage_sessions(user(), sessions()),
+        "iter_app_usage_metrics": lambda: list(driver.iter_app_usage_metrics(user())),
+        "get_app_usage_metrics": lambda: driver.get_app_usage_metrics(user(), 7),
+        "get_app_category_usage": lambda: driver.get_app_category_usage(user(), 7),
+        # Calendar
+        "add_calendar_event": lambda: driver.add_calendar_event("Bench", day(), "10:00", 30, user()),
+        "get_calendar_events_for_user": lambda: driver.get_calendar_events_for_user(user()),
+        "update_calendar_event_status": lambda: driver.update_calendar_event_status(
+            rng.randint(1, rows // 2), "approved"),
+        "delete_calendar_event": lambda: driver.delete_calendar_event(next(deletions)),
+        "get_calendar_conflicts": lambda: driver.get_calendar_conflicts(user(), day(), "10:00", 60),
+        "find_free_slots": lambda: driver.find_free_slots(user(), day(), 30),
+        "get_calendar_events_page": lambda: driver.get_calendar_events_page(user(), 50),
+        "iter_calendar_events_for_user": lambda: list(driver.iter_calendar_events_for_user(user())),
+        # Transactions
+        "create_transaction": lambda: driver.create_transaction("payment", 10.0, "bench", user()),
+        "write_batch": lambda: driver.write_batch(
+            [{"title": "Bench", "date": day(), "time": "11:00", "duration": 30, "user_id": user()}] * 5,
+            [{"type": "payment", "amount": 5.0, "description": "bench", "user_id": user()}] * 5,
+        ),
+        "run_batch": lambda: driver.run_batch(
+            [("create_transaction", ("payment", 5.0, "bench", user()), {})] * 10),
+        "get_transactions_for_user": lambda: driver.get_transactions_for_user(user()),
+        "get_transactions_page": lambda: driver.get_transactions_page(user(), 50),
+        "iter_transactions_for_user": lambda: list(driver.iter_transactions_for_user(user())),
+        "update_transaction_status": lambda: driver.update_transaction_status(rng.randint(1, rows), "approved"),
+        # Approvals
+        "iter_pending_tasks": lambda: list(driver.iter_pending_tasks(user())),
+        "get_pending_tasks": lambda: driver.get_pending_tasks(user()),
+        "get_pending_task": lambda: driver.get_pending_task(rng.randint(1, counts["task_feedback"])),
+        "resolve_task": lambda: driver.resolve_task(next(pending), "approved"),
+        "submit_task_feedback": lambda: driver.submit_task_feedback(
+            rng.randint(1, counts["task_feedback"]), "approved", "bench"),
+        # Cars
+        "get_car_by_vin": lambda: driver.get_car_by_vin(rng.choice(vins)),
+        "resolve_vin": lambda: driver.resolve_vin(rng.choice(vins)[-6:]),
+        "create_car": lambda: driver.create_car(*next(fleet)),
+        "import_fleet": lambda: driver.import_fleet([next(fleet) for _ in range(100)]),
+    }
+    return cases, limits
+
+
+def run_driver(db_path: str, counts: Dict[str, Any], calls: int, rounds: int, cache_size: int,
+               rng: random.Random) -> Dict[str, Dict[str, Any]]:
+    driver = DatabaseDriver(db_path, pooled=True, cache_size=cache_size)
+    cases, limits = driver_cases(driver, db_path, counts, rng)
+
+    public = {
+        name for name in dir(DatabaseDriver)
+        if not name.startswith("_") and callable(getattr(DatabaseDriver, name))
+    } - UNTIMED_METHODS
+    missing = public - set(cases)
+    if missing:
+        raise RuntimeError(f"no benchmark case for DatabaseDriver methods: {', '.join(sorted(missing))}")
+
+    reads = READ_METHODS | STREAM_METHODS
+    results = {}
+    for name in sorted(cases, key=lambda name: name not in reads):
+        per_round = min(calls, SLOW_CASES.get(name, calls))
+        if name in limits:
+            # One call goes to warming up
+            per_round = min(per_round, (limits[name] - 1) // rounds)
+        results[f"db.{name}"] = {
+            "kind": "read" if name in reads else "write",
+            **measure(cases[name], per_round, rounds),
+        }
+        print(f"  db.{name}", file=sys.stderr)
+    driver.close()
+    return results
+
+
+async def run_assistant(counts: Dict[str, Any], calls: int, rounds: int, rng: random.Random) -> Dict[str, Dict[str, Any]]:
+    # Imported here: api opens its database relative to the working directory
+    import api
+
+    fnc = api.AssistantFnc(user_name=f"user{rng.randint(1, counts['users'])}")
+    start = datetime.now() - timedelta(days=365)
+    for i in range(min(counts["app_usage_metrics"], 100_000)):
+        moment = start + timedelta(minutes=5 * i)
+        fnc.add_metrics_data("battery", rng.uniform(10, 100), moment.strftime("%Y-%m-%d %H:%M"))
+
+    results = {
+        "fnc.analyze_intent": {
+            "kind": "read", **measure(lambda: fnc.analyze_intent(rng.choice(UTTERANCES)), calls, rounds)},
+        "fnc.analyze_metrics": {"kind": "read", **measure(lambda: fnc.analyze_metrics("battery"), calls, rounds)},
+        "fnc.list_pending_tasks": {"kind": "read", **await measure_async(fnc.list_pending_tasks, calls, rounds)},
+    }
+    await api.DB.aclose()
+    return results
+
+
+def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, API_DB_NAME)
+        print(f"generating {args.rows} rows per table", file=sys.stderr)
+        counts = generate(db_path, args.rows, args.months, args.seed)
+
+        results = run_driver(db_path, counts, args.calls, args.rounds, args.cache_size, rng)
+        if not args.skip_assistant:
+            os.chdir(tmp)
+            try:
+                results.update(asyncio.run(run_assistant(counts, args.calls, args.rounds, rng)))
+            finally:
+                os.chdir(cwd)
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "rows": args.rows,
+            "months": args.months,
+            "seed": args.seed,
+            "calls": args.calls,
+            "rounds": args.rounds,
+            "cache_size": args.cache_size,
+            "counts": counts,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "json_codec": json_codec.CODEC,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], metric: str, threshold: float,
+            min_delta_us: float) -> Tuple[List[str], List[str]]:
+    """Print a per-case comparison; returns (regressed, improved) case names"""
+    regressed, improved = [], []
+    if base["meta"]["rows"] != head["meta"]["rows"]:
+        print(f"warning: runs used different scales ({base['meta']['rows']} vs {head['meta']['rows']} rows)")
+
+    print(f"{'case':40} {'base':>11} {'head':>11} {'change':>8}")
+    for name in sorted(set(base["results"]) | set(head["results"])):
+        if name not in base["results"] or name not in head["results"]:
+            print(f"{name:40} {'only in ' + ('head' if name in head['results'] else 'base'):>32}")
+            continue
+        before, after = base["results"][name][metric], head["results"][name][metric]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        # Sub-microsecond wobble on tiny cases is noise, not a regression
+        if abs(after - before) >= min_delta_us:
+            if change > threshold:
+                flag = "REGRESSION"
+                regressed.append(name)
+            elif change < -threshold:
+                flag = "improved"
+                improved.append(name)
+        print(f"{name:40} {before:9.1f}us {after:9.1f}us {change:+7.1f}% {flag}")
+    return regressed, improved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate data, time every case and emit JSON")
+    run_parser.add_argument("--rows", type=int, default=100_000, help="rows per large table (1000 to 1000000)")
+    run_parser.add_argument("--months", type=int, default=6, help="months of usage history")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--calls", type=int, default=200, help="timed calls per case and round")
+    run_parser.add_argument("--rounds", type=int, default=3, help="rounds per case; the one with the lowest p50 is kept")
+    run_parser.add_argument("--cache-size", type=int, default=0, help="driver read cache entries (0 times the queries)")
+    run_parser.add_argument("--skip-assistant", action="store_true", help="only time DatabaseDriver methods")
+    run_parser.add_argument("--output", help="JSON results file (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two JSON result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=20.0, help="percent slowdown that counts")
+    compare_parser.add_argument("--metric", default="p50_us", choices=["p50_us", "p95_us", "mean_us", "min_us"])
+    compare_parser.add_argument("--min-delta-us", type=float, default=1.0,
+                                help="ignore absolute changes smaller than this")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        return
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    regressed, improved = compare(base, head, args.metric, args.threshold, args.min_delta_us)
+    print(f"{len(regressed)} regressed, {len(improved)} improved beyond {args.threshold:.0f}% ({args.metric})")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
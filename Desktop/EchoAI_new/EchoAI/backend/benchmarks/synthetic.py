@@ -0,0 +1,166 @@
+"""
+Synthetic data for the benchmark suite: users, their apps, months of app
+usage sessions, calendar events, transactions with their pending approvals,
+and a car fleet, all reproducible from a seed.
+
+`rows` is the size of each of the large tables (app_usage_metrics,
+calendar_events, transactions and cars). There is one user per 100 rows
+and every user has the same 10 apps, so per-user queries see about 100
+rows each at any scale.
+
+Generate a database on its own (the suite calls generate() directly):
+    python -m benchmarks.synthetic bench.sqlite --rows 100000
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from benchmarks.vin_registry import synthetic_fleet
+from db_driver import DatabaseDriver
+from json_codec import dumps as json_dumps
+
+APPS = [
+    ("calendar", "productivity"), ("messages", "social"), ("maps", "navigation"),
+    ("settings", "utility"), ("metrics", "productivity"), ("transactions", "finance"),
+    ("music", "entertainment"), ("podcasts", "entertainment"), ("weather", "utility"),
+    ("phone", "social"),
+]
+TRANSACTION_TYPES = ["payment", "transfer", "subscription", "purchase"]
+EVENT_TITLES = ["Service appointment", "Car wash", "Dealer visit", "Meeting", "Inspection", "Tyre change"]
+THEMES = ["dark", "light", "auto"]
+LANGUAGES = ["en", "de", "fr", "es", "it", "nl", "pt", "ja"]
+
+ROWS_PER_USER = 100
+PENDING_FRACTION = 0.2
+CHUNK = 50_000
+
+
+def user_count(rows: int) -> int:
+    return max(10, rows // ROWS_PER_USER)
+
+
+def _chunks(conn: sqlite3.Connection, sql: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(db_path: str, rows: int, months: int = 6, seed: int = 1) -> Dict[str, Any]:
+    """Create the schema through DatabaseDriver, then bulk-load it; returns row counts and timing"""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    users = user_count(rows)
+    # Everything ends at the current hour so "last 7 days" queries find data
+    end = datetime.now().replace(minute=0, second=0, microsecond=0)
+    span = months * 30 * 86400
+    begin = end - timedelta(seconds=span)
+
+    driver = DatabaseDriver(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+
+    _chunks(conn, "INSERT INTO users (user_id, name, device_type, preferences) VALUES (?, ?, ?, ?)", (
+        (user_id, f"user{user_id}", rng.choice(["ios", "android"]),
+         json_dumps({"theme": rng.choice(THEMES), "language": rng.choice(LANGUAGES), "units": "metric"}))
+        for user_id in range(1, users + 1)
+    ))
+    # App ids are (user_id - 1) * len(APPS) + position + 1
+    _chunks(conn, "INSERT INTO apps (app_id, name, category, user_id, last_used) VALUES (?, ?, ?, ?, ?)", (
+        ((user_id - 1) * len(APPS) + i + 1, name, category, user_id, end.isoformat())
+        for user_id in range(1, users + 1) for i, (name, category) in enumerate(APPS)
+    ))
+
+    def sessions():
+        for _ in range(rows):
+            user_id = rng.randint(1, users)
+            start = begin + timedelta(seconds=rng.randrange(span))
+            duration = rng.randint(5, 3600)
+            yield ((user_id - 1) * len(APPS) + rng.randrange(len(APPS)) + 1, user_id, start.isoformat(),
+                   (start + timedelta(seconds=duration)).isoformat(), duration)
+
+    _chunks(conn, "INSERT INTO app_usage_metrics (app_id, user_id, start_time, end_time, duration) "
+                  "VALUES (?, ?, ?, ?, ?)", sessions())
+
+    # Calendar events run from the history into the next month; the insert
+    # trigger fills their epoch columns
+    calendar_span = span + 30 * 86400
+
+    def events():
+        for event_id in range(1, rows + 1):
+            user_id = rng.randint(1, users)
+            start = begin + timedelta(minutes=rng.randrange(calendar_span // 60) // 15 * 15)
+            pending = rng.random() < PENDING_FRACTION
+            yield (event_id, rng.choice(EVENT_TITLES), start.strftime("%Y-%m-%d"), start.strftime("%H:%M"),
+                   rng.choice([15, 30, 45, 60, 90]), user_id, "pending" if pending else "approved", rng.random() < 0.5)
+
+    _chunks(conn, "INSERT INTO calendar_events (event_id, title, date, time, duration, user_id, status, reminder) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", events())
+
+    def transactions():
+        for transaction_id in range(1, rows + 1):
+            user_id = rng.randint(1, users)
+            timestamp = (begin + timedelta(seconds=rng.randrange(span))).isoformat()
+            pending = rng.random() < PENDING_FRACTION
+            yield (transaction_id, rng.choice(TRANSACTION_TYPES), round(rng.uniform(1, 500), 2),
+                   "synthetic", timestamp, "pending" if pending else "approved", user_id)
+
+    _chunks(conn, "INSERT INTO transactions (transaction_id, type, amount, description, timestamp, status, user_id) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)", transactions())
+
+    # One approval record per event and transaction, in request order
+    conn.execute("""
+        INSERT INTO task_feedback (task_type, task_id, user_id, status, timestamp)
+        SELECT task_type, task_id, user_id, status, timestamp FROM (
+            SELECT 'calendar' AS task_type, event_id AS task_id, user_id, status,
+                   date || 'T' || time || ':00' AS timestamp
+            FROM calendar_events
+            UNION ALL
+            SELECT 'transaction', transaction_id, user_id, status, timestamp FROM transactions
+        )
+        ORDER BY timestamp
+    """)
+    feedback = conn.execute("SELECT COUNT(*) FROM task_feedback").fetchone()[0]
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    # The daily rollups are derived from the sessions loaded above
+    driver.check_usage_rollups(repair=True)
+    fleet = driver.import_fleet(synthetic_fleet(rows, rng))
+    driver.close()
+
+    return {
+        "users": users,
+        "apps": users * len(APPS),
+        "app_usage_metrics": rows,
+        "calendar_events": rows,
+        "transactions": rows,
+        "task_feedback": feedback,
+        "cars": fleet["rows"],
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per large table (1000 to 1000000)")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    counts = generate(args.db_path, args.rows, args.months, args.seed)
+    print(", ".join(f"{table}: {count}" for table, count in counts.items() if table != "seconds"))
+    print(f"generated in {counts['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Time-range queries over app_usage_metrics: ISO text comparisons against the
+integer epoch columns from migration 5, on a large synthetic table.
+
+Run from the backend directory (the default 5M rows takes a few minutes to
+generate; use --rows for a quicker look):
+    python -m benchmarks.time_columns
+    python -m benchmarks.time_columns --rows 500000 --queries 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db_driver import DatabaseDriver, to_unix
+
+EPOCH_START = datetime(2024, 1, 1)
+
+# The same question three ways: one user's usage per app over a 7 day window
+QUERIES = {
+    # How the analytics used to filter: datetime() text against ISO text.
+    # datetime() yields "YYYY-MM-DD HH:MM:SS" while rows hold
+    # "YYYY-MM-DDTHH:MM:SS", so the boundary day compares wrongly.
+    "text datetime()": (
+        "SELECT app_id, COUNT(*), SUM(duration) FROM app_usage_metrics INDEXED BY idx_bench_text "
+        "WHERE user_id = ? AND start_time >= datetime(?, '-7 days') AND start_time < datetime(?) GROUP BY app_id",
+        lambda user, end: (user, end.isoformat(), end.isoformat()),
+    ),
+    # Exact, but a function of the column cannot be range-seeked
+    "text julianday()": (
+        "SELECT app_id, COUNT(*), SUM(duration) FROM app_usage_metrics INDEXED BY idx_bench_text "
+        "WHERE user_id = ? AND JULIANDAY(start_time) >= JULIANDAY(?) - 7 AND JULIANDAY(start_time) < JULIANDAY(?) "
+        "GROUP BY app_id",
+        lambda user, end: (user, end.isoformat(), end.isoformat()),
+    ),
+    "integer epoch": (
+        "SELECT app_id, COUNT(*), SUM(duration) FROM app_usage_metrics INDEXED BY idx_metrics_user_start_epoch "
+        "WHERE user_id = ? AND start_epoch >= ? AND start_epoch < ? GROUP BY app_id",
+        lambda user, end: (user, to_unix(end - timedelta(days=7)), to_unix(end)),
+    ),
+}
+
+
+def build(db_path: str, rows: int, users: int, apps: int, days: int):
+    # Schema and migrations from the driver, then a raw bulk load
+    DatabaseDriver(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("DROP INDEX idx_metrics_user_start_epoch")
+    conn.execute("DROP INDEX idx_metrics_open")
+
+    rng = random.Random(7)
+    span = days * 86400
+    batch = []
+    for _ in range(rows):
+        start = EPOCH_START + timedelta(seconds=rng.randrange(span))
+        duration = rng.randint(5, 3600)
+        batch.append((rng.randint(1, apps), rng.randint(1, users), start.isoformat(),
+                      (start + timedelta(seconds=duration)).isoformat(), duration))
+        if len(batch) == 100_000:
+            conn.executemany("INSERT INTO app_usage_metrics (app_id, user_id, start_time, end_time, duration) "
+                             "VALUES (?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO app_usage_metrics (app_id, user_id, start_time, end_time, duration) "
+                         "VALUES (?, ?, ?, ?, ?)", batch)
+
+    # The pre-migration covering index on the text column, for the "before" queries
+    conn.execute("CREATE INDEX idx_bench_text ON app_usage_metrics (user_id, start_time, app_id, duration)")
+    conn.execute("CREATE INDEX idx_metrics_user_start_epoch ON app_usage_metrics (user_id, start_epoch, app_id, duration)")
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--apps", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--queries", type=int, default=500, help="random (user, window) lookups per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        conn = build(os.path.join(tmp, "bench.sqlite"), args.rows, args.users, args.apps, args.days)
+        print(f"generated {args.rows} sessions in {time.perf_counter() - started:.1f}s")
+
+        rng = random.Random(11)
+        lookups = [
+            (rng.randint(1, args.users), EPOCH_START + timedelta(days=rng.randint(7, args.days), hours=rng.randint(0, 23)))
+            for _ in range(args.queries)
+        ]
+
+        results = {}
+        for name, (sql, params) in QUERIES.items():
+            matched = 0
+            started = time.perf_counter()
+            for user, end in lookups:
+                matched += sum(count for _, count, _ in conn.execute(sql, params(user, end)))
+            elapsed = time.perf_counter() - started
+            results[name] = (elapsed / len(lookups) * 1000, matched)
+        conn.close()
+
+    exact = results["integer epoch"][1]
+    print(f"{'query':18} {'ms/query':>9} {'rows':>9} {'wrong':>7}")
+    for name, (ms, matched) in results.items():
+        print(f"{name:18} {ms:9.3f} {matched:9d} {matched - exact:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Load-test a running token service and report latency percentiles and
+requests/sec.
+
+By default it runs two passes. The first omits the room, as the frontend
+does: every request allocates a new room, so the (identity, room) token
+cache never hits. The second uses one fixed room, so repeat identities are
+served from the cache. Only callers that pass a fixed room see the second
+number. --room runs a single pass (pass --room "" for the no-room path).
+
+Start the service, then run from the backend directory:
+    python server.py
+    python -m benchmarks.token_load --requests 5000 --concurrency 16 --identities 200
+    python -m benchmarks.token_load --batch 10
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlparse
+
+
+def percentile(ordered, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--identities", type=int, default=200,
+                        help="distinct participants to cycle through; fewer means more cache hits")
+    parser.add_argument("--room", default=None,
+                        help="run one pass with this fixed room; empty allocates a new room per request")
+    parser.add_argument("--batch", type=int, default=0, help="participants per POST /getTokens; 0 uses GET /getToken")
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    local = threading.local()
+
+    def connection() -> http.client.HTTPConnection:
+        # One keep-alive connection per worker thread
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection(target.hostname, target.port or 80)
+        return local.conn
+
+    def one_request(i: int, room: str) -> float:
+        conn = connection()
+        start = time.perf_counter()
+        if args.batch:
+            names = [f"user-{(i * args.batch + j) % args.identities}" for j in range(args.batch)]
+            body = json.dumps({"room": room, "names": names})
+            conn.request("POST", "/getTokens", body, {"Content-Type": "application/json"})
+        else:
+            query = {"name": f"user-{i % args.identities}"}
+            if room:
+                query["room"] = room
+            conn.request("GET", "/getToken?" + urlencode(query))
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return (time.perf_counter() - start) * 1000
+
+    rooms = [args.room] if args.room is not None else ["", "load-test"]
+    print(f"{args.requests} requests per pass, concurrency {args.concurrency}, batch {args.batch or 1}")
+    for room in rooms:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = sorted(pool.map(lambda i: one_request(i, room), range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+        print(f"room: {room or 'new per request (no cache hits)'}")
+        print(f"  requests/sec: {args.requests / elapsed:10.1f}")
+        print(f"  p50:          {percentile(latencies, 50):10.2f} ms")
+        print(f"  p99:          {percentile(latencies, 99):10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Fleet import throughput and VIN lookup latency: uncached, through the
+driver's LRU cache, and misheard or partial VINs via resolve_vin.
+
+Run from the backend directory:
+    python -m benchmarks.vin_registry --fleet 100000 --lookups 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from db_driver import DatabaseDriver
+from vin import CONFUSABLE, MODEL_YEARS, WMI_MAKES
+
+ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+YEAR_CODES = list(MODEL_YEARS)
+
+
+def synthetic_fleet(n: int, rng: random.Random):
+    wmis = list(WMI_MAKES)
+    seen = set()
+    while len(seen) < n:
+        wmi = rng.choice(wmis)
+        vin = wmi + "".join(rng.choice(ALPHABET) for _ in range(6)) + rng.choice(YEAR_CODES) \
+            + "".join(rng.choice(ALPHABET) for _ in range(7))
+        if vin not in seen:
+            seen.add(vin)
+            yield vin, WMI_MAKES[wmi], "Model", 2000 + rng.randrange(25)
+
+
+def misheard(vin: str, rng: random.Random) -> str:
+    positions = [i for i, char in enumerate(vin) if char in CONFUSABLE]
+    if not positions:
+        return vin
+    i = rng.choice(positions)
+    return vin[:i] + rng.choice(CONFUSABLE[vin[i]]) + vin[i + 1:]
+
+
+def timed(fn, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fleet", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    fleet = list(synthetic_fleet(args.fleet, rng))
+    # Sessions look up a small set of active cars over and over
+    active = [rng.choice(fleet)[0] for _ in range(min(1000, args.fleet))]
+    lookups = [rng.choice(active) for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        driver = DatabaseDriver(db_path, pooled=True)
+        stats = driver.import_fleet(fleet, args.chunk_size)
+        print(f"import:          {stats['rows']} cars in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)")
+
+        uncached = timed(driver.get_car_by_vin, lookups)
+        misheard_us = timed(driver.resolve_vin, [misheard(vin, rng) for vin in lookups[:2000]])
+        partial_us = timed(driver.resolve_vin, [vin[-6:] for vin in lookups[:2000]])
+        driver.close()
+
+        cached_driver = DatabaseDriver(db_path, pooled=True, cache_size=4096)
+        cached = timed(cached_driver.get_car_by_vin, lookups)
+        hit_rate = cached_driver.cache_stats()["hits"] / len(lookups)
+        cached_driver.close()
+
+    print(f"lookup uncached: {uncached:8.1f} us")
+    print(f"lookup cached:   {cached:8.1f} us  (hit rate {hit_rate:.0%})")
+    print(f"misheard VIN:    {misheard_us:8.1f} us")
+    print(f"last 6 chars:    {partial_us:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Fail if any DatabaseDriver query falls back to a full table scan.
+
+Exercises every driver method against a scratch database, records the SQL
+each one runs and checks its EXPLAIN QUERY PLAN. Exits non-zero on a
+regression so it can gate CI:
+    python check_query_plans.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from db_driver import DatabaseDriver
+
+
+class TracingDriver(DatabaseDriver):
+    """DatabaseDriver that remembers every statement it executes"""
+
+    def __init__(self, db_path: str):
+        self.statements = []
+        super().__init__(db_path)
+        # Schema setup and migration backfills run once, not per request
+        self.statements.clear()
+
+    @contextmanager
+    def _get_connection(self):
+        with super()._get_connection() as conn:
+            conn.set_trace_callback(self.statements.append)
+            try:
+                yield conn
+            finally:
+                conn.set_trace_callback(None)
+
+
+def exercise(driver: DatabaseDriver):
+    user = driver.create_user("plan", "android", {"theme": "dark"})
+    driver.get_user_by_name("plan")
+    driver.get_or_create_user("plan", "android")
+    driver.update_user_preferences(user.user_id, {"theme": "light"})
+    driver.set_user_preferences(user.user_id, {"language": "en", "voice": {"speed": 1.2}})
+    driver.remove_user_preferences(user.user_id, ["voice"])
+    driver.get_users_by_preference("theme", "light")
+
+    app = driver.add_app("calendar", "productivity", user.user_id)
+    driver.get_apps_for_user(user.user_id)
+    driver.get_app_by_name("calendar", user.user_id)
+    driver.switch_app(app.app_id, user.user_id)
+    driver.close_app(app.app_id, user.user_id)
+    driver.ingest_usage_sessions(user.user_id, [("calendar", "2024-01-01T09:00:00", "2024-01-01T09:05:00")])
+    list(driver.iter_app_usage_metrics(user.user_id))
+    list(driver.iter_app_usage_metrics(user.user_id, since="2024-01-01", until="2024-02-01T00:00:00+00:00"))
+
+    event = driver.add_calendar_event("standup", "2024-01-01", "09:00", 15, user.user_id)
+    driver.get_calendar_events_for_user(user.user_id)
+    driver.get_calendar_events_for_user(user.user_id, status="pending")
+    driver.get_calendar_events_page(user.user_id, limit=1, after=("2024-01-01", "08:00", 0))
+    driver.get_calendar_events_page(user.user_id, limit=1, after=("2024-01-01", "08:00", 0), status="pending")
+    driver.get_calendar_conflicts(user.user_id, "2024-01-01", "09:10", 30)
+    driver.find_free_slots(user.user_id, "2024-01-01", 30)
+    driver.update_calendar_event_status(event.event_id, "approved")
+
+    tx = driver.create_transaction("payment", 10.0, "coffee", user.user_id)
+    driver.get_transactions_for_user(user.user_id)
+    driver.get_transactions_for_user(user.user_id, status="pending")
+    driver.get_transactions_for_user(user.user_id, since="2024-01-01")
+    driver.get_transactions_for_user(user.user_id, status="pending", since="2024-01-01", until="2030-01-01")
+    driver.get_transactions_page(user.user_id, limit=1, after=(tx.timestamp, tx.transaction_id + 1))
+    driver.get_transactions_page(user.user_id, limit=1, after=(tx.timestamp, tx.transaction_id + 1), status="pending")
+    driver.update_transaction_status(tx.transaction_id, "approved")
+
+    driver.get_app_usage_metrics(user.user_id)
+    driver.get_app_category_usage(user.user_id)
+
+    list(driver.iter_pending_tasks(user.user_id, task_type="calendar"))
+    driver.create_transaction("payment", 2.0, "tea", user.user_id)
+    tea = driver.get_pending_tasks(user.user_id)["transaction"][-1]
+    driver.get_pending_task(tea["feedback_id"])
+    driver.resolve_task(tea["feedback_id"], "rejected", user_id=user.user_id)
+    pending = driver.get_pending_tasks(user.user_id)
+    for task in pending["calendar"] + pending["transaction"]:
+        driver.submit_task_feedback(task["feedback_id"], "approved")
+
+    driver.delete_calendar_event(event.event_id)
+
+    car = driver.create_car("1HGCM82633A004352", "Honda", "Accord", 2003)
+    driver.import_fleet([("5YJ3E1EA7KF317000", "Tesla", "Model 3", 2019)])
+    driver.get_car_by_vin(car.vin)
+    driver.resolve_vin("1HGCM82633A004352".replace("8", "A"))
+    driver.resolve_vin("004352")
+
+
+def is_checked(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[0].upper()
+    return head in ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def full_scans(conn: sqlite3.Connection, sql: str):
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    # "SCAN <table>" is a full table (or full index) scan; SEARCH is fine
+    return [row[3] for row in plan if row[3].startswith("SCAN ") and "CONSTANT ROW" not in row[3]]
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plans.sqlite")
+        driver = TracingDriver(db_path)
+        exercise(driver)
+
+        conn = sqlite3.connect(db_path)
+        failures = []
+        for sql in dict.fromkeys(s for s in driver.statements if is_checked(s)):
+            scans = full_scans(conn, sql)
+            if scans:
+                failures.append((" ".join(sql.split()), scans))
+        conn.close()
+
+    for sql, scans in failures:
+        print(f"FULL SCAN: {'; '.join(scans)}\n    {sql}")
+    if failures:
+        print(f"{len(failures)} queries fall back to a full scan")
+        return 1
+
+    print("all driver queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger("context-budget")
+logger.setLevel(logging.INFO)
+
+# Rough English average for OpenAI tokenizers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+# Role and framing overhead the API adds to every item
+ITEM_OVERHEAD_TOKENS = 4
+
+INSTRUCTION = "instruction"  # per-turn system guidance, stale once the turn is over
+TURN = "turn"  # what the user and the assistant actually said
+GUIDANCE = "guidance"  # system guidance for the rest of the session, never evicted
+SUMMARY = "summary"
+
+
+def estimate_tokens(text: str) -> int:
+    return ITEM_OVERHEAD_TOKENS + (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _text(message: llm.ChatMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(part if isinstance(part, str) else "[image]" for part in content)
+    return content or ""
+
+
+@dataclass(slots=True)
+class _Item:
+    role: str
+    kind: str
+    text: str
+    tokens: int
+    turn: int
+
+
+class ContextBudget:
+    """
+    Keeps the realtime session's conversation within `budget_tokens`
+    (estimated). Items are recorded as they are added. At the start of each
+    user turn the budget manager does two things:
+    - It deletes system instructions left over from earlier turns.
+    - If the conversation is still over budget, it collapses the oldest
+      turns into one summary item at the start, always keeping the last
+      `keep_turns` turns verbatim.
+    """
+
+    def __init__(self, conversation, budget_tokens: int = 4000, keep_turns: int = 4,
+                 summary_tokens: int = 400, line_chars: int = 160):
+        self._conversation = conversation
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.line_chars = line_chars
+        self._items: "OrderedDict[str, _Item]" = OrderedDict()
+        self._summary_id: Optional[str] = None
+        self._summary_lines: List[str] = []
+        self._turn = 0
+        self.evicted = 0
+        self.collapsed = 0
+
+    @property
+    def tokens(self) -> int:
+        return sum(item.tokens for item in self._items.values())
+
+    def add(self, message: llm.ChatMessage, kind: str = TURN, previous_item_id: str = None):
+        """Create a conversation item and account for it"""
+        if previous_item_id is None:
+            self._conversation.item.create(message)
+        else:
+            self._conversation.item.create(message, previous_item_id)
+        self.track(message, kind)
+
+    def track(self, message: llm.ChatMessage, kind: str = TURN):
+        """Account for an item the session created itself, like committed speech"""
+        item_id = getattr(message, "id", None)
+        if not item_id or item_id in self._items:
+            return
+        text = _text(message)
+        self._items[item_id] = _Item(str(message.role), kind, text, estimate_tokens(text), self._turn)
+
+    def new_turn(self) -> Dict[str, Any]:
+        """Trim the context before a user turn is handled; returns this turn's stats"""
+        started = time.perf_counter()
+        self._turn += 1
+        before = self.tokens
+
+        stale = [item_id for item_id, item in self._items.items()
+                 if item.kind == INSTRUCTION and item.turn < self._turn]
+        for item_id in stale:
+            self._delete(item_id)
+        self.evicted += len(stale)
+
+        collapsed = 0
+        if self.tokens > self.budget_tokens:
+            collapsed = self._collapse_old_turns()
+
+        stats = {
+            "turn": self._turn,
+            "tokens_before": before,
+            "tokens": self.tokens,
+            "budget": self.budget_tokens,
+            "items": len(self._items),
+            "evicted": len(stale),
+            "collapsed": collapsed,
+            "trim_ms": (time.perf_counter() - started) * 1000,
+        }
+        logger.info(
+            "context - turn: %d, tokens: %d -> %d of %d, items: %d, evicted: %d, collapsed: %d, %.2f ms",
+            stats["turn"], before, stats["tokens"], self.budget_tokens, stats["items"],
+            stats["evicted"], collapsed, stats["trim_ms"]
+        )
+        return stats
+
+    def _collapse_old_turns(self) -> int:
+        keep_from = self._turn - self.keep_turns
+        old = [item_id for item_id, item in self._items.items() if item.kind == TURN and item.turn < keep_from]
+        if not old:
+            return 0
+
+        for item_id in old:
+            item = self._items[item_id]
+            text = " ".join(item.text.split())
+            if len(text) > self.line_chars:
+                text = text[:self.line_chars - 3] + "..."
+            self._summary_lines.append(f"{item.role}: {text}")
+            self._delete(item_id)
+        self.collapsed += len(old)
+
+        # Oldest lines fall off first once the summary is full
+        while len(self._summary_lines) > 1 and \
+                estimate_tokens("\n".join(self._summary_lines)) > self.summary_tokens:
+            self._summary_lines.pop(0)
+
+        if self._summary_id is not None:
+            self._delete(self._summary_id)
+        summary = llm.ChatMessage(
+            role="system",
+            content="Summary of the earlier conversation:\n" + "\n".join(self._summary_lines)
+        )
+        # "root" puts it at the start of the conversation, before the kept turns
+        self.add(summary, SUMMARY, previous_item_id="root")
+        self._summary_id = getattr(summary, "id", None)
+        return len(old)
+
+    def _delete(self, item_id: str):
+        self._items.pop(item_id, None)
+        try:
+            self._conversation.item.delete(item_id=item_id)
+        except Exception:
+            # The server may already have dropped it; our accounting is what matters
+            logger.exception("failed to delete conversation item %s", item_id)
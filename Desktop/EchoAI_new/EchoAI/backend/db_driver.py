@@ -1,17 +1,52 @@
 import sqlite3
-from typing import Optional, List, Dict, Any
-from dataclasses import dataclass
+import calendar
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union, ClassVar
+from dataclasses import dataclass, field, fields, asdict, make_dataclass
 from contextlib import contextmanager
 from datetime import datetime
+from types import MappingProxyType
+from json_codec import dumps as json_dumps, loads as json_loads
+from interval_index import IntervalTree, event_span, from_epoch, normalize_slot, to_epoch
+from vin import decode as decode_vin, has_valid_check_digit, is_valid as is_valid_vin
+from vin import normalize as normalize_vin, variants as vin_variants
 
-@dataclass
+# PRAGMAs applied once to every pooled connection when it is opened
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16000,  # negative means KiB, so roughly 16MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+# Seconds a cached calendar read is served for. Other processes' approvals
+# never invalidate this process's cache, so event status may lag by this much.
+EVENTS_CACHE_TTL = 2.0
+
+# Row models are slotted (no per-instance __dict__) and built positionally by
+# from_row, which doubles as a cursor row factory. COLUMNS lists the SELECT
+# columns in field order so later schema changes cannot shift positions.
+
+@dataclass(slots=True)
 class User:
     user_id: int
     name: str
     device_type: str
     preferences: dict = None
 
-@dataclass
+    COLUMNS: ClassVar[str] = "user_id, name, device_type, preferences"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(row[0], row[1], row[2], json_loads(row[3]) if row[3] else {})
+
+@dataclass(slots=True)
 class App:
     app_id: int
     name: str
@@ -20,7 +55,13 @@ class App:
     is_running: bool = False
     last_used: str = None
 
-@dataclass
+    COLUMNS: ClassVar[str] = "app_id, name, category, user_id, is_running, last_used"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(row[0], row[1], row[2], row[3], bool(row[4]), row[5])
+
+@dataclass(slots=True)
 class CalendarEvent:
     event_id: int
     title: str
@@ -31,7 +72,13 @@ class CalendarEvent:
     status: str = "pending"  # pending, approved, completed
     reminder: bool = False
 
-@dataclass
+    COLUMNS: ClassVar[str] = "event_id, title, date, time, duration, user_id, status, reminder"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5], row[6], bool(row[7]))
+
+@dataclass(slots=True)
 class Transaction:
     transaction_id: int
     type: str  # payment, transfer, purchase
@@ -42,7 +89,13 @@ class Transaction:
     user_id: int
     approval_needed: bool = True
 
-@dataclass
+    COLUMNS: ClassVar[str] = "transaction_id, type, amount, description, timestamp, status, user_id, approval_needed"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5], row[6], bool(row[7]))
+
+@dataclass(slots=True)
 class AppUsageMetric:
     metric_id: int
     app_id: int
@@ -51,7 +104,13 @@ class AppUsageMetric:
     end_time: str = None
     duration: int = 0
 
-@dataclass
+    COLUMNS: ClassVar[str] = "metric_id, app_id, user_id, start_time, end_time, duration"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+@dataclass(slots=True)
 class TaskFeedback:
     feedback_id: int
     task_type: str  # app_switch, calendar, transaction, analysis
@@ -61,13 +120,503 @@ class TaskFeedback:
     feedback: str = None
     timestamp: str = None
 
+    COLUMNS: ClassVar[str] = "feedback_id, task_type, task_id, user_id, status, feedback, timestamp"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+@dataclass(slots=True)
+class Car:
+    car_id: int
+    vin: str
+    make: str
+    model: str
+    year: int
+
+    COLUMNS: ClassVar[str] = "car_id, vin, make, model, year"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+MODELS = (User, App, CalendarEvent, Transaction, AppUsageMetric, TaskFeedback, Car)
+
+@dataclass(slots=True)
+class PendingTask:
+    """A pending approval joined to the calendar event or transaction it is for"""
+    feedback_id: int
+    task_type: str  # calendar, transaction
+    requested_at: str
+    task: Union[CalendarEvent, Transaction]
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        if row[2] == "calendar":
+            task = CalendarEvent.from_row(cursor, row[4:12])
+        else:
+            task = Transaction.from_row(cursor, row[12:20])
+        return cls(row[0], row[2], row[3], task)
+
+# One statement for every kind of pending task. Driven by the partial
+# idx_feedback_pending index, so rows come back already in request order and
+# each task is a primary key lookup.
+PENDING_TASKS_SELECT = f"""
+    SELECT f.feedback_id, f.user_id, f.task_type, f.timestamp,
+           {", ".join("c." + column for column in CalendarEvent.COLUMNS.split(", "))},
+           {", ".join("t." + column for column in Transaction.COLUMNS.split(", "))}
+    FROM task_feedback f
+    LEFT JOIN calendar_events c ON f.task_type = 'calendar' AND c.event_id = f.task_id
+    LEFT JOIN transactions t ON f.task_type = 'transaction' AND t.transaction_id = f.task_id
+    WHERE f.status = 'pending' AND (c.event_id IS NOT NULL OR t.transaction_id IS NOT NULL)
+"""
+
+PENDING_TASKS_QUERY = PENDING_TASKS_SELECT + " AND f.user_id = ?"
+PENDING_TASK_QUERY = PENDING_TASKS_SELECT + " AND f.feedback_id = ?"
+
+# Where resolving a pending task writes the outcome back to
+TASK_TABLES = {
+    "calendar": ("calendar_events", "event_id"),
+    "transaction": ("transactions", "transaction_id"),
+}
+
+
+def _freeze_mappings(self):
+    # frozen=True stops reassignment only; dict fields (User.preferences) get a read-only view
+    for name in self._MAPPING_FIELDS:
+        object.__setattr__(self, name, MappingProxyType(getattr(self, name) or {}))
+
+
+def _frozen_twin(model):
+    """Immutable copy of a row model, safe to share between callers"""
+    namespace = {"COLUMNS": model.COLUMNS, "from_row": classmethod(model.from_row.__func__)}
+    mapping_fields = tuple(f.name for f in fields(model) if f.type in (dict, "dict"))
+    if mapping_fields:
+        namespace.update(_MAPPING_FIELDS=mapping_fields, __post_init__=_freeze_mappings)
+    return make_dataclass(
+        "Frozen" + model.__name__,
+        [(f.name, f.type, field(default=f.default)) for f in fields(model)],
+        namespace=namespace,
+        slots=True,
+        frozen=True,
+    )
+
+FROZEN_MODELS = {model: _frozen_twin(model) for model in MODELS}
+
+# Lazily streamed rows can also come back as plain tuples or namedtuples
+ROW_TUPLES = {model: namedtuple(model.__name__ + "Row", [f.name for f in fields(model)]) for model in MODELS}
+
+# Daily usage rollups recomputed from closed raw sessions. Used to backfill
+# the rollup tables and by the consistency checker.
+APP_ROLLUP_SOURCE = """
+    SELECT user_id, app_id, substr(start_time, 1, 10) AS day,
+           COUNT(*) AS sessions, SUM(duration) AS total_duration
+    FROM app_usage_metrics
+    WHERE end_time IS NOT NULL
+    GROUP BY user_id, app_id, day
+"""
+
+CATEGORY_ROLLUP_SOURCE = """
+    SELECT m.user_id, a.category, substr(m.start_time, 1, 10) AS day,
+           COUNT(*) AS sessions, SUM(m.duration) AS total_duration
+    FROM app_usage_metrics m
+    JOIN apps a ON m.app_id = a.app_id
+    WHERE m.end_time IS NOT NULL
+    GROUP BY m.user_id, a.category, day
+"""
+
+APP_ROLLUP_COLUMNS = "user_id, app_id, day, sessions, total_duration"
+CATEGORY_ROLLUP_COLUMNS = "user_id, category, day, sessions, total_duration"
+
+# Integer epoch seconds of an ISO text column, as SQLite reads it: naive
+# times count as UTC and explicit offsets are normalised, so ranges compare
+# numerically whatever format the text was written in.
+EPOCH_OF = "CAST(strftime('%s', {column}) AS INTEGER)"
+
+
+def to_unix(value: Union[str, datetime]) -> int:
+    """Python side of EPOCH_OF, for range bounds"""
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    return calendar.timegm(moment.utctimetuple())
+
+
+def _epoch_range(column: str, since, until) -> Tuple[str, List[int]]:
+    clauses, params = [], []
+    if since is not None:
+        clauses.append(f" AND {column} >= ?")
+        params.append(to_unix(since))
+    if until is not None:
+        clauses.append(f" AND {column} < ?")
+        params.append(to_unix(until))
+    return "".join(clauses), params
+
+
+# Calendar spans as naive epoch seconds, matching interval_index.event_span
+EVENT_START_EPOCH = "CAST(strftime('%s', {row}date || ' ' || {row}time) AS INTEGER)"
+EVENT_END_EPOCH = EVENT_START_EPOCH + " + {row}duration * 60"
+
+# Zero-padded rewrites of "2024-1-5" / "9:00" style text, for migration 8
+_DATE_REST = "substr(date, instr(date, '-') + 1)"
+_PADDED_DATE = (
+    "printf('%04d-%02d-%02d', CAST(substr(date, 1, instr(date, '-') - 1) AS INTEGER), "
+    f"CAST(substr({_DATE_REST}, 1, instr({_DATE_REST}, '-') - 1) AS INTEGER), "
+    f"CAST(substr({_DATE_REST}, instr({_DATE_REST}, '-') + 1) AS INTEGER))"
+)
+_PADDED_TIME = (
+    "printf('%02d:%02d', CAST(substr(time, 1, instr(time, ':') - 1) AS INTEGER), "
+    "CAST(substr(time, instr(time, ':') + 1) AS INTEGER))"
+)
+
+# Versioned schema migrations, applied in order on top of the base tables.
+# Each entry is (user_version, [statements]); never edit an entry once shipped,
+# append a new version instead.
+MIGRATIONS = [
+    (1, [
+        # Hot query path indexes
+        "CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)",
+        "CREATE INDEX IF NOT EXISTS idx_apps_user_name ON apps (user_id, name)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_user_date ON calendar_events (user_id, date, time)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_user_status_date ON calendar_events (user_id, status, date, time)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_ts ON transactions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_status_ts ON transactions (user_id, status, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_task ON task_feedback (task_type, task_id)",
+        # Covers the analytics range scans without touching the table
+        "CREATE INDEX IF NOT EXISTS idx_metrics_user_start "
+        "ON app_usage_metrics (user_id, start_time, app_id, duration)",
+        # Only open sessions, so close_app finds its row without scanning history
+        "CREATE INDEX IF NOT EXISTS idx_metrics_open "
+        "ON app_usage_metrics (user_id, app_id) WHERE end_time IS NULL",
+    ]),
+    (2, [
+        # Per-day usage rollups so analytics scale with days, not sessions
+        """
+        CREATE TABLE IF NOT EXISTS app_usage_daily (
+            user_id INTEGER NOT NULL,
+            app_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            total_duration INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, app_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS category_usage_daily (
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            day TEXT NOT NULL,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            total_duration INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, category)
+        ) WITHOUT ROWID
+        """,
+        f"INSERT INTO app_usage_daily ({APP_ROLLUP_COLUMNS}) {APP_ROLLUP_SOURCE}",
+        f"INSERT INTO category_usage_daily ({CATEGORY_ROLLUP_COLUMNS}) {CATEGORY_ROLLUP_SOURCE}",
+    ]),
+    (3, [
+        # Only pending approvals, in request order, for get_pending_tasks
+        "CREATE INDEX IF NOT EXISTS idx_feedback_pending "
+        "ON task_feedback (user_id, timestamp, feedback_id) WHERE status = 'pending'",
+    ]),
+    (4, [
+        # Stored event spans for conflict checks, kept in sync by triggers
+        "ALTER TABLE calendar_events ADD COLUMN start_epoch INTEGER",
+        "ALTER TABLE calendar_events ADD COLUMN end_epoch INTEGER",
+        f"""
+        UPDATE calendar_events
+        SET start_epoch = {EVENT_START_EPOCH.format(row="")}, end_epoch = {EVENT_END_EPOCH.format(row="")}
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS calendar_events_span_insert AFTER INSERT ON calendar_events
+        BEGIN
+            UPDATE calendar_events
+            SET start_epoch = {EVENT_START_EPOCH.format(row="NEW.")}, end_epoch = {EVENT_END_EPOCH.format(row="NEW.")}
+            WHERE event_id = NEW.event_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS calendar_events_span_update
+        AFTER UPDATE OF date, time, duration ON calendar_events
+        BEGIN
+            UPDATE calendar_events
+            SET start_epoch = {EVENT_START_EPOCH.format(row="NEW.")}, end_epoch = {EVENT_END_EPOCH.format(row="NEW.")}
+            WHERE event_id = NEW.event_id;
+        END
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_calendar_user_span ON calendar_events (user_id, start_epoch, end_epoch)",
+        # MAX(duration) per user in O(log n): bounds how far back an overlap can start
+        "CREATE INDEX IF NOT EXISTS idx_calendar_user_duration ON calendar_events (user_id, duration)",
+    ]),
+    (5, [
+        # Integer epoch twins of the ISO text time columns. VIRTUAL generated
+        # columns cost no table storage and keep every existing writer and
+        # reader of the text columns working; the indexes materialise them.
+        "ALTER TABLE app_usage_metrics ADD COLUMN start_epoch INTEGER "
+        f"GENERATED ALWAYS AS ({EPOCH_OF.format(column='start_time')}) VIRTUAL",
+        "ALTER TABLE app_usage_metrics ADD COLUMN end_epoch INTEGER "
+        f"GENERATED ALWAYS AS ({EPOCH_OF.format(column='end_time')}) VIRTUAL",
+        "ALTER TABLE transactions ADD COLUMN ts_epoch INTEGER "
+        f"GENERATED ALWAYS AS ({EPOCH_OF.format(column='timestamp')}) VIRTUAL",
+        # Replaces the text-keyed covering index for session range scans
+        "DROP INDEX IF EXISTS idx_metrics_user_start",
+        "CREATE INDEX IF NOT EXISTS idx_metrics_user_start_epoch "
+        "ON app_usage_metrics (user_id, start_epoch, app_id, duration)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_epoch ON transactions (user_id, ts_epoch)",
+    ]),
+    (6, [
+        # Vehicle registry behind lookup_car/create_car
+        """
+        CREATE TABLE IF NOT EXISTS cars (
+            car_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vin TEXT NOT NULL,
+            make TEXT,
+            model TEXT,
+            year INTEGER,
+            serial TEXT GENERATED ALWAYS AS (substr(vin, 12)) VIRTUAL
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_cars_vin ON cars (vin)",
+        # Last six characters, which is what callers usually read out
+        "CREATE INDEX IF NOT EXISTS idx_cars_serial ON cars (serial)",
+    ]),
+    (7, [
+        # Preferences used to be written as str(dict) with the quotes swapped,
+        # which leaves Python's True/False/None behind. Repair those, reset
+        # anything still unparseable, and store the rest minified.
+        """
+        UPDATE users
+        SET preferences = replace(replace(replace(preferences, 'True', 'true'), 'False', 'false'), 'None', 'null')
+        WHERE NOT json_valid(preferences)
+        """,
+        "UPDATE users SET preferences = CASE WHEN json_valid(preferences) THEN json(preferences) ELSE '{}' END",
+        # Hot preference keys as indexed VIRTUAL columns (see PREFERENCE_COLUMNS)
+        "ALTER TABLE users ADD COLUMN pref_theme TEXT GENERATED ALWAYS AS (json_extract(preferences, '$.theme')) VIRTUAL",
+        "ALTER TABLE users ADD COLUMN pref_language TEXT "
+        "GENERATED ALWAYS AS (json_extract(preferences, '$.language')) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_users_pref_theme ON users (pref_theme)",
+        "CREATE INDEX IF NOT EXISTS idx_users_pref_language ON users (pref_language)",
+    ]),
+    (8, [
+        # Events stored with unpadded parts ("9:00", "2024-1-5") got NULL
+        # spans and were invisible to conflict checks. Pad them; the update
+        # trigger recomputes the spans.
+        f"""
+        UPDATE calendar_events
+        SET date = {_PADDED_DATE}, time = {_PADDED_TIME}
+        WHERE start_epoch IS NULL AND date GLOB '*-*-*' AND time GLOB '*:*'
+        """,
+    ]),
+]
+
+# Preference keys with an indexed generated column, from migration 7
+PREFERENCE_COLUMNS = {
+    "theme": "pref_theme",
+    "language": "pref_language",
+}
+
+
+def _preference_path(key: str) -> str:
+    """JSON1 path of a top-level key, quoted so dots and spaces stay literal"""
+    if '"' in key:
+        raise ValueError(f"preference key {key!r} must not contain double quotes")
+    return f'$."{key}"'
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared between threads"""
+
+    def __init__(self, db_path: str, size: int = 4, pragmas: Dict[str, Any] = None):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self, timeout: float = None) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Open a new connection lazily while we are below the bound
+        with self._lock:
+            if self._opened < self.size:
+                conn = self._open()
+                self._opened += 1
+                return conn
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no free connection in pool after {timeout}s")
+
+    def release(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            return
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close idle connections now; busy ones are closed when released"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class _BatchConnection:
+    """
+    The connection driver methods see while they run inside run_batch. Their
+    commit is deferred to the batch, and their rollback only undoes their
+    own savepoint.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO batch_call")
+
+
+class ReadCache:
+    """
+    Bounded, thread-safe LRU of query results. Each entry carries tags such
+    as ("apps", user_id); invalidating a tag drops every entry carrying it.
+    A per-tag generation counter stops a slow read that raced a write from
+    storing a stale result. Invalidation only sees writes made through the
+    same process, so entries that other processes change can be given a
+    ttl in seconds after which they are reloaded.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Any, Tuple[Any, Tuple, Optional[float]]]" = OrderedDict()
+        self._tagged: Dict[Any, set] = {}
+        self._generations: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, tags: Tuple, loader, ttl: float = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generations = tuple(self._generations.get(tag, 0) for tag in tags)
+
+        value = loader()
+
+        with self._lock:
+            if generations == tuple(self._generations.get(tag, 0) for tag in tags):
+                expires_at = None if ttl is None else time.monotonic() + ttl
+                self._store(key, tags, value, expires_at)
+        return value
+
+    def _store(self, key, tags: Tuple, value, expires_at: Optional[float]):
+        self._entries[key] = (value, tags, expires_at)
+        self._entries.move_to_end(key)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tagged.get(tag, ())):
+                    self._drop(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
 class DatabaseDriver:
-    def __init__(self, db_path: str = "smartphone_assistant.sqlite"):
+    def __init__(self, db_path: str = "smartphone_assistant.sqlite", pooled: bool = False,
+                 pool_size: int = 4, pragmas: Dict[str, Any] = None, cache_size: int = 0,
+                 frozen_rows: bool = False):
+        """
+        pooled=False keeps the original connect-per-call behaviour. pooled=True
+        reuses up to pool_size long-lived connections with pragmas applied once.
+        cache_size > 0 puts an LRU read-through cache of that many entries in
+        front of user, app and calendar lookups; writes invalidate it. Cached
+        rows are handed to every caller, so the cache always uses frozen rows.
+        The cache is per process: writes made by another process (another
+        agent worker, the API server) do not invalidate it. Calendar events,
+        whose status other workers approve, are therefore only cached for
+        EVENTS_CACHE_TTL seconds; pending tasks are never cached.
+        frozen_rows=True returns immutable row models, which are slower to
+        build but safe to share; dict fields become read-only mappings, so
+        copy them with dict(...) to edit.
+        """
         self.db_path = db_path
+        frozen_rows = frozen_rows or cache_size > 0
+        self._models = FROZEN_MODELS if frozen_rows else {model: model for model in MODELS}
+        self._pool = ConnectionPool(db_path, pool_size, pragmas) if pooled else None
+        self._cache = ReadCache(cache_size) if cache_size > 0 else None
+        # Set on the thread running run_batch
+        self._batch = threading.local()
         self._init_db()
 
     @contextmanager
     def _get_connection(self):
+        batch = getattr(self._batch, "conn", None)
+        if batch is not None:
+            yield batch
+            return
+
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                yield conn
+            return
+
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable dictionary access to rows
         try:
@@ -75,6 +624,66 @@ class DatabaseDriver:
         finally:
             conn.close()
 
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+    def run_batch(self, calls: Iterable[Tuple[str, tuple, dict]]) -> List[Tuple[bool, Any]]:
+        """
+        Group commit: run several write method calls, given as
+        (method_name, args, kwargs), in one transaction with a single commit.
+        Each call runs in its own savepoint, so one that raises is rolled back
+        alone. Returns (True, result) or (False, exception) per call.
+        """
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._batch.conn = _BatchConnection(conn)
+            self._batch.tags = set()
+            outcomes = []
+            try:
+                for name, args, kwargs in calls:
+                    conn.execute("SAVEPOINT batch_call")
+                    try:
+                        outcomes.append((True, getattr(self, name)(*args, **kwargs)))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO batch_call")
+                        outcomes.append((False, e))
+                    conn.execute("RELEASE batch_call")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                tags = self._batch.tags
+                self._batch.conn = None
+                self._batch.tags = None
+
+        self._invalidate(*tags)
+        return outcomes
+
+    def _model(self, model):
+        return self._models[model]
+
+    def _read_through(self, key, tags: Tuple, loader, ttl: float = None):
+        if self._cache is None:
+            return loader()
+        return self._cache.get_or_load(key, tags, loader, ttl)
+
+    def _invalidate(self, *tags):
+        batch_tags = getattr(self._batch, "tags", None)
+        if batch_tags is not None:
+            # Readers must not reload old rows before the batch commits
+            batch_tags.update(tags)
+            return
+        if self._cache is not None:
+            self._cache.invalidate(*tags)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the read-through cache (all zero when disabled)"""
+        if self._cache is None:
+            return {"size": 0, "hits": 0, "misses": 0}
+        return self._cache.stats()
+
     def _init_db(self):
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -161,50 +770,142 @@ class DatabaseDriver:
             """)
             
             conn.commit()
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """
+        Apply every migration newer than the database's PRAGMA user_version.
+        Safe when several processes open the same file at once: each version
+        is applied under the write lock, and the version is checked again
+        after the lock is taken, so only the first process runs it.
+        """
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                current = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if version <= current:
+                    # Another process applied it while we waited for the lock
+                    conn.rollback()
+                    continue
+                for statement in statements:
+                    cursor.execute(statement)
+                # PRAGMA does not accept bound parameters
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
     # User methods
     def create_user(self, name: str, device_type: str, preferences: Dict = None) -> User:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             prefs = preferences if preferences else {}
-            prefs_str = str(prefs).replace("'", "\"")
             
             cursor.execute(
                 "INSERT INTO users (name, device_type, preferences) VALUES (?, ?, ?)",
-                (name, device_type, prefs_str)
+                (name, device_type, json_dumps(prefs))
             )
             user_id = cursor.lastrowid
             conn.commit()
-            return User(user_id=user_id, name=name, device_type=device_type, preferences=prefs)
+            self._invalidate(("user", name))
+            return self._model(User)(user_id=user_id, name=name, device_type=device_type, preferences=prefs)
 
-    def get_user_by_name(self, name: str) -> Optional[User]:
+    def get_or_create_user(self, name: str, device_type: str, preferences: Dict = None) -> User:
+        """
+        The user with this name, created if there is none yet. Names are not
+        unique in the schema, so the lookup and the insert run under the
+        write lock: concurrent callers, in any process, get the same user.
+        """
         with self._get_connection() as conn:
+            # Inside run_batch the batch already holds the write lock
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE name = ?", (name,))
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            import json
-            preferences = json.loads(row['preferences']) if row['preferences'] else {}
-            
-            return User(
-                user_id=row['user_id'],
-                name=row['name'],
-                device_type=row['device_type'],
-                preferences=preferences
+            cursor.execute(
+                """
+                INSERT INTO users (name, device_type, preferences)
+                SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM users WHERE name = ?)
+                """,
+                (name, device_type, json_dumps(preferences if preferences else {}), name)
             )
+            created = cursor.rowcount > 0
+            cursor.row_factory = self._model(User).from_row
+            # The oldest row wins if duplicates were created before this existed
+            cursor.execute(f"SELECT {User.COLUMNS} FROM users WHERE name = ? ORDER BY user_id LIMIT 1", (name,))
+            user = cursor.fetchone()
+            conn.commit()
+        if created:
+            self._invalidate(("user", name))
+        return user
+
+    def get_user_by_name(self, name: str) -> Optional[User]:
+        return self._read_through(("user", name), (("user", name),), lambda: self._load_user_by_name(name))
+
+    def _load_user_by_name(self, name: str) -> Optional[User]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self._model(User).from_row
+            cursor.execute(f"SELECT {User.COLUMNS} FROM users WHERE name = ?", (name,))
+            return cursor.fetchone()
     
     def update_user_preferences(self, user_id: int, preferences: Dict) -> bool:
+        """Replace all of a user's preferences"""
+        return self._update_preferences(user_id, "?", (json_dumps(preferences),))
+
+    def set_user_preferences(self, user_id: int, updates: Dict[str, Any]) -> bool:
+        """
+        Set some top-level preference keys, leaving the others alone. json_set
+        edits the stored document in place, so there is no read-modify-write
+        round trip and concurrent updates to different keys cannot clobber
+        each other.
+        """
+        if not updates:
+            return False
+        args = []
+        for key, value in updates.items():
+            # json(?) keeps booleans, nulls and nested objects as JSON, not text
+            args += [_preference_path(key), json_dumps(value)]
+        paths = ", ".join("?, json(?)" for _ in updates)
+        return self._update_preferences(user_id, f"json_set(preferences, {paths})", args)
+
+    def remove_user_preferences(self, user_id: int, keys: Iterable[str]) -> bool:
+        paths = [_preference_path(key) for key in keys]
+        if not paths:
+            return False
+        return self._update_preferences(user_id, f"json_remove(preferences, {', '.join('?' * len(paths))})", paths)
+
+    def _update_preferences(self, user_id: int, expression: str, args) -> bool:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            prefs_str = str(preferences).replace("'", "\"")
             cursor.execute(
-                "UPDATE users SET preferences = ? WHERE user_id = ?",
-                (prefs_str, user_id)
+                f"UPDATE users SET preferences = {expression} WHERE user_id = ?",
+                (*args, user_id)
             )
+            updated = cursor.rowcount
             conn.commit()
-            return cursor.rowcount > 0
+            
+            if self._cache is not None:
+                cursor.execute("SELECT name FROM users WHERE user_id = ?", (user_id,))
+                row = cursor.fetchone()
+                if row:
+                    self._invalidate(("user", row['name']))
+            return updated > 0
+
+    def get_users_by_preference(self, key: str, value: Any) -> List[User]:
+        """Users whose preference `key` equals `value`; only indexed keys (PREFERENCE_COLUMNS)"""
+        column = PREFERENCE_COLUMNS.get(key)
+        if column is None:
+            raise ValueError(f"preference {key!r} is not indexed, expected one of {', '.join(PREFERENCE_COLUMNS)}")
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self._model(User).from_row
+            cursor.execute(f"SELECT {User.COLUMNS} FROM users WHERE {column} = ? ORDER BY user_id", (value,))
+            return cursor.fetchall()
     
     # App methods
     def add_app(self, name: str, category: str, user_id: int) -> App:
@@ -217,39 +918,32 @@ class DatabaseDriver:
             )
             app_id = cursor.lastrowid
             conn.commit()
-            return App(app_id=app_id, name=name, category=category, user_id=user_id, last_used=now)
+            self._invalidate(("apps", user_id))
+            return self._model(App)(app_id=app_id, name=name, category=category, user_id=user_id, last_used=now)
     
     def get_apps_for_user(self, user_id: int) -> List[App]:
+        return list(self._read_through(
+            ("apps", user_id), (("apps", user_id),), lambda: self._load_apps_for_user(user_id)
+        ))
+
+    def _load_apps_for_user(self, user_id: int) -> List[App]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM apps WHERE user_id = ?", (user_id,))
-            rows = cursor.fetchall()
-            
-            return [App(
-                app_id=row['app_id'],
-                name=row['name'],
-                category=row['category'],
-                user_id=row['user_id'],
-                is_running=bool(row['is_running']),
-                last_used=row['last_used']
-            ) for row in rows]
+            cursor.row_factory = self._model(App).from_row
+            cursor.execute(f"SELECT {App.COLUMNS} FROM apps WHERE user_id = ?", (user_id,))
+            return cursor.fetchall()
     
     def get_app_by_name(self, name: str, user_id: int) -> Optional[App]:
+        return self._read_through(
+            ("app", user_id, name), (("apps", user_id),), lambda: self._load_app_by_name(name, user_id)
+        )
+
+    def _load_app_by_name(self, name: str, user_id: int) -> Optional[App]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM apps WHERE name = ? AND user_id = ?", (name, user_id))
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            return App(
-                app_id=row['app_id'],
-                name=row['name'],
-                category=row['category'],
-                user_id=row['user_id'],
-                is_running=bool(row['is_running']),
-                last_used=row['last_used']
-            )
+            cursor.row_factory = self._model(App).from_row
+            cursor.execute(f"SELECT {App.COLUMNS} FROM apps WHERE name = ? AND user_id = ?", (name, user_id))
+            return cursor.fetchone()
     
     def switch_app(self, app_id: int, user_id: int) -> bool:
         """Switch to an app by closing all running apps and opening the requested one"""
@@ -276,6 +970,7 @@ class DatabaseDriver:
             )
             
             conn.commit()
+            self._invalidate(("apps", user_id))
             return cursor.rowcount > 0
     
     def close_app(self, app_id: int, user_id: int) -> bool:
@@ -290,6 +985,12 @@ class DatabaseDriver:
                 (app_id, user_id)
             )
             
+            cursor.execute(
+                "SELECT metric_id FROM app_usage_metrics WHERE app_id = ? AND user_id = ? AND end_time IS NULL",
+                (app_id, user_id)
+            )
+            open_ids = [row['metric_id'] for row in cursor.fetchall()]
+            
             # Update the latest app usage metric
             cursor.execute(
                 """
@@ -300,79 +1001,271 @@ class DatabaseDriver:
                 """,
                 (now, now, app_id, user_id)
             )
+            closed = cursor.rowcount
+            
+            # Fold the finished sessions into the daily rollups
+            if open_ids:
+                placeholders = ",".join("?" * len(open_ids))
+                cursor.execute(
+                    f"""
+                    SELECT m.app_id, a.category, m.start_time, m.duration
+                    FROM app_usage_metrics m
+                    JOIN apps a ON m.app_id = a.app_id
+                    WHERE m.metric_id IN ({placeholders})
+                    """,
+                    open_ids
+                )
+                self._add_to_rollups(cursor, user_id, [tuple(row) for row in cursor.fetchall()])
             
             conn.commit()
-            return cursor.rowcount > 0
+            self._invalidate(("apps", user_id))
+            return closed > 0
+
+    def _add_to_rollups(self, cursor: sqlite3.Cursor, user_id: int,
+                        sessions: Iterable[Tuple[int, str, str, int]]):
+        """Add finished (app_id, category, start_time, duration) sessions to the daily rollups"""
+        by_app = {}
+        by_category = {}
+        for app_id, category, start_time, duration in sessions:
+            day = start_time[:10]
+            count, total = by_app.get((app_id, day), (0, 0))
+            by_app[(app_id, day)] = (count + 1, total + (duration or 0))
+            count, total = by_category.get((category, day), (0, 0))
+            by_category[(category, day)] = (count + 1, total + (duration or 0))
+
+        cursor.executemany(
+            """
+            INSERT INTO app_usage_daily (user_id, app_id, day, sessions, total_duration)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, day, app_id) DO UPDATE SET
+                sessions = sessions + excluded.sessions,
+                total_duration = total_duration + excluded.total_duration
+            """,
+            [(user_id, app_id, day, count, total) for (app_id, day), (count, total) in by_app.items()]
+        )
+        cursor.executemany(
+            """
+            INSERT INTO category_usage_daily (user_id, category, day, sessions, total_duration)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, day, category) DO UPDATE SET
+                sessions = sessions + excluded.sessions,
+                total_duration = total_duration + excluded.total_duration
+            """,
+            [(user_id, category, day, count, total) for (category, day), (count, total) in by_category.items()]
+        )
+
+    def check_usage_rollups(self, repair: bool = False) -> Dict[str, int]:
+        """
+        Recompute the daily rollups from raw sessions and count rows that
+        differ. With repair=True the rollup tables are rebuilt from raw rows.
+        """
+        mismatch_sql = """
+            SELECT COUNT(*) FROM (
+                SELECT * FROM ({source} EXCEPT SELECT {columns} FROM {table})
+                UNION ALL
+                SELECT * FROM (SELECT {columns} FROM {table} EXCEPT {source})
+            )
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(mismatch_sql.format(
+                source=APP_ROLLUP_SOURCE, columns=APP_ROLLUP_COLUMNS, table="app_usage_daily"))
+            app_mismatches = cursor.fetchone()[0]
+            cursor.execute(mismatch_sql.format(
+                source=CATEGORY_ROLLUP_SOURCE, columns=CATEGORY_ROLLUP_COLUMNS, table="category_usage_daily"))
+            category_mismatches = cursor.fetchone()[0]
+
+            if repair and (app_mismatches or category_mismatches):
+                cursor.execute("DELETE FROM app_usage_daily")
+                cursor.execute("DELETE FROM category_usage_daily")
+                cursor.execute(f"INSERT INTO app_usage_daily ({APP_ROLLUP_COLUMNS}) {APP_ROLLUP_SOURCE}")
+                cursor.execute(f"INSERT INTO category_usage_daily ({CATEGORY_ROLLUP_COLUMNS}) {CATEGORY_ROLLUP_SOURCE}")
+                conn.commit()
+
+            return {
+                "app_mismatches": app_mismatches,
+                "category_mismatches": category_mismatches,
+            }
+
+    def ingest_usage_sessions(self, user_id: int,
+                              sessions: Iterable[Tuple[str, Union[str, datetime], Union[str, datetime]]],
+                              chunk_size: int = 5000) -> Dict[str, Any]:
+        """
+        Bulk-load finished app sessions as (app_name, start, end) records.
+        Each chunk is one transaction with a single app name lookup and an
+        executemany insert. Sessions for apps the user does not have are skipped.
+        """
+        inserted = 0
+        skipped = 0
+        started = time.perf_counter()
+        sessions = iter(sessions)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            while True:
+                chunk = list(islice(sessions, chunk_size))
+                if not chunk:
+                    break
+
+                names = list({name for name, _, _ in chunk})
+                placeholders = ",".join("?" * len(names))
+                cursor.execute(
+                    f"SELECT name, app_id, category FROM apps WHERE user_id = ? AND name IN ({placeholders})",
+                    (user_id, *names)
+                )
+                apps = {row['name']: (row['app_id'], row['category']) for row in cursor.fetchall()}
+
+                rows = []
+                finished = []
+                for name, start, end in chunk:
+                    if name not in apps:
+                        skipped += 1
+                        continue
+                    app_id, category = apps[name]
+                    start = start if isinstance(start, datetime) else datetime.fromisoformat(start)
+                    end = end if isinstance(end, datetime) else datetime.fromisoformat(end)
+                    duration = round((end - start).total_seconds())
+                    rows.append((app_id, user_id, start.isoformat(), end.isoformat(), duration))
+                    finished.append((app_id, category, rows[-1][2], duration))
+
+                cursor.executemany(
+                    """
+                    INSERT INTO app_usage_metrics (app_id, user_id, start_time, end_time, duration)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    rows
+                )
+                self._add_to_rollups(cursor, user_id, finished)
+                conn.commit()
+                inserted += len(rows)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": inserted,
+            "skipped": skipped,
+            "seconds": elapsed,
+            "rows_per_sec": inserted / elapsed if elapsed > 0 else float(inserted),
+        }
+    
+    def _row_factory(self, model, row_type: str):
+        if row_type == "model":
+            return self._model(model).from_row
+        if row_type == "namedtuple":
+            make = ROW_TUPLES[model]._make
+            return lambda cursor, row: make(row)
+        if row_type == "tuple":
+            return None
+        raise ValueError(f"unknown row_type {row_type!r}, expected model, namedtuple or tuple")
+
+    def iter_app_usage_metrics(self, user_id: int, row_type: str = "model", batch_size: int = 1000,
+                               since: Union[str, datetime] = None,
+                               until: Union[str, datetime] = None) -> Iterator[AppUsageMetric]:
+        """
+        Lazily stream a user's raw usage sessions in start time order, batch_size
+        rows at a time, optionally only those starting in [since, until).
+        row_type is "model", "namedtuple" or "tuple". The connection is held
+        until the iterator is exhausted or closed.
+        """
+        row_factory = self._row_factory(AppUsageMetric, row_type)
+        time_range, params = _epoch_range("start_epoch", since, until)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory
+            cursor.arraysize = batch_size
+            cursor.execute(
+                f"SELECT {AppUsageMetric.COLUMNS} FROM app_usage_metrics WHERE user_id = ?{time_range} "
+                "ORDER BY start_epoch, metric_id",
+                (user_id, *params)
+            )
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
     
     # Calendar methods
     def add_calendar_event(self, title: str, date: str, time: str, duration: int, 
                            user_id: int, reminder: bool = False) -> CalendarEvent:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO calendar_events 
-                (title, date, time, duration, user_id, reminder) 
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (title, date, time, duration, user_id, reminder)
-            )
-            event_id = cursor.lastrowid
-            
-            # Create task feedback entry for approval
-            now = datetime.now().isoformat()
-            cursor.execute(
-                """
-                INSERT INTO task_feedback 
-                (task_type, task_id, user_id, status, timestamp) 
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                ("calendar", event_id, user_id, "pending", now)
-            )
-            
+            event = self._insert_calendar_event(cursor, title, date, time, duration, user_id, reminder)
             conn.commit()
-            return CalendarEvent(
-                event_id=event_id,
-                title=title,
-                date=date,
-                time=time,
-                duration=duration,
-                user_id=user_id,
-                reminder=reminder,
-                status="pending"
-            )
+            self._invalidate(("events", user_id))
+            return event
+
+    def _insert_calendar_event(self, cursor, title: str, date: str, time: str, duration: int,
+                               user_id: int, reminder: bool = False) -> CalendarEvent:
+        # The span triggers only read zero-padded dates and times
+        date, time = normalize_slot(date, time)
+        cursor.execute(
+            """
+            INSERT INTO calendar_events 
+            (title, date, time, duration, user_id, reminder) 
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (title, date, time, duration, user_id, reminder)
+        )
+        event_id = cursor.lastrowid
+        
+        # Create task feedback entry for approval
+        now = datetime.now().isoformat()
+        cursor.execute(
+            """
+            INSERT INTO task_feedback 
+            (task_type, task_id, user_id, status, timestamp) 
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            ("calendar", event_id, user_id, "pending", now)
+        )
+        
+        return self._model(CalendarEvent)(
+            event_id=event_id,
+            title=title,
+            date=date,
+            time=time,
+            duration=duration,
+            user_id=user_id,
+            reminder=reminder,
+            status="pending"
+        )
     
     def get_calendar_events_for_user(self, user_id: int, status: str = None) -> List[CalendarEvent]:
+        return list(self._read_through(
+            ("events", user_id, status), (("events", user_id),),
+            lambda: self._load_calendar_events_for_user(user_id, status),
+            EVENTS_CACHE_TTL
+        ))
+
+    def _load_calendar_events_for_user(self, user_id: int, status: str = None) -> List[CalendarEvent]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = self._model(CalendarEvent).from_row
             
             if status:
                 cursor.execute(
-                    "SELECT * FROM calendar_events WHERE user_id = ? AND status = ? ORDER BY date, time",
+                    f"SELECT {CalendarEvent.COLUMNS} FROM calendar_events WHERE user_id = ? AND status = ? ORDER BY date, time",
                     (user_id, status)
                 )
             else:
                 cursor.execute(
-                    "SELECT * FROM calendar_events WHERE user_id = ? ORDER BY date, time", 
+                    f"SELECT {CalendarEvent.COLUMNS} FROM calendar_events WHERE user_id = ? ORDER BY date, time", 
                     (user_id,)
                 )
                 
-            rows = cursor.fetchall()
-            
-            return [CalendarEvent(
-                event_id=row['event_id'],
-                title=row['title'],
-                date=row['date'],
-                time=row['time'],
-                duration=row['duration'],
-                user_id=row['user_id'],
-                status=row['status'],
-                reminder=bool(row['reminder'])
-            ) for row in rows]
+            return cursor.fetchall()
+    
+    def _event_owner(self, cursor: sqlite3.Cursor, event_id: int) -> Optional[int]:
+        """user_id of a calendar event, looked up only when there is a cache to invalidate"""
+        if self._cache is None:
+            return None
+        cursor.execute("SELECT user_id FROM calendar_events WHERE event_id = ?", (event_id,))
+        row = cursor.fetchone()
+        return row['user_id'] if row else None
     
     def update_calendar_event_status(self, event_id: int, status: str) -> bool:
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            owner = self._event_owner(cursor, event_id)
             cursor.execute(
                 "UPDATE calendar_events SET status = ? WHERE event_id = ?",
                 (status, event_id)
@@ -385,11 +1278,13 @@ class DatabaseDriver:
             )
             
             conn.commit()
+            self._invalidate(("events", owner))
             return cursor.rowcount > 0
     
     def delete_calendar_event(self, event_id: int) -> bool:
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            owner = self._event_owner(cursor, event_id)
             
             # First delete associated feedback
             cursor.execute(
@@ -404,77 +1299,232 @@ class DatabaseDriver:
             )
             
             conn.commit()
+            self._invalidate(("events", owner))
             return cursor.rowcount > 0
     
+    def get_calendar_conflicts(self, user_id: int, date: str, time: str, duration: int,
+                               exclude_event_id: int = None) -> List[CalendarEvent]:
+        """Events of the user, other than rejected ones, that overlap the given slot"""
+        start, end = event_span(date, time, duration)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            spans = self._events_overlapping(cursor, user_id, start, end)
+        return [event for event, _, _ in spans if event.event_id != exclude_event_id]
+
+    def find_free_slots(self, user_id: int, date: str, duration: int, day_start: str = "09:00",
+                        day_end: str = "18:00", limit: int = 3,
+                        also_busy: Iterable[Tuple[int, int]] = ()) -> List[Tuple[str, str]]:
+        """
+        Up to `limit` free (start, end) times of at least `duration` minutes
+        on `date` between day_start and day_end. also_busy adds epoch spans
+        that are not stored yet.
+        """
+        start, end = to_epoch(date, day_start), to_epoch(date, day_end)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            spans = self._events_overlapping(cursor, user_id, start, end)
+
+        busy = IntervalTree()
+        for event, event_start, event_end in spans:
+            busy.add(event_start, event_end, event.event_id)
+        for i, (busy_start, busy_end) in enumerate(also_busy):
+            busy.add(busy_start, busy_end, -1 - i)
+        return [
+            (from_epoch(slot_start)[1], from_epoch(slot_end)[1])
+            for slot_start, slot_end in busy.free_slots(start, end, duration * 60, limit)
+        ]
+
+    def _events_overlapping(self, cursor, user_id: int, start: int,
+                            end: int) -> List[Tuple[CalendarEvent, int, int]]:
+        # An overlap must start before `end` and no earlier than the user's
+        # longest event before `start`, so this stays a bounded range scan
+        # on idx_calendar_user_span instead of reading all earlier events.
+        cursor.execute("SELECT MAX(duration) FROM calendar_events WHERE user_id = ?", (user_id,))
+        longest = cursor.fetchone()[0]
+        if longest is None:
+            return []
+        from_row = self._model(CalendarEvent).from_row
+        cursor.row_factory = lambda cur, row: (from_row(cur, row[:-2]), row[-2], row[-1])
+        cursor.execute(
+            f"""
+            SELECT {CalendarEvent.COLUMNS}, start_epoch, end_epoch FROM calendar_events
+            WHERE user_id = ? AND start_epoch >= ? AND start_epoch < ? AND end_epoch > ?
+              AND status != 'rejected'
+            ORDER BY start_epoch
+            """,
+            (user_id, start - max(longest, 0) * 60, end, start)
+        )
+        return cursor.fetchall()
+
+    def get_calendar_events_page(self, user_id: int, limit: int = 50, after: Tuple = None,
+                                 status: str = None) -> Tuple[List[CalendarEvent], Optional[Tuple]]:
+        """
+        One page of calendar events in (date, time) order. Pass the returned
+        cursor back as `after` for the next page; it is None at the end.
+        """
+        return self._keyset_page(
+            CalendarEvent, "calendar_events", ("date", "time", "event_id"), False,
+            user_id, status, after, limit
+        )
+
+    def iter_calendar_events_for_user(self, user_id: int, status: str = None, after: Tuple = None,
+                                      page_size: int = 500) -> Iterator[CalendarEvent]:
+        """Calendar events in (date, time) order in constant memory, one keyset page at a time"""
+        return self._iter_pages(self.get_calendar_events_page, user_id, status, after, page_size)
+
+    def _keyset_page(self, model, table: str, keys: Tuple[str, ...], descending: bool,
+                     user_id: int, status: Optional[str], after: Optional[Tuple], limit: int):
+        """
+        Keyset pagination over a per-user index: seeks straight past `after`
+        (the key values of the last row seen) instead of using OFFSET.
+        """
+        where = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if after is not None:
+            if len(after) != len(keys):
+                raise ValueError(f"cursor must have {len(keys)} values: {', '.join(keys)}")
+            key_list = ", ".join(keys)
+            where.append(f"({key_list}) {'<' if descending else '>'} ({', '.join('?' * len(keys))})")
+            params.extend(after)
+        direction = " DESC" if descending else ""
+        order = ", ".join(key + direction for key in keys)
+        params.append(limit)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self._model(model).from_row
+            cursor.execute(
+                f"SELECT {model.COLUMNS} FROM {table} WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?",
+                params
+            )
+            rows = cursor.fetchall()
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = tuple(getattr(rows[-1], key) for key in keys)
+        return rows, next_cursor
+
+    def _iter_pages(self, get_page, user_id: int, status: Optional[str], after: Optional[Tuple],
+                    page_size: int):
+        # No connection is held between pages, so abandoning the iterator is free
+        while True:
+            rows, after = get_page(user_id, page_size, after, status)
+            yield from rows
+            if after is None:
+                return
+    
     # Transaction methods
     def create_transaction(self, type: str, amount: float, description: str, 
                           user_id: int, approval_needed: bool = True) -> Transaction:
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            now = datetime.now().isoformat()
-            
+            transaction = self._insert_transaction(cursor, type, amount, description, user_id, approval_needed)
+            conn.commit()
+            return transaction
+
+    def _insert_transaction(self, cursor, type: str, amount: float, description: str,
+                            user_id: int, approval_needed: bool = True) -> Transaction:
+        now = datetime.now().isoformat()
+        
+        cursor.execute(
+            """
+            INSERT INTO transactions 
+            (type, amount, description, timestamp, user_id, approval_needed, status) 
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (type, amount, description, now, user_id, approval_needed, 
+             "pending" if approval_needed else "approved")
+        )
+        transaction_id = cursor.lastrowid
+        
+        # Create task feedback entry if approval is needed
+        if approval_needed:
             cursor.execute(
                 """
-                INSERT INTO transactions 
-                (type, amount, description, timestamp, user_id, approval_needed, status) 
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO task_feedback 
+                (task_type, task_id, user_id, status, timestamp) 
+                VALUES (?, ?, ?, ?, ?)
                 """,
-                (type, amount, description, now, user_id, approval_needed, 
-                 "pending" if approval_needed else "approved")
+                ("transaction", transaction_id, user_id, "pending", now)
             )
-            transaction_id = cursor.lastrowid
-            
-            # Create task feedback entry if approval is needed
-            if approval_needed:
-                cursor.execute(
-                    """
-                    INSERT INTO task_feedback 
-                    (task_type, task_id, user_id, status, timestamp) 
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    ("transaction", transaction_id, user_id, "pending", now)
-                )
-            
+        
+        return self._model(Transaction)(
+            transaction_id=transaction_id,
+            type=type,
+            amount=amount,
+            description=description,
+            timestamp=now,
+            status="pending" if approval_needed else "approved",
+            user_id=user_id,
+            approval_needed=approval_needed
+        )
+
+    def write_batch(self, calendar_events: Iterable[Dict[str, Any]] = (),
+                    transactions: Iterable[Dict[str, Any]] = ()) -> Tuple[List[CalendarEvent], List[Transaction]]:
+        """
+        Several add_calendar_event / create_transaction calls, given as their
+        keyword arguments, committed as one transaction: all or nothing, and
+        a single commit instead of one per write.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                events = [self._insert_calendar_event(cursor, **event) for event in calendar_events]
+                created = [self._insert_transaction(cursor, **transaction) for transaction in transactions]
+            except Exception:
+                conn.rollback()
+                raise
             conn.commit()
-            return Transaction(
-                transaction_id=transaction_id,
-                type=type,
-                amount=amount,
-                description=description,
-                timestamp=now,
-                status="pending" if approval_needed else "approved",
-                user_id=user_id,
-                approval_needed=approval_needed
-            )
+            self._invalidate(*{("events", event.user_id) for event in events})
+            return events, created
     
-    def get_transactions_for_user(self, user_id: int, status: str = None) -> List[Transaction]:
+    def get_transactions_for_user(self, user_id: int, status: str = None, since: Union[str, datetime] = None,
+                                  until: Union[str, datetime] = None) -> List[Transaction]:
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = self._model(Transaction).from_row
             
-            if status:
+            if since is not None or until is not None:
+                # Numeric range on the epoch index, whatever the text format
+                time_range, params = _epoch_range("ts_epoch", since, until)
+                status_filter = " AND status = ?" if status else ""
+                cursor.execute(
+                    f"SELECT {Transaction.COLUMNS} FROM transactions WHERE user_id = ?{time_range}{status_filter} "
+                    "ORDER BY ts_epoch DESC, transaction_id DESC",
+                    (user_id, *params, *([status] if status else []))
+                )
+            elif status:
                 cursor.execute(
-                    "SELECT * FROM transactions WHERE user_id = ? AND status = ? ORDER BY timestamp DESC",
+                    f"SELECT {Transaction.COLUMNS} FROM transactions WHERE user_id = ? AND status = ? ORDER BY timestamp DESC",
                     (user_id, status)
                 )
             else:
                 cursor.execute(
-                    "SELECT * FROM transactions WHERE user_id = ? ORDER BY timestamp DESC", 
+                    f"SELECT {Transaction.COLUMNS} FROM transactions WHERE user_id = ? ORDER BY timestamp DESC", 
                     (user_id,)
                 )
                 
-            rows = cursor.fetchall()
-            
-            return [Transaction(
-                transaction_id=row['transaction_id'],
-                type=row['type'],
-                amount=row['amount'],
-                description=row['description'],
-                timestamp=row['timestamp'],
-                status=row['status'],
-                user_id=row['user_id'],
-                approval_needed=bool(row['approval_needed'])
-            ) for row in rows]
+            return cursor.fetchall()
     
+    def get_transactions_page(self, user_id: int, limit: int = 50, after: Tuple = None,
+                              status: str = None) -> Tuple[List[Transaction], Optional[Tuple]]:
+        """
+        One page of transactions, newest first. Pass the returned cursor back
+        as `after` for the next page; it is None once history is exhausted.
+        """
+        return self._keyset_page(
+            Transaction, "transactions", ("timestamp", "transaction_id"), True,
+            user_id, status, after, limit
+        )
+
+    def iter_transactions_for_user(self, user_id: int, status: str = None, after: Tuple = None,
+                                   page_size: int = 500) -> Iterator[Transaction]:
+        """Newest-first transactions in constant memory, one keyset page at a time"""
+        return self._iter_pages(self.get_transactions_page, user_id, status, after, page_size)
+
     def update_transaction_status(self, transaction_id: int, status: str) -> bool:
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -494,19 +1544,20 @@ class DatabaseDriver:
     
     # Metrics analysis methods
     def get_app_usage_metrics(self, user_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """Per-app usage of finished sessions over the last `days` days, from the daily rollups"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT a.name, a.category, 
-                       COUNT(m.metric_id) as sessions,
-                       SUM(m.duration) as total_duration,
-                       AVG(m.duration) as avg_duration
-                FROM app_usage_metrics m
-                JOIN apps a ON m.app_id = a.app_id
-                WHERE m.user_id = ? 
-                AND m.start_time >= datetime('now', ?) 
-                GROUP BY a.app_id
+                       SUM(r.sessions) as sessions,
+                       SUM(r.total_duration) as total_duration,
+                       CAST(SUM(r.total_duration) AS REAL) / SUM(r.sessions) as avg_duration
+                FROM app_usage_daily r
+                JOIN apps a ON r.app_id = a.app_id
+                WHERE r.user_id = ? 
+                AND r.day >= date('now', ?) 
+                GROUP BY r.app_id
                 ORDER BY total_duration DESC
                 """,
                 (user_id, f'-{days} days')
@@ -515,58 +1566,119 @@ class DatabaseDriver:
             return [dict(row) for row in cursor.fetchall()]
     
     def get_app_category_usage(self, user_id: int, days: int = 7) -> List[Dict[str, Any]]:
+        """Per-category usage of finished sessions over the last `days` days, from the daily rollups"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            window = f'-{days} days'
             cursor.execute(
                 """
-                SELECT a.category, 
-                       SUM(m.duration) as total_duration,
-                       COUNT(DISTINCT a.app_id) as unique_apps
-                FROM app_usage_metrics m
-                JOIN apps a ON m.app_id = a.app_id
-                WHERE m.user_id = ? 
-                AND m.start_time >= datetime('now', ?) 
-                GROUP BY a.category
+                SELECT c.category,
+                       SUM(c.total_duration) as total_duration,
+                       (SELECT COUNT(DISTINCT r.app_id)
+                        FROM app_usage_daily r
+                        JOIN apps a ON r.app_id = a.app_id
+                        WHERE r.user_id = ? AND r.day >= date('now', ?)
+                        AND a.category = c.category) as unique_apps
+                FROM category_usage_daily c
+                WHERE c.user_id = ? 
+                AND c.day >= date('now', ?) 
+                GROUP BY c.category
                 ORDER BY total_duration DESC
                 """,
-                (user_id, f'-{days} days')
+                (user_id, window, user_id, window)
             )
             
             return [dict(row) for row in cursor.fetchall()]
     
     # Task feedback and approval methods
-    def get_pending_tasks(self, user_id: int) -> Dict[str, List]:
+    def iter_pending_tasks(self, user_id: int, task_type: str = None,
+                           batch_size: int = 1000) -> Iterator[PendingTask]:
+        """
+        Every pending calendar and transaction approval for a user, oldest
+        request first, in a single query streamed in batches.
+        """
+        sql = PENDING_TASKS_QUERY
+        params: List[Any] = [user_id]
+        if task_type:
+            sql += " AND f.task_type = ?"
+            params.append(task_type)
+        sql += " ORDER BY f.timestamp, f.feedback_id"
+
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Get pending calendar tasks
+            cursor.row_factory = PendingTask.from_row
+            cursor.arraysize = batch_size
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                yield from rows
+
+    def get_pending_task(self, feedback_id: int) -> Optional[PendingTask]:
+        """A single pending task by its feedback id, or None once it is resolved"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = PendingTask.from_row
+            cursor.execute(PENDING_TASK_QUERY, (feedback_id,))
+            return cursor.fetchone()
+
+    def resolve_task(self, feedback_id: int, status: str, feedback: str = None,
+                     user_id: int = None) -> Optional[Union[CalendarEvent, Transaction]]:
+        """
+        Approve or reject a pending task together with its calendar event or
+        transaction, and return that updated item. The status only moves away
+        from 'pending' once, so of several concurrent approvers exactly one
+        wins; the others get None, as does an unknown task or one that
+        belongs to another user.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            # Claim first: the write lock is taken before anything is read
             cursor.execute(
                 """
-                SELECT c.*, f.feedback_id
-                FROM calendar_events c
-                JOIN task_feedback f ON c.event_id = f.task_id
-                WHERE c.user_id = ? AND f.status = 'pending' AND f.task_type = 'calendar'
+                UPDATE task_feedback
+                SET status = ?, feedback = ?, timestamp = ?
+                WHERE feedback_id = ? AND status = 'pending' AND user_id = COALESCE(?, user_id)
                 """,
-                (user_id,)
+                (status, feedback, datetime.now().isoformat(), feedback_id, user_id)
             )
-            calendar_tasks = [dict(row) for row in cursor.fetchall()]
-            
-            # Get pending transaction tasks
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None
+
             cursor.execute(
-                """
-                SELECT t.*, f.feedback_id
-                FROM transactions t
-                JOIN task_feedback f ON t.transaction_id = f.task_id
-                WHERE t.user_id = ? AND f.status = 'pending' AND f.task_type = 'transaction'
-                """,
-                (user_id,)
+                "SELECT task_type, task_id, user_id FROM task_feedback WHERE feedback_id = ?",
+                (feedback_id,)
             )
-            transaction_tasks = [dict(row) for row in cursor.fetchall()]
-            
-            return {
-                "calendar": calendar_tasks,
-                "transaction": transaction_tasks
-            }
+            claimed = cursor.fetchone()
+            if claimed["task_type"] not in TASK_TABLES:
+                conn.rollback()
+                return None
+
+            table, key = TASK_TABLES[claimed["task_type"]]
+            model = CalendarEvent if claimed["task_type"] == "calendar" else Transaction
+            cursor.execute(f"UPDATE {table} SET status = ? WHERE {key} = ?", (status, claimed["task_id"]))
+            cursor.row_factory = self._model(model).from_row
+            cursor.execute(f"SELECT {model.COLUMNS} FROM {table} WHERE {key} = ?", (claimed["task_id"],))
+            task = cursor.fetchone()
+            if task is None:
+                # The feedback row outlived its task
+                conn.rollback()
+                return None
+
+            conn.commit()
+            if claimed["task_type"] == "calendar":
+                self._invalidate(("events", claimed["user_id"]))
+            return task
+
+    def get_pending_tasks(self, user_id: int) -> Dict[str, List]:
+        tasks = {"calendar": [], "transaction": []}
+        for pending in self.iter_pending_tasks(user_id):
+            row = asdict(pending.task)
+            row["feedback_id"] = pending.feedback_id
+            tasks[pending.task_type].append(row)
+        return tasks
     
     def submit_task_feedback(self, feedback_id: int, status: str, feedback: str = None) -> bool:
         with self._get_connection() as conn:
@@ -584,7 +1696,7 @@ class DatabaseDriver:
             
             # Get the task details to update the original item
             cursor.execute(
-                "SELECT task_type, task_id FROM task_feedback WHERE feedback_id = ?",
+                "SELECT task_type, task_id, user_id FROM task_feedback WHERE feedback_id = ?",
                 (feedback_id,)
             )
             task = cursor.fetchone()
@@ -603,4 +1715,118 @@ class DatabaseDriver:
                     )
             
             conn.commit()
-            return cursor.rowcount > 0
\ No newline at end of file
+            if task and task['task_type'] == 'calendar':
+                self._invalidate(("events", task['user_id']))
+            return cursor.rowcount > 0
+
+    # Car methods
+    def get_car_by_vin(self, vin: str) -> Optional[Car]:
+        vin = normalize_vin(vin)
+        return self._read_through(("car", vin), (("car", vin),), lambda: self._load_car(vin))
+
+    def _load_car(self, vin: str) -> Optional[Car]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self._model(Car).from_row
+            cursor.execute(f"SELECT {Car.COLUMNS} FROM cars WHERE vin = ?", (vin,))
+            return cursor.fetchone()
+
+    def create_car(self, vin: str, make: str, model: str, year: int) -> Optional[Car]:
+        """Register a car; None if the VIN is malformed or already registered"""
+        vin = normalize_vin(vin)
+        if not is_valid_vin(vin):
+            return None
+        decoded = decode_vin(vin)
+        make = make or decoded["make"]
+        year = int(year) if year else decoded["year"]
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO cars (vin, make, model, year) VALUES (?, ?, ?, ?)",
+                (vin, make, model, year)
+            )
+            if cursor.rowcount == 0:
+                return None
+            car_id = cursor.lastrowid
+            conn.commit()
+            self._invalidate(("car", vin))
+            return self._model(Car)(car_id, vin, make, model, year)
+
+    def import_fleet(self, cars: Iterable[Tuple[str, str, str, int]], chunk_size: int = 5000) -> Dict[str, Any]:
+        """
+        Bulk-load (vin, make, model, year) records, one transaction per chunk.
+        Malformed and already registered VINs are skipped.
+        """
+        inserted = 0
+        skipped = 0
+        started = time.perf_counter()
+        cars = iter(cars)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            while True:
+                chunk = list(islice(cars, chunk_size))
+                if not chunk:
+                    break
+
+                rows = []
+                for vin, make, model, year in chunk:
+                    vin = normalize_vin(vin)
+                    if not is_valid_vin(vin):
+                        skipped += 1
+                        continue
+                    rows.append((vin, make, model, year))
+
+                before = conn.total_changes
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO cars (vin, make, model, year) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                added = conn.total_changes - before
+                conn.commit()
+                inserted += added
+                skipped += len(rows) - added
+                # Drop cached "not found" answers for the new VINs
+                self._invalidate(*(("car", row[0]) for row in rows))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": inserted,
+            "skipped": skipped,
+            "seconds": elapsed,
+            "rows_per_sec": inserted / elapsed if elapsed > 0 else float(inserted),
+        }
+
+    def resolve_vin(self, fragment: str, limit: int = 5) -> List[Car]:
+        """
+        Registered cars matching a VIN that may be misheard or partial: a full
+        VIN with one confusable character wrong, or its last 6 to 16
+        characters. Every candidate is an index lookup, never a scan. Exact
+        matches come first, then VINs with a valid check digit.
+        """
+        fragment = normalize_vin(fragment)
+        if len(fragment) < 6 or len(fragment) > 17:
+            return []
+        candidates = list(dict.fromkeys(vin_variants(fragment)))
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self._model(Car).from_row
+            if len(fragment) == 17:
+                column, keys = "vin", candidates
+            else:
+                # Any single mistake is either in the serial or before it
+                column, keys = "serial", list(dict.fromkeys(vin_variants(fragment[-6:])))
+            placeholders = ",".join("?" * len(keys))
+            cursor.execute(f"SELECT {Car.COLUMNS} FROM cars WHERE {column} IN ({placeholders})", keys)
+            cars = cursor.fetchall()
+
+        rank = {candidate: i for i, candidate in enumerate(candidates)}
+        matches = [car for car in cars if car.vin[-len(fragment):] in rank]
+        matches.sort(key=lambda car: (
+            car.vin[-len(fragment):] != fragment,
+            not has_valid_check_digit(car.vin),
+            rank[car.vin[-len(fragment):]],
+        ))
+        return matches[:limit]
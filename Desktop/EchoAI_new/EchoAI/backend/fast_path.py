@@ -0,0 +1,94 @@
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger("fast-path")
+logger.setLevel(logging.INFO)
+
+# Keywords that name an app outright, per task type. A fast-path switch only
+# fires when these are the only keywords heard, so "launch maps and show
+# directions home" still goes to the model.
+APP_NAME_KEYWORDS = {
+    "calendar": {"calendar"},
+    "messages": {"message"},
+    "maps": {"map"},
+    "settings": {"settings"},
+    "metrics": {"metrics"},
+    "transactions": {"transaction"},
+}
+
+SWITCH_ACTIONS = {"open", "switch", "go to", "launch"}
+LIST_ACTIONS = {"show", "display"}
+CALENDAR_LIST_KEYWORDS = {"event", "schedule", "appointment", "meeting"}
+
+
+def plan_fast_path(intent: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Map a high-confidence, unambiguous intent to a deterministic AssistantFnc
+    tool as (tool_name, kwargs), or None when the model should handle it.
+    """
+    if intent.get("confidence") != "high" or len(intent.get("matches", [])) != 1:
+        return None
+
+    task_type = intent["task_type"]
+    keywords = set(intent["matches"][0]["keywords"])
+    actions = set(intent.get("actions", []))
+
+    # "show my calendar events", "display my schedule"
+    if (task_type == "calendar" and actions & LIST_ACTIONS and keywords & CALENDAR_LIST_KEYWORDS
+            and keywords <= CALENDAR_LIST_KEYWORDS | APP_NAME_KEYWORDS["calendar"]):
+        return "list_calendar_events", {}
+    # "open calendar", "go to settings"
+    if actions & (SWITCH_ACTIONS | LIST_ACTIONS) and keywords <= APP_NAME_KEYWORDS.get(task_type, set()):
+        return "switch_app", {"app_name": task_type}
+    return None
+
+
+class LatencyTracker:
+    """
+    Per-path turn latency: from the moment a user turn is handled until the
+    agent starts speaking. Keeps a window of recent samples per path, along
+    with the estimated conversation size each turn was answered with.
+    """
+
+    def __init__(self, window: int = 200, report_every: int = 20):
+        self._samples: Dict[str, deque] = {}
+        self._prompt_chars: Dict[str, int] = {}
+        self._context_tokens: Dict[str, deque] = {}
+        self._turns = 0
+        self._window = window
+        self._report_every = report_every
+        self._open: Optional[Tuple[str, float, int]] = None
+
+    def start_turn(self, path: str, started: float, prompt_chars: int = 0, context_tokens: int = 0):
+        self._open = (path, started, context_tokens)
+        self._prompt_chars[path] = self._prompt_chars.get(path, 0) + prompt_chars
+
+    def finish_turn(self):
+        if self._open is None:
+            return
+        path, started, context_tokens = self._open
+        self._open = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._samples.setdefault(path, deque(maxlen=self._window)).append(elapsed_ms)
+        self._context_tokens.setdefault(path, deque(maxlen=self._window)).append(context_tokens)
+        logger.info("turn latency - path: %s, %.0f ms, context: %d tokens", path, elapsed_ms, context_tokens)
+
+        self._turns += 1
+        if self._turns % self._report_every == 0:
+            for name, stats in self.summary().items():
+                logger.info("latency summary - path: %s, %s", name, stats)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for path, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[path] = {
+                "turns": len(ordered),
+                "p50_ms": ordered[len(ordered) // 2],
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "prompt_chars": self._prompt_chars.get(path, 0),
+                "max_context_tokens": max(self._context_tokens.get(path, [0])),
+            }
+        return result
@@ -0,0 +1,114 @@
+import re
+from typing import Dict, Any, List, Tuple
+
+# Keywords for different task types, in priority order for ties
+APP_KEYWORDS = {
+    "calendar": ["calendar", "schedule", "appointment", "meeting", "event"],
+    "messages": ["message", "text", "sms", "chat"],
+    "maps": ["map", "directions", "navigate", "location"],
+    "settings": ["settings", "configure", "preferences"],
+    "metrics": ["metrics", "statistics", "analysis", "data", "report"],
+    "transactions": ["transaction", "payment", "purchase", "buy", "send money"],
+}
+
+ACTION_KEYWORDS = ["open", "switch", "go to", "launch", "start", "run", "execute", "show", "display"]
+
+# Inflections accepted after a keyword, so "meetings" and "texting" still match
+SUFFIXES = ("", "s", "es", "d", "ed", "ing")
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Bonus added to every task score when the utterance also contains an action
+ACTION_BONUS = 0.5
+
+
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+class IntentEngine:
+    """
+    Keyword intent matcher compiled once into lookup tables of every keyword
+    and phrase plus their inflections. The utterance is tokenised with one
+    regex and each word costs a set lookup, so matching is linear in the
+    utterance, independent of the keyword count, and always on word
+    boundaries ("text" does not match "context").
+    """
+
+    def __init__(self, app_keywords: Dict[str, List[str]], action_keywords: List[str]):
+        self._order = {task_type: i for i, task_type in enumerate(app_keywords)}
+        # Entries are (canonical keyword, task types, is action)
+        self._words: Dict[str, Tuple[str, Tuple[str, ...], bool]] = {}
+        # Multi-word phrases indexed by their first word: [(remaining words, entry)]
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], Tuple[str, Tuple[str, ...], bool]]]] = {}
+
+        task_types: Dict[str, List[str]] = {}
+        for task_type, keywords in app_keywords.items():
+            for keyword in keywords:
+                task_types.setdefault(_normalize(keyword), []).append(task_type)
+        actions = {_normalize(keyword) for keyword in action_keywords}
+
+        for keyword in set(task_types) | actions:
+            words = keyword.split()
+            entry = (keyword, tuple(task_types.get(keyword, ())), keyword in actions)
+            for suffix in SUFFIXES:
+                if len(words) == 1:
+                    self._words[words[0] + suffix] = entry
+                else:
+                    rest = tuple(words[1:-1]) + (words[-1] + suffix,)
+                    self._phrases.setdefault(words[0], []).append((rest, entry))
+
+        self._vocabulary = frozenset(self._words) | frozenset(self._phrases)
+
+    def match(self, message: str) -> Dict[str, Any]:
+        hits: Dict[str, set] = {}
+        actions = set()
+
+        words = WORD_RE.findall(message.lower())
+        vocabulary = self._vocabulary
+        for i, word in enumerate(words):
+            # Most words are not keywords; reject them with one set lookup
+            if word not in vocabulary:
+                continue
+            found = []
+            entry = self._words.get(word)
+            if entry is not None:
+                found.append(entry)
+            for rest, phrase_entry in self._phrases.get(word, ()):
+                if tuple(words[i + 1:i + 1 + len(rest)]) == rest:
+                    found.append(phrase_entry)
+            for keyword, task_types, is_action in found:
+                if is_action:
+                    actions.add(keyword)
+                for task_type in task_types:
+                    hits.setdefault(task_type, set()).add(keyword)
+
+        action_match = bool(actions)
+        bonus = ACTION_BONUS if action_match else 0.0
+        matches = sorted(
+            (
+                {"task_type": task_type, "score": len(keywords) + bonus, "keywords": sorted(keywords)}
+                for task_type, keywords in hits.items()
+            ),
+            key=lambda m: (-m["score"], self._order[m["task_type"]])
+        )
+
+        is_task = bool(matches)
+        # If we have an action and an app match, it's likely a task
+        if action_match and is_task:
+            confidence = "high"
+        elif is_task:
+            confidence = "medium"
+        else:
+            confidence = "low"
+
+        return {
+            "is_task": is_task,
+            "task_type": matches[0]["task_type"] if matches else "unknown",
+            "confidence": confidence,
+            "matches": matches,
+            "actions": sorted(actions),
+        }
+
+
+INTENT_ENGINE = IntentEngine(APP_KEYWORDS, ACTION_KEYWORDS)
@@ -0,0 +1,182 @@
+import calendar
+import random
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Calendar times are naive local wall-clock times. Epochs are computed as if
+# they were UTC, exactly like SQLite's strftime('%s', ...) does for the
+# stored start_epoch/end_epoch columns, so both sides always agree.
+
+
+def normalize_slot(date: str, time: str) -> Tuple[str, str]:
+    """
+    Zero-padded YYYY-MM-DD and HH:MM. strptime accepts "9:00" but SQLite's
+    strftime does not, so anything stored must be in this form.
+    """
+    moment = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M")
+
+
+def to_epoch(date: str, time: str) -> int:
+    return calendar.timegm(datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M").timetuple())
+
+
+def from_epoch(epoch: int) -> Tuple[str, str]:
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M")
+
+
+def event_span(date: str, time: str, duration: int) -> Tuple[int, int]:
+    start = to_epoch(date, time)
+    return start, start + duration * 60
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "value", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: int, end: int, key: Any, value: Any):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.value = value
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+
+def _split(node: Optional[_Node], start: int, key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into nodes ordered before (start, key) and the rest"""
+    if node is None:
+        return None, None
+    if (node.start, node.key) < (start, key):
+        node.right, right = _split(node.right, start, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, start, key)
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class IntervalTree:
+    """
+    Half-open [start, end) intervals in a treap ordered by start, with each
+    node tracking the largest end in its subtree. add and remove are
+    O(log n) expected. An overlap query visits O(log n + k) nodes, because
+    subtrees that end before the window or start after it are skipped.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    @classmethod
+    def from_events(cls, events) -> "IntervalTree":
+        """Index CalendarEvent-like objects (date, time, duration) by their span"""
+        tree = cls()
+        for event in events:
+            start, end = event_span(event.date, event.time, event.duration)
+            tree.add(start, end, id(event), event)
+        return tree
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, start: int, end: int, key: Any, value: Any = None):
+        """Insert [start, end) under a key that is unique among equal starts"""
+        if end < start:
+            raise ValueError("interval ends before it starts")
+        left, right = _split(self._root, start, key)
+        self._root = _merge(_merge(left, _Node(start, end, key, value)), right)
+        self._size += 1
+
+    def remove(self, start: int, key: Any) -> bool:
+        left, rest = _split(self._root, start, key)
+        # Everything in rest sorts at or after (start, key); peel off the first node
+        node, parent = rest, None
+        while node is not None and node.left is not None:
+            parent, node = node, node.left
+        if node is None or (node.start, node.key) != (start, key):
+            self._root = _merge(left, rest)
+            return False
+        if parent is None:
+            rest = node.right
+        else:
+            parent.left = node.right
+            self._refresh_left_spine(rest)
+        self._root = _merge(left, rest)
+        self._size -= 1
+        return True
+
+    @staticmethod
+    def _refresh_left_spine(node: _Node):
+        spine = []
+        while node is not None:
+            spine.append(node)
+            node = node.left
+        for node in reversed(spine):
+            node.update()
+
+    def overlapping(self, start: int, end: int) -> List[Tuple[int, int, Any]]:
+        """Intervals that overlap [start, end), in start order, as (start, end, value)"""
+        found = []
+        stack = [(self._root, False)]
+        # Iterative in-order walk with pruning, so results come out sorted
+        while stack:
+            node, visited = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            if visited:
+                if node.end > start and node.start < end:
+                    found.append((node.start, node.end, node.value))
+                continue
+            if node.start < end:
+                stack.append((node.right, False))
+            stack.append((node, True))
+            stack.append((node.left, False))
+        return found
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Any]]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.value
+            node = node.right
+
+    def free_slots(self, start: int, end: int, length: int, limit: int = None) -> List[Tuple[int, int]]:
+        """Gaps of at least `length` within [start, end), earliest first"""
+        slots = []
+        cursor = start
+        for busy_start, busy_end, _ in self.overlapping(start, end):
+            if busy_start - cursor >= length:
+                slots.append((cursor, busy_start))
+                if limit is not None and len(slots) == limit:
+                    return slots
+            cursor = max(cursor, busy_end)
+        if end - cursor >= length:
+            slots.append((cursor, end))
+        return slots[:limit] if limit is not None else slots
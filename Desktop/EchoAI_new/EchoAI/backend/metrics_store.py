@@ -0,0 +1,364 @@
+import math
+import random
+import numpy as np
+from typing import Dict, Any, List, Sequence, Tuple
+
+SECONDS_PER_DAY = 86400.0
+
+# Bucket sizes accepted by MetricSeries.resample
+BUCKETS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+}
+
+
+def parse_timestamp(timestamp: str) -> np.datetime64:
+    """Parse "YYYY-MM-DD HH:MM" (or any ISO 8601 variant) to second precision"""
+    try:
+        return np.datetime64(timestamp.strip(), "s")
+    except ValueError:
+        raise ValueError(f"invalid timestamp: {timestamp!r}, expected YYYY-MM-DD HH:MM")
+
+
+class KLLSketch:
+    """
+    Mergeable KLL quantile sketch. Keeps O(k) items whatever the stream
+    length; rank error is roughly 1.7/k. Level h holds items of weight 2**h.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2.0 / 3.0, seed: int = None):
+        self.k = k
+        self.c = c
+        self.count = 0
+        self._levels: List[List[float]] = [[]]
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self._levels) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def _compact(self, level: List[float]) -> List[float]:
+        # Sort, keep one item if the level is odd, promote every other item
+        level.sort()
+        keep = level[:len(level) % 2]
+        promoted = level[len(keep) + self._random.randint(0, 1)::2]
+        level[:] = keep
+        return promoted
+
+    def _compress(self):
+        while self._size >= self._max_size():
+            for h in range(len(self._levels)):
+                if len(self._levels[h]) >= self._capacity(h):
+                    if h + 1 == len(self._levels):
+                        self._levels.append([])
+                    self._levels[h + 1].extend(self._compact(self._levels[h]))
+                    self._size = sum(len(level) for level in self._levels)
+                    if self._size < self._max_size():
+                        break
+
+    def update(self, value: float):
+        self._levels[0].append(float(value))
+        self._size += 1
+        self.count += 1
+        if self._size >= self._max_size():
+            self._compress()
+
+    def update_many(self, values: Sequence[float]):
+        values = [float(v) for v in values]
+        self._levels[0].extend(values)
+        self._size += len(values)
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for h, level in enumerate(other._levels):
+            self._levels[h].extend(level)
+        self._size = sum(len(level) for level in self._levels)
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Approximate values at quantiles qs, each in [0, 1]"""
+        weighted = sorted(
+            (item, 1 << h) for h, level in enumerate(self._levels) for item in level
+        )
+        if not weighted:
+            return [math.nan for _ in qs]
+
+        items = [item for item, _ in weighted]
+        cumulative = np.cumsum([weight for _, weight in weighted])
+        total = cumulative[-1]
+        result = []
+        for q in qs:
+            index = int(np.searchsorted(cumulative, q * total, side="left"))
+            result.append(items[min(index, len(items) - 1)])
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "c": self.c, "count": self.count, "levels": [list(level) for level in self._levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data["k"], c=data["c"])
+        sketch.count = data["count"]
+        sketch._levels = [list(level) for level in data["levels"]] or [[]]
+        sketch._size = sum(len(level) for level in sketch._levels)
+        return sketch
+
+
+class RunningStats:
+    """
+    O(1) streaming statistics for one metric: count, min/max, Welford mean
+    and variance, a value/time co-moment for the trend slope, and a KLL
+    sketch for percentiles. Instances merge exactly (except the sketch,
+    which merges approximately) and round-trip through to_dict/from_dict,
+    so they can be persisted and combined across sessions and workers.
+    """
+
+    def __init__(self, k: int = 200):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # Time is tracked in epoch seconds for the least-squares trend
+        self.t_mean = 0.0
+        self.t_m2 = 0.0
+        self.comoment = 0.0
+        self.sketch = KLLSketch(k)
+
+    def add(self, value: float, timestamp: np.datetime64):
+        t = float(timestamp.astype("datetime64[s]").astype(np.int64))
+        self.count += 1
+        dv = value - self.mean
+        self.mean += dv / self.count
+        self.m2 += dv * (value - self.mean)
+        dt = t - self.t_mean
+        self.t_mean += dt / self.count
+        self.t_m2 += dt * (t - self.t_mean)
+        self.comoment += dt * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.update(value)
+
+    def add_many(self, values: np.ndarray, timestamps: np.ndarray):
+        """Fold a batch in with one vectorised pass and an exact merge"""
+        if not len(values):
+            return
+        batch = RunningStats(self.sketch.k)
+        t = timestamps.astype("datetime64[s]").astype(np.int64).astype(np.float64)
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.dot(values - batch.mean, values - batch.mean))
+        batch.t_mean = float(t.mean())
+        batch.t_m2 = float(np.dot(t - batch.t_mean, t - batch.t_mean))
+        batch.comoment = float(np.dot(t - batch.t_mean, values - batch.mean))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.sketch.update_many(values)
+        self.merge(batch)
+
+    def merge(self, other: "RunningStats"):
+        if not other.count:
+            return
+        n = self.count + other.count
+        dv = other.mean - self.mean
+        dt = other.t_mean - self.t_mean
+        weight = self.count * other.count / n
+        self.m2 += other.m2 + dv * dv * weight
+        self.t_m2 += other.t_m2 + dt * dt * weight
+        self.comoment += other.comoment + dt * dv * weight
+        self.mean += dv * other.count / n
+        self.t_mean += dt * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    def trend_slope(self) -> float:
+        """Least-squares slope of value over time, in units per day"""
+        if self.count < 2 or self.t_m2 == 0:
+            return 0.0
+        return self.comoment / self.t_m2 * SECONDS_PER_DAY
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        points = self.sketch.quantiles([p / 100 for p in percentiles])
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "stddev": math.sqrt(self.variance()),
+            "percentiles": dict(zip(percentiles, points)),
+            "trend_per_day": self.trend_slope(),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "t_mean": self.t_mean,
+            "t_m2": self.t_m2,
+            "comoment": self.comoment,
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.min = math.inf if data["min"] is None else data["min"]
+        stats.max = -math.inf if data["max"] is None else data["max"]
+        stats.t_mean = data["t_mean"]
+        stats.t_m2 = data["t_m2"]
+        stats.comoment = data["comoment"]
+        stats.sketch = KLLSketch.from_dict(data["sketch"])
+        return stats
+
+
+class MetricSeries:
+    """
+    Columnar storage for one metric: a growable float64 array of values and
+    a datetime64 array of timestamps. Appends are amortised O(1) and every
+    analysis runs vectorised over array views. `stats` is kept up to date on
+    every append so headline numbers never need a rescan.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._timestamps = np.empty(capacity, dtype="datetime64[s]")
+        self._size = 0
+        self.stats = RunningStats()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._size]
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._values):
+            return
+        capacity = max(needed, 2 * len(self._values))
+        values = np.empty(capacity, dtype=np.float64)
+        timestamps = np.empty(capacity, dtype="datetime64[s]")
+        values[:self._size] = self.values
+        timestamps[:self._size] = self.timestamps
+        self._values, self._timestamps = values, timestamps
+
+    def append(self, value: float, timestamp: str):
+        ts = parse_timestamp(timestamp)
+        self._reserve(1)
+        self._values[self._size] = value
+        self._timestamps[self._size] = ts
+        self._size += 1
+        self.stats.add(float(value), ts)
+
+    def extend(self, values: Sequence[float], timestamps: Sequence):
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+        if values.shape != timestamps.shape:
+            raise ValueError("values and timestamps must have the same length")
+        self._reserve(len(values))
+        self._values[self._size:self._size + len(values)] = values
+        self._timestamps[self._size:self._size + len(values)] = timestamps
+        self._size += len(values)
+        self.stats.add_many(values, timestamps)
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        """Exact statistics from a full pass; `stats.summary()` is the O(1) version"""
+        values = self.values
+        if not len(values):
+            return {"count": 0}
+        points = np.percentile(values, percentiles)
+        return {
+            "count": len(values),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "stddev": float(values.std()),
+            "percentiles": {p: float(v) for p, v in zip(percentiles, points)},
+            "trend_per_day": self.trend_slope(),
+        }
+
+    def _time_order(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Points can be added out of order, so sort by time before windowing
+        order = np.argsort(self.timestamps, kind="stable")
+        return self.timestamps[order], self.values[order]
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """Mean of each `window` consecutive points in time order"""
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        _, values = self._time_order()
+        if len(values) < window:
+            return np.empty(0, dtype=np.float64)
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        return (sums[window:] - sums[:-window]) / window
+
+    def resample(self, bucket: str = "1h", how: str = "mean") -> Tuple[np.ndarray, np.ndarray]:
+        """Aggregate into fixed time buckets; returns (bucket_starts, aggregated_values)"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"unknown bucket {bucket!r}, expected one of {', '.join(BUCKETS)}")
+        if how not in ("mean", "sum", "min", "max", "count"):
+            raise ValueError(f"unknown aggregation {how!r}")
+
+        timestamps, values = self._time_order()
+        if not len(values):
+            return np.empty(0, dtype="datetime64[s]"), np.empty(0, dtype=np.float64)
+
+        width = BUCKETS[bucket]
+        keys = timestamps.astype(np.int64) // width
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        counts = np.diff(np.append(starts, len(values)))
+
+        if how == "count":
+            result = counts.astype(np.float64)
+        elif how == "min":
+            result = np.minimum.reduceat(values, starts)
+        elif how == "max":
+            result = np.maximum.reduceat(values, starts)
+        else:
+            result = np.add.reduceat(values, starts)
+            if how == "mean":
+                result = result / counts
+
+        return (keys[starts] * width).astype("datetime64[s]"), result
+
+    def trend_slope(self) -> float:
+        """Least-squares slope of value over time, in units per day"""
+        if self._size < 2:
+            return 0.0
+        t = self.timestamps.astype(np.int64).astype(np.float64)
+        t -= t.mean()
+        denom = np.dot(t, t)
+        if denom == 0:
+            return 0.0
+        v = self.values
+        return float(np.dot(t, v - v.mean()) / denom * SECONDS_PER_DAY)
@@ -0,0 +1,51 @@
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from context_budget import estimate_tokens
+from prompts import TASK_GUIDANCE, TASK_REFERENCE_MESSAGE
+
+logger = logging.getLogger("prompt-delta")
+logger.setLevel(logging.INFO)
+
+
+class PromptDelta:
+    """
+    Per-session record of the task guidance the model has already been
+    given. The first task of each type sends that type's guidance; every
+    task turn costs a one-line reference, since the task steps are part of
+    INSTRUCTIONS.
+
+    Also keeps a running token estimate of what was sent, for the session
+    log. benchmarks/prompt_delta.py compares it with the old per-turn prompt.
+    """
+
+    def __init__(self):
+        self._sent: Set[str] = set()
+        self.task_turns = 0
+        self.sent_tokens = 0
+
+    def task_prompt(self, task_type: str) -> Tuple[Optional[str], str]:
+        """This type's guidance if the session does not have it yet, and this turn's reference"""
+        guidance = None
+        if task_type not in self._sent:
+            self._sent.add(task_type)
+            guidance = TASK_GUIDANCE.get(task_type)
+        reference = TASK_REFERENCE_MESSAGE(task_type)
+
+        self.task_turns += 1
+        self.sent_tokens += estimate_tokens(reference) + (estimate_tokens(guidance) if guidance else 0)
+        return guidance, reference
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "task_turns": self.task_turns,
+            "task_types": len(self._sent),
+            "sent_tokens": self.sent_tokens,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            "task prompts - turns: %d, types: %d, tokens sent: %d",
+            stats["task_turns"], stats["task_types"], stats["sent_tokens"]
+        )
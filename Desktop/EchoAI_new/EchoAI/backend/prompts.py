@@ -44,9 +44,12 @@ INSTRUCTIONS = """
     ask for confirmation before proceeding with sensitive actions, and provide clear feedback on the results.
     
     When executing tasks:
-    1. Break down complex tasks into steps
-    2. Explain what you're doing at each step
-    3. Ask for confirmation before proceeding with sensitive operations
+    1. Clarify what the user wants, then break complex tasks into steps
+    2. For each step, explain what you're going to do, call the appropriate function and report the result
+    3. For critical operations (like transactions):
+       a. Present the details to the user
+       b. Ask for explicit confirmation before proceeding
+       c. Use the approval functions to complete or cancel the operation
     4. Provide clear feedback on success or failure
 """
 
@@ -70,21 +73,27 @@ LOOKUP_VIN_MESSAGE = lambda msg: f"""If the user has provided a VIN attempt to l
                                     create the entry in the database using your tools. If the user doesn't have a vin, ask them for the
                                     details required to create a new car. Here is the users message: {msg}"""
 
-TASK_EXECUTION_PROMPT = lambda task_type, message: f"""
-    The user has requested to perform a task related to {task_type}. Their message is: "{message}"
-    
-    Follow these steps to help the user:
-    
-    1. Clarify the user's intent - make sure you understand exactly what they want to do
-    2. Break down the task into steps and explain the process
-    3. For each step:
-       a. Explain what you're going to do
-       b. Execute the appropriate function
-       c. Provide feedback on the result
-    4. For critical operations (like transactions):
-       a. Present the details to the user
-       b. Ask for explicit confirmation before proceeding
-       c. Use the approval functions to complete or cancel the operation
-    
-    Keep the user informed throughout the process, and make sure they understand what's happening.
-"""
\ No newline at end of file
+FAST_PATH_RESULT_MESSAGE = lambda message, result: f"""
+    The user's request "{message}" has already been carried out. The result was: {result}
+    Tell the user the outcome in one short, natural sentence. Do not call any tools.
+"""
+
+# Per-type task guidance, sent once per session with the first task of each
+# type (see prompt_delta.py). The task steps that used to be sent with
+# every task turn are in INSTRUCTIONS, which the session already has.
+# Everything but the one-line reference is rendered at import.
+TASK_TYPE_NOTES = {
+    "calendar": "mention any conflicts the calendar tools report and offer the suggested free slots.",
+    "messages": "read the message back before sending it.",
+    "maps": "confirm the destination before starting navigation.",
+    "settings": "say which setting will change and to what before changing it.",
+    "metrics": "summarize the analysis in a sentence or two instead of reading out every number.",
+    "transactions": "repeat the amount and recipient, then approve or reject the pending task as the user says.",
+}
+
+TASK_GUIDANCE = {
+    task_type: f"For {task_type} tasks: {note}"
+    for task_type, note in TASK_TYPE_NOTES.items()
+}
+
+TASK_REFERENCE_MESSAGE = lambda task_type: f"Next message: a {task_type} task. Follow your task steps."
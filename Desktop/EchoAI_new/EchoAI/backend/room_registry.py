@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Set
+
+from livekit.api import LiveKitAPI, ListRoomsRequest
+
+logger = logging.getLogger("room-registry")
+logger.setLevel(logging.INFO)
+
+
+class RoomRegistry:
+    """
+    Locally cached view of the rooms on the LiveKit server.
+
+    Room names are allocated from 128-bit random ids checked against the
+    cache, so handing out a name never touches the network. The cache is
+    kept fresh by room_started/room_finished webhook events and by a
+    background refresh every `ttl` seconds, using one long-lived API client
+    on the registry's own event loop thread.
+    """
+
+    def __init__(self, api_factory: Callable[[], LiveKitAPI] = LiveKitAPI, ttl: float = 30.0,
+                 prefix: str = "room-", pending_ttl: float = 600.0):
+        self._api_factory = api_factory
+        self._api = None
+        self.ttl = ttl
+        self.prefix = prefix
+        self.pending_ttl = pending_ttl
+        self._rooms: Set[str] = set()
+        # Names handed out but not yet seen on the server -> allocation time
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._task = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="room-registry", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._refresh_forever())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _refresh_forever(self):
+        self._api = self._api_factory()
+        try:
+            while True:
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("room refresh failed, keeping cached rooms")
+                await asyncio.sleep(self.ttl)
+        finally:
+            await self._api.aclose()
+
+    def stop(self):
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join()
+        self._thread = None
+
+    async def refresh(self):
+        """Replace the cache with the server's room list"""
+        rooms = await self._api.room.list_rooms(ListRoomsRequest())
+        names = {room.name for room in rooms.rooms}
+        now = time.monotonic()
+        with self._lock:
+            self._rooms = names
+            self._pending = {
+                name: at for name, at in self._pending.items()
+                if name not in names and now - at < self.pending_ttl
+            }
+
+    def rooms(self) -> Set[str]:
+        with self._lock:
+            return self._rooms | set(self._pending)
+
+    def allocate_name(self) -> str:
+        with self._lock:
+            while True:
+                name = self.prefix + uuid.uuid4().hex
+                if name not in self._rooms and name not in self._pending:
+                    self._pending[name] = time.monotonic()
+                    return name
+
+    # Webhook events
+    def room_started(self, name: str):
+        with self._lock:
+            self._rooms.add(name)
+            self._pending.pop(name, None)
+
+    def room_finished(self, name: str):
+        with self._lock:
+            self._rooms.discard(name)
+            self._pending.pop(name, None)
@@ -1,46 +1,168 @@
 import os
+import json
+from urllib.parse import parse_qs
+from google.protobuf.json_format import ParseError
 from livekit import api
-from flask import Flask, request
 from dotenv import load_dotenv
-from flask_cors import CORS
-from livekit.api import LiveKitAPI, ListRoomsRequest
-import uuid
+from room_registry import RoomRegistry
+from token_cache import TokenIssuer
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+# Most participants one /getTokens request may ask for
+MAX_BATCH = 100
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"*"),
+]
+
+# Credentials are read once, on the first token request, so missing ones
+# fail that request rather than the import. Tokens are cached per
+# (identity, room), which only hits for callers that pass a fixed room.
+issuer = None
+
+# Cached room list kept fresh in the background; allocating a name is local
+registry = RoomRegistry()
+
+webhook_receiver = api.WebhookReceiver(api.TokenVerifier())
 
 async def generate_room_name():
-    name = "room-" + str(uuid.uuid4())[:8]
-    rooms = await get_rooms()
-    while name in rooms:
-        name = "room-" + str(uuid.uuid4())[:8]
-    return name
+    return registry.allocate_name()
 
 async def get_rooms():
-    api = LiveKitAPI()
-    rooms = await api.room.list_rooms(ListRoomsRequest())
-    await api.aclose()
-    return [room.name for room in rooms.rooms]
-
-@app.route("/getToken")
-async def get_token():
-    name = request.args.get("name", "my name")
-    room = request.args.get("room", None)
-    
+    return list(registry.rooms())
+
+async def get_issuer(send):
+    """The token issuer, or None after answering 500 when credentials are missing"""
+    global issuer
+    if issuer is None:
+        try:
+            issuer = TokenIssuer(os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET"))
+        except ValueError as e:
+            await respond(send, 500, str(e))
+            return None
+    return issuer
+
+async def read_body(receive) -> bytes:
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+async def respond(send, status: int, body, content_type: bytes = b"text/plain; charset=utf-8"):
+    if not isinstance(body, bytes):
+        body = body.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())] + CORS_HEADERS,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def get_token(scope, receive, send):
+    params = parse_qs(scope["query_string"].decode())
+    name = params.get("name", ["my name"])[0]
+    room = params.get("room", [None])[0]
+
+    token_issuer = await get_issuer(send)
+    if token_issuer is None:
+        return
+
     if not room:
         room = await generate_room_name()
-        
-    token = api.AccessToken(os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET")) \
-        .with_identity(name)\
-        .with_name(name)\
-        .with_grants(api.VideoGrants(
-            room_join=True,
-            room=room
-        ))
-    
-    return token.to_jwt()
+
+    await respond(send, 200, token_issuer.issue(name, room))
+
+async def get_tokens(scope, receive, send):
+    """Batch issuance: {"room": optional, "names": [...]} -> {"room": ..., "tokens": {name: jwt}}"""
+    try:
+        payload = json.loads(await read_body(receive) or b"{}")
+        names = payload["names"]
+    except (ValueError, KeyError, TypeError):
+        await respond(send, 400, "expected a JSON body with a list of names")
+        return
+
+    if not isinstance(names, list) or not names or len(names) > MAX_BATCH:
+        await respond(send, 400, f"names must be a list of 1 to {MAX_BATCH} participants")
+        return
+
+    token_issuer = await get_issuer(send)
+    if token_issuer is None:
+        return
+
+    room = payload.get("room") or await generate_room_name()
+    tokens = token_issuer.issue_batch([str(name) for name in names], room)
+    await respond(send, 200, json.dumps({"room": room, "tokens": tokens}), b"application/json")
+
+async def livekit_webhook(scope, receive, send):
+    headers = dict(scope["headers"])
+    auth_token = headers.get(b"authorization", b"").decode()
+    if not auth_token:
+        await respond(send, 401, "missing authorization")
+        return
+    try:
+        body = (await read_body(receive)).decode()
+    except UnicodeDecodeError:
+        await respond(send, 400, "webhook body must be UTF-8 JSON")
+        return
+
+    try:
+        event = webhook_receiver.receive(body, auth_token)
+    except ParseError:
+        # The signature matched, so the body is ours to reject
+        await respond(send, 400, "malformed webhook body")
+        return
+    except Exception:
+        # livekit-api raises plain exceptions for bad tokens and hash mismatches
+        await respond(send, 401, "invalid webhook signature")
+        return
+
+    if event.event == "room_started":
+        registry.room_started(event.room.name)
+    elif event.event == "room_finished":
+        registry.room_finished(event.room.name)
+
+    await respond(send, 200, "ok")
+
+ROUTES = {
+    ("GET", "/getToken"): get_token,
+    ("POST", "/getTokens"): get_tokens,
+    ("POST", "/livekit/webhook"): livekit_webhook,
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            registry.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            registry.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["method"] == "OPTIONS":
+        await respond(send, 204, b"")
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await respond(send, 404, "not found")
+        return
+    await handler(scope, receive, send)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run("server:app", host="0.0.0.0", port=5001)
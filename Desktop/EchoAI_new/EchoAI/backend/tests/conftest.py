@@ -0,0 +1,24 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# The database shipped with the repo, before any migration
+BASELINE_DB = os.path.join(BACKEND, "smartphone_assistant.sqlite")
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """A copy of the committed database, at user_version 0"""
+    path = str(tmp_path / "baseline.sqlite")
+    shutil.copyfile(BASELINE_DB, path)
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "test.sqlite")
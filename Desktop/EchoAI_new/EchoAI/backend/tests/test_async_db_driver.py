@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import aclosing
+
+from async_db_driver import AsyncDatabaseDriver
+from db_driver import DatabaseDriver
+
+STREAMS = 2
+# More than one stream batch, so a paused stream still holds its connection
+PENDING = 1500
+
+
+def _seed(db_path) -> int:
+    driver = DatabaseDriver(db_path)
+    user = driver.create_user("stream", "ios")
+    driver.write_batch(transactions=[
+        {"type": "payment", "amount": 1.0, "description": "tea", "user_id": user.user_id}
+        for _ in range(PENDING)
+    ])
+    driver.close()
+    return user.user_id
+
+
+def test_abandoned_streams_do_not_block_writer(db_path):
+    user_id = _seed(db_path)
+
+    async def main():
+        db = AsyncDatabaseDriver(db_path, readers=1, streams=STREAMS)
+        streams = [db.iter_pending_tasks(user_id) for _ in range(STREAMS)]
+        for stream in streams:
+            await anext(stream)
+
+        # Readers and the writer still have their own connections
+        await asyncio.wait_for(db.create_transaction("payment", 2.0, "coffee", user_id), timeout=5)
+        assert await asyncio.wait_for(db.get_pending_task(1), timeout=5) is not None
+
+        # A further stream waits for a slot instead of taking one of theirs
+        extra = db.iter_pending_tasks(user_id)
+        waiting = asyncio.ensure_future(anext(extra))
+        await asyncio.sleep(0.1)
+        assert not waiting.done()
+        await streams[0].aclose()
+        assert (await asyncio.wait_for(waiting, timeout=5)).feedback_id == 1
+
+        async with aclosing(extra):
+            pass
+        await streams[1].aclose()
+        await db.aclose()
+
+    asyncio.run(main())
+
+
+def test_stream_closed_after_driver_shutdown(db_path):
+    user_id = _seed(db_path)
+
+    async def main():
+        db = AsyncDatabaseDriver(db_path, readers=1)
+        stream = db.iter_pending_tasks(user_id)
+        await anext(stream)
+        await db.aclose()
+        # Used to raise "cannot schedule new futures after shutdown"
+        await stream.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+from livekit.agents import llm
+
+from context_budget import GUIDANCE, INSTRUCTION, SUMMARY, TURN, ContextBudget, estimate_tokens
+
+
+class FakeItems:
+    """conversation.item of a realtime session, recording what it was asked to do"""
+
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+        self.fail_deletes = False
+        self._ids = itertools.count(1)
+
+    def create(self, message, previous_item_id=None):
+        message.id = f"item_{next(self._ids)}"
+        self.created.append((message, previous_item_id))
+
+    def delete(self, item_id):
+        if self.fail_deletes:
+            raise RuntimeError("unknown item")
+        self.deleted.append(item_id)
+
+
+class FakeConversation:
+    def __init__(self):
+        self.item = FakeItems()
+
+
+def _said(role, text, item_id):
+    message = llm.ChatMessage(role=role, content=text)
+    message.id = item_id
+    return message
+
+
+def _budget(**kwargs):
+    conversation = FakeConversation()
+    return ContextBudget(conversation, **kwargs), conversation.item
+
+
+def _speak(context, turn, words=40):
+    context.new_turn()
+    context.track(_said("user", f"question {turn} " + "word " * words, f"user_{turn}"), TURN)
+    context.track(_said("assistant", f"answer {turn} " + "word " * words, f"assistant_{turn}"), TURN)
+
+
+def test_track_counts_each_item_once():
+    context, _ = _budget()
+    message = _said("user", "hello there", "user_1")
+    context.track(message)
+    context.track(message)
+    # Items without an id cannot be deleted later, so they are not counted
+    context.track(llm.ChatMessage(role="user", content="no id"))
+
+    assert context.tokens == estimate_tokens("hello there")
+
+
+def test_instructions_last_one_turn_guidance_stays():
+    context, items = _budget()
+    context.new_turn()
+    context.add(llm.ChatMessage(role="system", content="do this now"), INSTRUCTION)
+    context.add(llm.ChatMessage(role="system", content="always do this"), GUIDANCE)
+    instruction_id = items.created[0][0].id
+
+    stats = context.new_turn()
+    assert stats["evicted"] == 1
+    assert items.deleted == [instruction_id]
+    assert context.tokens == estimate_tokens("always do this")
+
+
+def test_under_budget_nothing_collapses():
+    context, items = _budget(budget_tokens=10_000, keep_turns=2)
+    for turn in range(1, 6):
+        _speak(context, turn)
+
+    assert context.new_turn()["collapsed"] == 0
+    assert items.deleted == [] and items.created == []
+
+
+def test_collapse_keeps_last_turns_verbatim():
+    context, items = _budget(budget_tokens=10_000, keep_turns=2, line_chars=30)
+    for turn in range(1, 5):
+        _speak(context, turn)
+
+    context.budget_tokens = 150
+    stats = context.new_turn()  # turn 5: turns 3 and 4 are kept
+    assert stats["collapsed"] == 4
+    assert items.deleted == ["user_1", "assistant_1", "user_2", "assistant_2"]
+    summary, previous_item_id = items.created[-1]
+    assert previous_item_id == "root"
+    lines = summary.content.splitlines()[1:]
+    assert lines[0] == "user: question 1 word word word w..."
+    assert len(lines) == 4 and all(len(line) <= len("assistant: ") + 30 for line in lines)
+    kinds = [item.kind for item in context._items.values()]
+    assert kinds == [TURN] * 4 + [SUMMARY]
+
+    # The next collapse replaces the summary instead of adding another
+    _speak(context, 5)
+    context.new_turn()
+    assert summary.id in items.deleted
+    assert [item.kind for item in context._items.values()].count(SUMMARY) == 1
+
+
+def test_summary_drops_oldest_lines_when_full():
+    context, items = _budget(budget_tokens=10_000, keep_turns=1, summary_tokens=40, line_chars=60)
+    for turn in range(1, 8):
+        _speak(context, turn)
+    context.budget_tokens = 100
+    context.new_turn()
+
+    summary = items.created[-1][0].content
+    assert "question 6" in summary
+    assert "question 1" not in summary
+    assert estimate_tokens("\n".join(summary.splitlines()[1:])) <= 40
+
+
+def test_failed_delete_still_frees_budget():
+    context, items = _budget()
+    context.new_turn()
+    context.add(llm.ChatMessage(role="system", content="do this now"), INSTRUCTION)
+    items.fail_deletes = True
+
+    context.new_turn()
+    assert context.tokens == 0
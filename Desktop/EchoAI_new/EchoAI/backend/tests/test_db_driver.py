@@ -0,0 +1,171 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import check_query_plans
+import db_driver
+from db_driver import DatabaseDriver
+
+APPROVERS = 4
+
+
+class BatchDriver(DatabaseDriver):
+    """DatabaseDriver with extra write methods for run_batch to call"""
+
+    def add_event_then_fail(self, user_id: int):
+        self.add_calendar_event("doomed", "2024-01-01", "10:00", 30, user_id)
+        raise ValueError("rejected after writing")
+
+    def add_event_and_read_elsewhere(self, user_id: int):
+        event = self.add_calendar_event("standup", "2024-01-01", "09:00", 15, user_id)
+        # Another thread reads while the batch is still open; it must not
+        # leave the pre-batch rows cached once the batch commits
+        reader = threading.Thread(target=self.get_calendar_events_for_user, args=(user_id,))
+        reader.start()
+        reader.join()
+        return event
+
+
+def test_get_or_create_user_creates_once(db_path):
+    driver = DatabaseDriver(db_path, pooled=True, pool_size=APPROVERS)
+    barrier = threading.Barrier(APPROVERS)
+    results = []
+
+    def lookup():
+        barrier.wait()
+        results.append(driver.get_or_create_user("caller", "voice").user_id)
+
+    threads = [threading.Thread(target=lookup) for _ in range(APPROVERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == APPROVERS
+    assert len(set(results)) == 1
+    outcomes = driver.run_batch([("get_or_create_user", ("caller", "voice"), {})])
+    assert outcomes[0][1].user_id == results[0]
+    driver.close()
+
+
+def test_unpadded_time_conflicts(db_path):
+    driver = DatabaseDriver(db_path)
+    user = driver.create_user("padding", "ios")
+    event = driver.add_calendar_event("dentist", "2024-1-5", "9:00", 60, user.user_id)
+
+    assert (event.date, event.time) == ("2024-01-05", "09:00")
+    conflicts = driver.get_calendar_conflicts(user.user_id, "2024-01-05", "09:30", 30)
+    assert [conflict.title for conflict in conflicts] == ["dentist"]
+    assert driver.find_free_slots(user.user_id, "2024-01-05", 60, limit=1) == [("10:00", "18:00")]
+
+
+def test_resolve_task_has_one_winner(db_path):
+    driver = DatabaseDriver(db_path)
+    user = driver.create_user("race", "android")
+    driver.add_calendar_event("standup", "2024-01-01", "09:00", 15, user.user_id)
+    feedback_id = driver.get_pending_tasks(user.user_id)["calendar"][0]["feedback_id"]
+
+    barrier = threading.Barrier(APPROVERS)
+    results = []
+
+    def approve():
+        barrier.wait()
+        results.append(driver.resolve_task(feedback_id, "approved", user_id=user.user_id))
+
+    threads = [threading.Thread(target=approve) for _ in range(APPROVERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [task for task in results if task is not None]
+    assert len(results) == APPROVERS
+    assert len(winners) == 1
+    assert winners[0].status == "approved"
+    assert driver.get_pending_task(feedback_id) is None
+    # A second resolution, or one by another user, changes nothing
+    assert driver.resolve_task(feedback_id, "rejected", user_id=user.user_id) is None
+
+
+def test_resolve_task_checks_owner(db_path):
+    driver = DatabaseDriver(db_path)
+    owner = driver.create_user("owner", "ios")
+    other = driver.create_user("other", "ios")
+    driver.create_transaction("payment", 5.0, "coffee", owner.user_id)
+    feedback_id = driver.get_pending_tasks(owner.user_id)["transaction"][0]["feedback_id"]
+
+    assert driver.resolve_task(feedback_id, "approved", user_id=other.user_id) is None
+    assert driver.resolve_task(feedback_id, "approved", user_id=owner.user_id).status == "approved"
+
+
+def test_run_batch_rolls_back_failed_call_alone(db_path):
+    driver = BatchDriver(db_path)
+    user = driver.create_user("batch", "android")
+
+    outcomes = driver.run_batch([
+        ("add_calendar_event", ("kept", "2024-01-01", "09:00", 15, user.user_id), {}),
+        ("add_event_then_fail", (user.user_id,), {}),
+        ("create_transaction", ("payment", 3.0, "tea", user.user_id), {}),
+    ])
+
+    assert [ok for ok, _ in outcomes] == [True, False, True]
+    assert isinstance(outcomes[1][1], ValueError)
+    assert [event.title for event in driver.get_calendar_events_for_user(user.user_id)] == ["kept"]
+    pending = driver.get_pending_tasks(user.user_id)
+    # The failed call's task_feedback row went with its event
+    assert [task["title"] for task in pending["calendar"]] == ["kept"]
+    assert [task["description"] for task in pending["transaction"]] == ["tea"]
+
+
+def test_run_batch_invalidates_cache_after_commit(db_path):
+    driver = BatchDriver(db_path, pooled=True, cache_size=64)
+    user = driver.create_user("cached", "ios")
+    assert driver.get_calendar_events_for_user(user.user_id) == []
+
+    outcomes = driver.run_batch([("add_event_and_read_elsewhere", (user.user_id,), {})])
+
+    assert outcomes[0][0]
+    assert [event.title for event in driver.get_calendar_events_for_user(user.user_id)] == ["standup"]
+    driver.close()
+
+
+def test_driver_queries_use_an_index(capsys):
+    assert check_query_plans.main() == 0, capsys.readouterr().out
+
+
+def test_close_app_rounds_duration(db_path):
+    driver = DatabaseDriver(db_path)
+    user = driver.create_user("apps", "ios")
+    app = driver.add_app("maps", "navigation", user.user_id)
+    # Opened 2.6 seconds ago, with sub-second precision in the start time
+    started = (datetime.now() - timedelta(seconds=2.6)).isoformat()
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO app_usage_metrics (app_id, user_id, start_time) VALUES (?, ?, ?)",
+                 (app.app_id, user.user_id, started))
+    conn.commit()
+    conn.close()
+
+    driver.close_app(app.app_id, user.user_id)
+    [metric] = driver.iter_app_usage_metrics(user.user_id)
+    assert metric.duration == 3
+
+
+def test_cached_events_expire(db_path, monkeypatch):
+    monkeypatch.setattr(db_driver, "EVENTS_CACHE_TTL", 0.2)
+    # Two workers on one database, each with its own cache
+    worker, other = DatabaseDriver(db_path, cache_size=64), DatabaseDriver(db_path, cache_size=64)
+    user = worker.create_user("cached", "android")
+    worker.add_calendar_event("standup", "2024-01-01", "09:00", 15, user.user_id)
+    assert [event.status for event in worker.get_calendar_events_for_user(user.user_id)] == ["pending"]
+
+    feedback_id = other.get_pending_tasks(user.user_id)["calendar"][0]["feedback_id"]
+    other.resolve_task(feedback_id, "approved", user_id=user.user_id)
+    # Not invalidated across processes; pending tasks are never cached
+    assert [event.status for event in worker.get_calendar_events_for_user(user.user_id)] == ["pending"]
+    assert worker.get_pending_tasks(user.user_id)["calendar"] == []
+
+    time.sleep(0.25)
+    assert [event.status for event in worker.get_calendar_events_for_user(user.user_id)] == ["approved"]
+    # Entries without a ttl stay until a write or eviction
+    assert worker.get_user_by_name("cached") is worker.get_user_by_name("cached")
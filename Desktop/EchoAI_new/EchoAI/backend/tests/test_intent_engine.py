@@ -0,0 +1,48 @@
+from intent_engine import INTENT_ENGINE, IntentEngine
+
+
+def test_matches_whole_words_only():
+    # "text" is a messages keyword; "context" and "pretext" must not hit it
+    result = INTENT_ENGINE.match("give me some context on the pretext")
+    assert not result["is_task"]
+    assert result["task_type"] == "unknown"
+    assert result["confidence"] == "low"
+
+    # "start" is an action; "restart" is not
+    assert INTENT_ENGINE.match("restart")["actions"] == []
+    assert INTENT_ENGINE.match("text mom")["task_type"] == "messages"
+
+
+def test_inflections_and_punctuation():
+    result = INTENT_ENGINE.match("Any MEETINGS today? I'm texting, scheduled...")
+    assert {m["task_type"] for m in result["matches"]} == {"calendar", "messages"}
+    calendar = next(m for m in result["matches"] if m["task_type"] == "calendar")
+    assert calendar["keywords"] == ["meeting", "schedule"]
+
+
+def test_phrases():
+    result = INTENT_ENGINE.match("please send money to alex")
+    assert result["task_type"] == "transactions"
+    assert result["matches"][0]["keywords"] == ["send money"]
+    # The phrase needs its words in order and adjacent
+    assert not INTENT_ENGINE.match("send the money")["is_task"]
+    assert INTENT_ENGINE.match("go to maps")["actions"] == ["go to"]
+
+
+def test_scores_and_confidence():
+    result = INTENT_ENGINE.match("open the calendar and schedule a meeting")
+    assert result["confidence"] == "high"
+    assert result["actions"] == ["open"]
+    assert result["matches"][0] == {
+        "task_type": "calendar", "score": 3.5, "keywords": ["calendar", "meeting", "schedule"]
+    }
+    assert INTENT_ENGINE.match("my calendar")["confidence"] == "medium"
+
+
+def test_ties_follow_keyword_order():
+    engine = IntentEngine({"b": ["beta"], "a": ["alpha"]}, ["run"])
+    result = engine.match("alpha beta")
+    assert [m["task_type"] for m in result["matches"]] == ["b", "a"]
+    # A keyword shared by two types counts for both
+    shared = IntentEngine({"x": ["data"], "y": ["data"]}, []).match("data")
+    assert [m["task_type"] for m in shared["matches"]] == ["x", "y"]
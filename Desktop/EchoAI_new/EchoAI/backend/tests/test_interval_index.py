@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from interval_index import IntervalTree, event_span, from_epoch, normalize_slot, to_epoch
+
+
+def _brute_force(intervals, start, end):
+    return sorted(
+        (s, e, value) for (s, key), (e, value) in intervals.items() if e > start and s < end
+    )
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(5)
+    tree = IntervalTree()
+    intervals = {}
+    for key in range(2000):
+        start = rng.randrange(10_000)
+        end = start + rng.choice([0, 1, 15, 60, 600, 3000])
+        tree.add(start, end, key, f"event {key}")
+        intervals[(start, key)] = (end, f"event {key}")
+
+    # Removals must keep max_end right on every path they touch
+    for start, key in rng.sample(sorted(intervals), 700):
+        assert tree.remove(start, key)
+        del intervals[(start, key)]
+    assert not tree.remove(-1, 0)
+    assert len(tree) == len(intervals)
+
+    for _ in range(500):
+        start = rng.randrange(-100, 10_100)
+        end = start + rng.randrange(0, 2000)
+        found = tree.overlapping(start, end)
+        # Equal starts may come out in either key order; compare as sets
+        assert sorted(found) == _brute_force(intervals, start, end)
+        assert [s for s, _, _ in found] == sorted(s for s, _, _ in found)
+
+
+def test_iterates_in_start_order():
+    tree = IntervalTree()
+    for key, start in enumerate([30, 10, 20, 10]):
+        tree.add(start, start + 5, key, key)
+
+    assert [(start, value) for start, _, value in tree] == [(10, 1), (10, 3), (20, 2), (30, 0)]
+    with pytest.raises(ValueError):
+        tree.add(10, 5, 9)
+
+
+def test_touching_intervals_do_not_overlap():
+    tree = IntervalTree()
+    tree.add(0, 60, "a")
+    assert tree.overlapping(60, 120) == []
+    assert tree.overlapping(59, 60) == [(0, 60, None)]
+
+
+def test_free_slots():
+    tree = IntervalTree()
+    tree.add(100, 200, 1)
+    tree.add(150, 300, 2)
+    tree.add(400, 450, 3)
+
+    assert tree.free_slots(0, 600, 50) == [(0, 100), (300, 400), (450, 600)]
+    assert tree.free_slots(0, 600, 101) == [(450, 600)]
+    assert tree.free_slots(0, 600, 50, limit=2) == [(0, 100), (300, 400)]
+    assert tree.free_slots(120, 250, 10) == []
+
+
+def test_event_span():
+    assert normalize_slot("2024-1-5", "9:00") == ("2024-01-05", "09:00")
+    with pytest.raises(ValueError):
+        normalize_slot("2024-01-05", "9am")
+
+    start, end = event_span("2024-01-05", "9:00", 90)
+    assert end - start == 90 * 60
+    assert start == to_epoch("2024-01-05", "09:00")
+    assert from_epoch(end) == ("2024-01-05", "10:30")
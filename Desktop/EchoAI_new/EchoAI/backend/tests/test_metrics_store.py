@@ -0,0 +1,156 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from metrics_store import KLLSketch, MetricSeries, RunningStats, parse_timestamp
+
+
+def _hourly(values, start="2024-01-01 00:00"):
+    series = MetricSeries(capacity=2)
+    base = parse_timestamp(start)
+    series.extend(values, [base + np.timedelta64(3600 * i, "s") for i in range(len(values))])
+    return series
+
+
+def test_append_grows_past_capacity():
+    series = MetricSeries(capacity=1)
+    for minute, value in enumerate([3.0, 1.0, 2.0]):
+        series.append(value, f"2024-01-01 09:0{minute}")
+
+    assert len(series) == 3
+    assert series.values.tolist() == [3.0, 1.0, 2.0]
+    assert str(series.timestamps[-1]) == "2024-01-01T09:02:00"
+
+
+def test_rejects_bad_input():
+    with pytest.raises(ValueError):
+        parse_timestamp("yesterday")
+    with pytest.raises(ValueError):
+        MetricSeries().extend([1.0, 2.0], ["2024-01-01"])
+    with pytest.raises(ValueError):
+        MetricSeries().resample("2h")
+
+
+def test_summary_matches_numpy():
+    values = [4.0, 8.0, 15.0, 16.0, 23.0, 42.0]
+    summary = _hourly(values).summary()
+
+    assert summary["count"] == len(values)
+    assert summary["mean"] == pytest.approx(np.mean(values))
+    assert summary["stddev"] == pytest.approx(np.std(values))
+    assert summary["percentiles"][50] == pytest.approx(np.percentile(values, 50))
+    assert (summary["min"], summary["max"]) == (4.0, 42.0)
+    assert MetricSeries().summary() == {"count": 0}
+
+
+def test_trend_is_per_day():
+    # One unit per hour
+    assert _hourly([0.0, 1.0, 2.0, 3.0]).trend_slope() == pytest.approx(24.0)
+    assert _hourly([5.0]).trend_slope() == 0.0
+
+
+def test_windows_use_time_order():
+    series = MetricSeries()
+    series.append(30.0, "2024-01-01 02:00")
+    series.append(10.0, "2024-01-01 00:00")
+    series.append(20.0, "2024-01-01 01:00")
+
+    assert series.rolling_mean(2).tolist() == [15.0, 25.0]
+    assert series.rolling_mean(4).tolist() == []
+
+
+def test_resample_buckets():
+    series = _hourly([1.0, 2.0, 3.0, 4.0, 5.0], start="2024-01-01 22:00")
+
+    starts, sums = series.resample("1d", "sum")
+    assert [str(start) for start in starts] == ["2024-01-01T00:00:00", "2024-01-02T00:00:00"]
+    assert sums.tolist() == [3.0, 12.0]
+    assert series.resample("1d", "count")[1].tolist() == [2.0, 3.0]
+    assert series.resample("1d", "max")[1].tolist() == [2.0, 5.0]
+    assert series.resample("1d", "mean")[1].tolist() == [1.5, 4.0]
+
+
+def _stream(n, seed=7):
+    rng = np.random.default_rng(seed)
+    values = rng.permutation(n).astype(np.float64)
+    timestamps = parse_timestamp("2024-01-01 00:00") + np.arange(n).astype("timedelta64[m]")
+    return values, timestamps
+
+
+def test_kll_rank_error_within_bound():
+    n, k = 100_000, 200
+    values, _ = _stream(n)
+    sketch = KLLSketch(k=k, seed=1)
+    for value in values:
+        sketch.update(value)
+
+    qs = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+    # Values are 0..n-1, so a value is its own rank
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        assert abs(estimate / n - q) <= 2.0 / k
+    # O(k) items kept, not O(n)
+    assert sum(len(level) for level in sketch.to_dict()["levels"]) < 5 * k
+
+
+def test_kll_merge_keeps_bound():
+    n, k = 40_000, 200
+    values, _ = _stream(n)
+    left, right = KLLSketch(k=k, seed=2), KLLSketch(k=k, seed=3)
+    left.update_many(values[:n // 2])
+    right.update_many(values[n // 2:])
+    left.merge(right)
+
+    assert left.count == n
+    assert abs(left.quantiles([0.5])[0] / n - 0.5) <= 2.0 / k
+    assert math.isnan(KLLSketch().quantiles([0.5])[0])
+
+
+def test_running_stats_match_exact_pass():
+    values, timestamps = _stream(5000)
+    series = MetricSeries()
+    series.extend(values, timestamps)
+    one_by_one = RunningStats()
+    for value, timestamp in zip(values, timestamps):
+        one_by_one.add(float(value), timestamp)
+
+    exact = series.summary()
+    for stats in (series.stats, one_by_one):
+        summary = stats.summary()
+        assert summary["count"] == exact["count"]
+        assert summary["mean"] == pytest.approx(exact["mean"])
+        assert summary["stddev"] == pytest.approx(exact["stddev"])
+        assert summary["trend_per_day"] == pytest.approx(exact["trend_per_day"])
+        assert (summary["min"], summary["max"]) == (exact["min"], exact["max"])
+
+
+def test_running_stats_merge_is_exact():
+    values, timestamps = _stream(1000)
+    whole, first, second = RunningStats(), RunningStats(), RunningStats()
+    whole.add_many(values, timestamps)
+    first.add_many(values[:300], timestamps[:300])
+    second.add_many(values[300:], timestamps[300:])
+    first.merge(second)
+    first.merge(RunningStats())
+
+    for key in ("count", "mean", "stddev", "min", "max", "trend_per_day"):
+        assert first.summary()[key] == pytest.approx(whole.summary()[key])
+
+
+def test_running_stats_json_round_trip():
+    values, timestamps = _stream(3000)
+    stats = RunningStats()
+    stats.add_many(values, timestamps)
+
+    restored = RunningStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+    assert restored.summary() == stats.summary()
+
+    # Keeps accumulating where it left off
+    restored.add(1.0, timestamps[-1])
+    assert restored.count == stats.count + 1
+
+    empty = RunningStats.from_dict(json.loads(json.dumps(RunningStats().to_dict())))
+    assert empty.summary() == {"count": 0}
+    empty.add(2.0, timestamps[0])
+    assert (empty.min, empty.max) == (2.0, 2.0)
@@ -0,0 +1,74 @@
+import multiprocessing
+import sqlite3
+
+from db_driver import MIGRATIONS, DatabaseDriver
+
+PROCESSES = 6
+
+
+def _open(db_path, barrier, errors):
+    barrier.wait()
+    try:
+        DatabaseDriver(db_path, pooled=True).close()
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def test_migrates_baseline_database(baseline_db):
+    DatabaseDriver(baseline_db).close()
+
+    conn = sqlite3.connect(baseline_db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0]
+    assert {"start_epoch", "end_epoch"} <= _columns(conn, "calendar_events")
+    assert {"pref_theme", "pref_language"} <= _columns(conn, "users")
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE NOT json_valid(preferences)").fetchone()[0] == 0
+    conn.close()
+
+    # Reopening an up-to-date database is a no-op
+    DatabaseDriver(baseline_db).close()
+
+
+def test_repairs_unpadded_event_times(db_path):
+    driver = DatabaseDriver(db_path)
+    user = driver.create_user("padding", "android")
+    driver.close()
+
+    # Written before the driver padded times: the span triggers store NULL
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO calendar_events (title, date, time, duration, user_id) VALUES ('dentist', '2024-1-5', '9:00', 60, ?)",
+        (user.user_id,)
+    )
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+    conn.close()
+
+    driver = DatabaseDriver(db_path)
+    assert [event.title for event in driver.get_calendar_conflicts(user.user_id, "2024-01-05", "09:30", 30)] == ["dentist"]
+    assert [(event.date, event.time) for event in driver.get_calendar_events_for_user(user.user_id)] == [("2024-01-05", "09:00")]
+    driver.close()
+
+
+def test_concurrent_processes_migrate_once(baseline_db):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(PROCESSES)
+    errors = ctx.Queue()
+    workers = [ctx.Process(target=_open, args=(baseline_db, barrier, errors)) for _ in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    assert failures == []
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    conn = sqlite3.connect(baseline_db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0]
+    conn.close()
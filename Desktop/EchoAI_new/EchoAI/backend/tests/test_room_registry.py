@@ -0,0 +1,86 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("livekit.api")
+
+from room_registry import RoomRegistry
+
+
+class FakeAPI:
+    """Stands in for LiveKitAPI: a fixed room list and a close flag"""
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.closed = False
+        self.room = self
+
+    async def list_rooms(self, request):
+        return SimpleNamespace(rooms=[SimpleNamespace(name=name) for name in self.names])
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_allocates_unique_prefixed_names():
+    registry = RoomRegistry(prefix="test-")
+    names = {registry.allocate_name() for _ in range(100)}
+
+    assert len(names) == 100
+    assert all(name.startswith("test-") and len(name) == len("test-") + 32 for name in names)
+    # Handed-out names count as taken until the server reports them
+    assert registry.rooms() == names
+
+
+def test_webhook_events_update_cache():
+    registry = RoomRegistry()
+    name = registry.allocate_name()
+
+    registry.room_started(name)
+    registry.room_started("lobby")
+    assert registry.rooms() == {name, "lobby"}
+    registry.room_finished(name)
+    assert registry.rooms() == {"lobby"}
+    registry.room_finished("never-started")
+
+
+def test_refresh_replaces_rooms_and_expires_pending():
+    api = FakeAPI(["lobby", "room-a"])
+    registry = RoomRegistry(api_factory=lambda: api, pending_ttl=60.0)
+    registry._api = api
+    registry.room_started("gone")
+    waiting = registry.allocate_name()
+
+    asyncio.run(registry.refresh())
+    assert registry.rooms() == {"lobby", "room-a", waiting}
+
+    # A pending name the server now lists is no longer pending, so it goes
+    # away with the server's room
+    api.names.append(waiting)
+    asyncio.run(registry.refresh())
+    api.names.remove(waiting)
+    asyncio.run(registry.refresh())
+    assert registry.rooms() == {"lobby", "room-a"}
+
+    # Pending names the server never reports expire
+    registry.pending_ttl = 0.0
+    registry.allocate_name()
+    asyncio.run(registry.refresh())
+    assert registry.rooms() == {"lobby", "room-a"}
+
+
+def test_background_refresh_lifecycle():
+    api = FakeAPI(["lobby"])
+    registry = RoomRegistry(api_factory=lambda: api, ttl=0.01)
+    registry.start()
+    try:
+        for _ in range(100):
+            if registry.rooms():
+                break
+            time.sleep(0.01)
+        assert registry.rooms() == {"lobby"}
+    finally:
+        registry.stop()
+    assert api.closed
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("livekit.api")
+
+import token_cache
+from token_cache import TokenIssuer
+
+
+class CountingIssuer(TokenIssuer):
+    """TokenIssuer whose tokens say what was signed and when"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__("key", "secret", *args, **kwargs)
+        self.signed = 0
+
+    def _sign(self, identity: str, room: str) -> str:
+        self.signed += 1
+        return f"{identity}@{room}#{self.signed}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_requires_credentials():
+    with pytest.raises(ValueError):
+        TokenIssuer(None, "secret")
+    with pytest.raises(ValueError):
+        TokenIssuer("key", "")
+
+
+def test_reuses_token_per_identity_and_room(clock):
+    issuer = CountingIssuer()
+    first = issuer.issue("alice", "room-1")
+
+    assert issuer.issue("alice", "room-1") == first
+    assert issuer.issue("alice", "room-2") != first
+    assert issuer.issue("bob", "room-1") != first
+    assert issuer.stats() == {"size": 3, "hits": 1, "misses": 3}
+
+
+def test_refreshes_before_expiry(clock):
+    issuer = CountingIssuer(ttl=100.0, refresh_margin=0.25)
+    first = issuer.issue("alice", "room")
+
+    # More than a quarter of the lifetime left: still served from the cache
+    clock[0] += 74
+    assert issuer.issue("alice", "room") == first
+    # Any less and the client gets a fresh token
+    clock[0] += 2
+    second = issuer.issue("alice", "room")
+    assert second != first
+    assert issuer.issue("alice", "room") == second
+
+
+def test_expired_entries_are_evicted(clock):
+    issuer = CountingIssuer(ttl=100.0)
+    issuer.issue("alice", "room")
+    issuer.issue("bob", "room")
+
+    clock[0] += 101
+    issuer.issue("carol", "room")
+    assert issuer.stats()["size"] == 1
+
+
+def test_least_recently_used_goes_first(clock):
+    issuer = CountingIssuer(capacity=2)
+    alice = issuer.issue("alice", "room")
+    issuer.issue("bob", "room")
+    issuer.issue("alice", "room")  # alice is now the most recent
+    issuer.issue("carol", "room")
+
+    assert issuer.stats()["size"] == 2
+    assert issuer.issue("alice", "room") == alice
+    assert issuer.signed == 3
+    issuer.issue("bob", "room")
+    assert issuer.signed == 4
+
+
+def test_expiry_heap_stays_bounded(clock):
+    issuer = CountingIssuer(capacity=3)
+    for i in range(50):
+        issuer.issue(f"user{i}", "room")
+
+    assert issuer.stats()["size"] == 3
+    assert len(issuer._expiries) <= 2 * issuer.capacity
+
+
+def test_issue_batch(clock):
+    issuer = CountingIssuer()
+    tokens = issuer.issue_batch(["alice", "bob", "alice"], "room")
+
+    assert set(tokens) == {"alice", "bob"}
+    assert issuer.signed == 2
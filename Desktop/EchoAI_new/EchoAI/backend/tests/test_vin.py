@@ -0,0 +1,59 @@
+from db_driver import DatabaseDriver
+from vin import check_digit, decode, has_valid_check_digit, is_valid, model_year, normalize, variants
+
+HONDA = "1HGCM82633A004352"
+# Same car with a last character that sounds alike; only the first has a valid check digit
+VALID = "1HGCM82653A004353"
+MISHEARD = "1HGCM82653A00435B"
+
+
+def test_check_digit():
+    assert check_digit(HONDA) == "3"
+    assert has_valid_check_digit(HONDA)
+    # Weight 10 at position 8 and remainder 10 written as X
+    assert has_valid_check_digit("1M8GDM9AXKP042788")
+    assert not has_valid_check_digit(HONDA[:8] + "4" + HONDA[9:])
+    assert not has_valid_check_digit(HONDA[:-1] + "3")
+    assert not has_valid_check_digit(HONDA[:-1])
+
+
+def test_normalize_and_validate():
+    assert normalize(" 1hg-cm8 2633a0o4.352") == HONDA
+    assert normalize("IOQ") == "100"
+    assert is_valid(HONDA)
+    assert not is_valid(HONDA + "1")
+    assert not is_valid(HONDA[:-1] + "I")
+
+
+def test_decode():
+    assert decode(HONDA.lower()) == {"wmi": "1HG", "make": "Honda", "year": 2003}
+    assert decode("11111111111111111")["make"] is None
+    # Position 7 picks the 30 year cycle
+    assert model_year("5YJ3E1EA7KF317000") == 2019
+    assert model_year("1HGCM8263KA004352") == 1989
+    assert model_year(HONDA[:9] + "U" + HONDA[10:]) is None
+
+
+def test_variants():
+    found = list(variants("M5"))
+    assert found[0] == "M5"
+    assert sorted(found[1:]) == ["M9", "N5"]
+    assert list(variants("11")) == ["11"]
+
+
+def test_resolve_misheard_vin(db_path):
+    driver = DatabaseDriver(db_path)
+    assert driver.create_car(HONDA, "", "Accord", 0).year == 2003
+    assert driver.create_car(HONDA, "Honda", "Accord", 2003) is None
+    assert driver.create_car("NOT A VIN", "Honda", "Accord", 2003) is None
+    driver.create_car(VALID, "Honda", "Civic", 2003)
+    driver.create_car(MISHEARD, "Honda", "Jazz", 2003)
+
+    # One confusable character off: the VIN with a valid check digit first
+    fragment = VALID[:-1] + "E"
+    assert [car.vin for car in driver.resolve_vin(fragment)] == [VALID, MISHEARD]
+    # An exact match beats the check digit
+    assert [car.vin for car in driver.resolve_vin(MISHEARD)][0] == MISHEARD
+    # The last six characters, read out with a 5 heard as 9
+    assert [car.vin for car in driver.resolve_vin("004392")] == [HONDA]
+    assert driver.resolve_vin("4352") == []
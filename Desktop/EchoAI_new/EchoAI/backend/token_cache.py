@@ -0,0 +1,85 @@
+import heapq
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from livekit import api
+
+
+class TokenIssuer:
+    """
+    Signs LiveKit join tokens with credentials read once, and keeps an LRU
+    cache of still-valid JWTs per (identity, room). A cached token is reused
+    while more than `refresh_margin` of its lifetime remains, so clients
+    never receive one that is about to expire. Expired entries are evicted
+    in expiry order via a heap; beyond `capacity` the least recently used
+    entry goes.
+
+    The cache only helps callers that ask again for the same room. A
+    /getToken request without a room (what the frontend sends) gets a
+    newly allocated room, so its key never repeats and it is always signed.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, ttl: float = 3600.0,
+                 capacity: int = 10_000, refresh_margin: float = 0.25):
+        if not api_key or not api_secret:
+            raise ValueError("LIVEKIT_API_KEY and LIVEKIT_API_SECRET must be set")
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self.ttl = ttl
+        self.capacity = capacity
+        self._min_remaining = ttl * refresh_margin
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._expiries: List[Tuple[float, Tuple[str, str]]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def _sign(self, identity: str, room: str) -> str:
+        return api.AccessToken(self._api_key, self._api_secret) \
+            .with_identity(identity)\
+            .with_name(identity)\
+            .with_ttl(timedelta(seconds=self.ttl))\
+            .with_grants(api.VideoGrants(
+                room_join=True,
+                room=room
+            )).to_jwt()
+
+    def _evict_expired(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._cache.get(key)
+            # The heap can hold stale expiries for keys that were re-signed
+            if entry is not None and entry[1] == expires_at:
+                del self._cache[key]
+
+    def issue(self, identity: str, room: str) -> str:
+        now = time.time()
+        key = (identity, room)
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] - now > self._min_remaining:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        token = self._sign(identity, room)
+        expires_at = now + self.ttl
+        self._cache[key] = (token, expires_at)
+        self._cache.move_to_end(key)
+        heapq.heappush(self._expiries, (expires_at, key))
+
+        self._evict_expired(now)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        # Keep the heap from growing without bound after LRU evictions
+        if len(self._expiries) > 2 * self.capacity:
+            self._expiries = [(at, key) for key, (_, at) in self._cache.items()]
+            heapq.heapify(self._expiries)
+        return token
+
+    def issue_batch(self, identities: Iterable[str], room: str) -> Dict[str, str]:
+        return {identity: self.issue(identity, room) for identity in identities}
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,94 @@
+import re
+from typing import Dict, Iterator, Optional
+
+# VINs never use I, O or Q, so those are always a mishearing of 1 and 0
+VIN_RE = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
+_NORMALIZE = str.maketrans({"I": "1", "O": "0", "Q": "0"})
+_STRIP = re.compile(r"[\s\-_.]")
+
+# Check digit (position 9) transliteration and position weights
+_VALUES = {
+    **{str(d): d for d in range(10)},
+    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7, "H": 8,
+    "J": 1, "K": 2, "L": 3, "M": 4, "N": 5, "P": 7, "R": 9,
+    "S": 2, "T": 3, "U": 4, "V": 5, "W": 6, "X": 7, "Y": 8, "Z": 9,
+}
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Model year code (position 10) -> first year of each 30 year cycle
+_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+MODEL_YEARS: Dict[str, int] = {code: 1980 + i for i, code in enumerate(_YEAR_CODES)}
+
+# World manufacturer identifiers (positions 1-3) of common makes
+WMI_MAKES: Dict[str, str] = {
+    "1FA": "Ford", "1FM": "Ford", "1FT": "Ford", "3FA": "Ford",
+    "1G1": "Chevrolet", "1GC": "Chevrolet", "1GN": "Chevrolet",
+    "1HG": "Honda", "2HG": "Honda", "5FN": "Honda", "19X": "Honda", "JHM": "Honda",
+    "1N4": "Nissan", "5N1": "Nissan", "JN1": "Nissan",
+    "1C4": "Jeep", "1J4": "Jeep", "2C3": "Chrysler",
+    "1VW": "Volkswagen", "3VW": "Volkswagen", "WVW": "Volkswagen",
+    "2T1": "Toyota", "4T1": "Toyota", "JT2": "Toyota", "JTD": "Toyota",
+    "4S3": "Subaru", "JF1": "Subaru",
+    "5YJ": "Tesla",
+    "JM1": "Mazda",
+    "KMH": "Hyundai", "KNA": "Kia",
+    "SAJ": "Jaguar", "SAL": "Land Rover",
+    "VF1": "Renault", "VF3": "Peugeot",
+    "WAU": "Audi", "WBA": "BMW", "WDB": "Mercedes-Benz", "WDD": "Mercedes-Benz",
+    "WP0": "Porsche", "YV1": "Volvo", "ZAR": "Alfa Romeo", "ZFF": "Ferrari",
+}
+
+# Letters and digits speech recognition confuses with each other
+_CONFUSABLE_GROUPS = ("BCDEGPTVZ3", "AHJK8", "MN", "FSX", "59")
+CONFUSABLE: Dict[str, str] = {
+    char: group.replace(char, "") for group in _CONFUSABLE_GROUPS for char in group
+}
+
+
+def normalize(vin: str) -> str:
+    """Uppercase, drop separators and map I/O/Q to 1/0/0"""
+    return _STRIP.sub("", vin).upper().translate(_NORMALIZE)
+
+
+def is_valid(vin: str) -> bool:
+    return bool(VIN_RE.match(vin))
+
+
+def check_digit(vin: str) -> str:
+    total = sum(_VALUES[char] * weight for char, weight in zip(vin, _WEIGHTS))
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def has_valid_check_digit(vin: str) -> bool:
+    # Mandatory for North American VINs only, so a hint rather than a rule
+    return is_valid(vin) and vin[8] == check_digit(vin)
+
+
+def model_year(vin: str) -> Optional[int]:
+    """
+    Model year from position 10. The code repeats every 30 years; position 7
+    is a letter from 2010 on for North American passenger vehicles, which
+    picks the cycle.
+    """
+    first = MODEL_YEARS.get(vin[9]) if len(vin) >= 10 else None
+    if first is None:
+        return None
+    return first + 30 if vin[6].isalpha() else first
+
+
+def decode(vin: str) -> Dict[str, Optional[object]]:
+    vin = normalize(vin)
+    return {
+        "wmi": vin[:3],
+        "make": WMI_MAKES.get(vin[:3]),
+        "year": model_year(vin),
+    }
+
+
+def variants(fragment: str) -> Iterator[str]:
+    """The fragment itself, then every single-character confusable substitution"""
+    yield fragment
+    for i, char in enumerate(fragment):
+        for alternative in CONFUSABLE.get(char, ""):
+            yield fragment[:i] + alternative + fragment[i + 1:]
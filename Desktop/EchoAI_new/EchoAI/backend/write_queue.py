@@ -0,0 +1,108 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict
+
+from db_driver import DatabaseDriver
+
+logger = logging.getLogger("write-queue")
+logger.setLevel(logging.INFO)
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Single writer thread that group-commits DatabaseDriver writes. Callers
+    submit a write method call and get a Future back. The writer drains the
+    queue into batches of at most `max_batch` calls and commits each batch
+    once through DatabaseDriver.run_batch. Every future resolves only after
+    its batch is committed.
+
+    Writes that arrive while a batch is committing form the next batch, so
+    batches grow with load without any waiting. max_delay > 0 also holds a
+    batch open up to that many seconds for more writes; that only pays off
+    when callers do not wait on each write.
+    """
+
+    def __init__(self, driver: DatabaseDriver, max_batch: int = 128, max_delay: float = 0.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self._driver = driver
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self.batches = 0
+        self.calls = 0
+        self._thread = threading.Thread(target=self._run, name="db-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("write queue is closed")
+        if not callable(getattr(self._driver, name, None)):
+            raise AttributeError(f"DatabaseDriver has no method {name!r}")
+        future = Future()
+        self._queue.put((future, name, args, kwargs))
+        return future
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            # Callers that cancelled while queued are dropped
+            batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                outcomes = self._driver.run_batch([(name, args, kwargs) for _, name, args, kwargs in batch])
+            except Exception as e:
+                logger.exception("group commit of %d writes failed", len(batch))
+                for future, *_ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.calls += len(batch)
+            for (future, *_), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def close(self):
+        """Commit everything already submitted, then stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "calls_per_batch": self.calls / self.batches if self.batches else 0.0,
+        }